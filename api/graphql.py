@@ -4,6 +4,7 @@ from typing import List, Optional
 import logging
 # Import database operations
 import db.database_ops as db
+import db.database_async as database_async
 from models.schemas import AppointmentInfoQL
 
 from dotenv import load_dotenv
@@ -33,6 +34,15 @@ class ServiceResult:
     service_id: List[str]
 
 
+@strawberry.type
+class AvailableStartType:
+    day: str
+    week: str
+    date: str  # ISO 8601 date
+    start: str  # HH:MM
+    end: str  # HH:MM
+
+
 @strawberry.type
 class AppointmentType:
     id: strawberry.ID
@@ -118,6 +128,26 @@ class Query:
             return appointment_from_db(appt_data)
         return None
 
+    @strawberry.field
+    async def available_start_times(
+        self,
+        days: List[str],
+        timeframe: str,
+        service_code: Optional[str] = None,
+        duration_min: Optional[int] = None,
+    ) -> List[AvailableStartType]:
+        # Start times in the timeframe (HH:MM-HH:MM) with room for the whole service
+        if duration_min is None:
+            duration_min = await database_async.get_processing_time(service_code) if service_code else None
+            if duration_min is None:
+                raise ValueError("A known service_code or a duration_min is required")
+        start_time, end_time = timeframe.split("-")
+        async with database_async.async_session() as session:
+            starts = await database_async.get_available_start_times(
+                session, days, start_time, end_time, duration_min
+            )
+        return [AvailableStartType(**start) for start in starts]
+
     @strawberry.field(name="getServiceIdFromCarInfo")
     def get_service_id_from_car_info(
         self,
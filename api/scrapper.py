@@ -1,27 +1,36 @@
 from scrapers.getCarScrapper import GetCarScrapper
 from scrapers.modelAppointmentScrapper import MakeAppointmentScrapper
-from fastapi import APIRouter, HTTPException, Query, Depends
+from fastapi import APIRouter, HTTPException, Query, Depends, Request
 from fastapi.responses import JSONResponse
 from models.schemas import (
     AppointmentInfo,
     CarInfoResponse,
     AppointmentResponse,
-    AppointmentAvailability,
     AppointmentAvailabilityApi,
     CallLogCreate,
     FeedbackCreate,
 )
-from scrapers.availabilityScrapper import AvailabilityScrapper
+from scrapers.availability_refresher import availability_refresher
+from scrapers.asset_cache import asset_cache
+from scrapers.network import ESTIMATED_BYTES, route_stats
+from db.write_queue import call_log_writer
 import logging
 from typing import Optional
-from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
-import db.database_availability as db_availability
+from sqlmodel.ext.asyncio.session import AsyncSession
+import db.database_async as database_async
+import db.availability_snapshot as availability_snapshot
 from datetime import datetime
+from pydantic import ValidationError
+import json
+import os
 
 router = APIRouter(tags=["Scrapers"])
 logger = logging.getLogger(__name__)
 
+# Most call logs accepted by one /call_logs:bulk request
+CALL_LOG_BULK_MAX = int(os.getenv("CALL_LOG_BULK_MAX", 20000))
+
 
 @router.get(
     "/get_cars",
@@ -72,10 +81,20 @@ async def get_appointments_api(
     weekdays: str = Query(
         ..., examples="Monday,Tuesday", description="Days of the week"
     ),
+    service_code: Optional[str] = Query(
+        None, examples="01T4CLC8FZ", description="Only start times with room for this service"
+    ),
+    duration_min: Optional[int] = Query(
+        None, gt=0, examples=60, description="Only start times with room for this many minutes"
+    ),
+    db: AsyncSession = Depends(database_async.get_session),
 ):
     """
     API endpoint to get available appointments.
     Example: GET /check_availability?timeframe=14:00-16:00&days=Monday,Tuesday
+    With service_code (its processing time) or duration_min, returns the start
+    times in the timeframe where the whole service fits in consecutive free slots.
+    Example: GET /check_availability?timeframe=14:00-16:00&weekdays=Monday&service_code=01T4CLC8FZ
     """
     # Convert the `days` string into a list of days
     days_list = weekdays.split(",")
@@ -88,76 +107,151 @@ async def get_appointments_api(
         raise HTTPException(
             status_code=400, detail="Invalid timeframe format. Use HH:MM-HH:MM."
         )
+    if service_code is not None and duration_min is None:
+        duration_min = await database_async.get_processing_time(service_code)
+        if duration_min is None:
+            raise HTTPException(status_code=404, detail=f"Unknown service code {service_code}")
+    if duration_min is not None:
+        return await database_async.get_available_start_times(
+            db, days_list, start_time_str, end_time_str, duration_min
+        )
+
     check_values = AppointmentAvailabilityApi(timeframe=timeframe, days=days_list)
 
-    # Use asyncio.gather to run multiple scrapers concurrently
-    available_appointments = db_availability.get_available_appointments(
-        check_values, start_time, end_time
+    available_appointments = await database_async.get_available_appointments(
+        db, check_values, start_time, end_time
     )
     return available_appointments
 
 
-@router.get("/add_availabilities", summary="Add availability to database")
-async def add_availabilities_api(db: Session = Depends(db_availability.get_session)):
+@router.get("/next_available", summary="Earliest available appointment start times")
+async def next_available_api(
+    after: Optional[datetime] = Query(
+        None, examples="2025-08-18T09:00:00", description="Only starts from this time (default: now)"
+    ),
+    limit: int = Query(3, ge=1, le=50, description="Number of start times to return"),
+    weekdays: Optional[str] = Query(
+        None, examples="Monday,Tuesday", description="Only these days of the week"
+    ),
+    timeframe: Optional[str] = Query(
+        None, examples="14:00-16:00", description="Only starts within this time of day"
+    ),
+    service_code: Optional[str] = Query(
+        None, examples="01T4CLC8FZ", description="Only start times with room for this service"
+    ),
+    duration_min: Optional[int] = Query(
+        None, gt=0, examples=60, description="Only start times with room for this many minutes"
+    ),
+    db: AsyncSession = Depends(database_async.get_session),
+):
     """
-    Endpoint to scrape availability data and update the database.
-    This endpoint scrapes availability for a set number of weeks, processes the data, and updates the DB.
+    API endpoint answering "what is your earliest slot?".
+    Example: GET /next_available?limit=3&weekdays=Monday,Friday&service_code=01T4CLC8FZ
     """
-    # Define days of the week and the timeframe to be used in the availability query
-    days_list = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
-    timeframe = "06:45-17:00"
+    start_time_str = end_time_str = None
+    if timeframe:
+        try:
+            start_time_str, end_time_str = timeframe.split("-")
+            datetime.strptime(start_time_str, "%H:%M")
+            datetime.strptime(end_time_str, "%H:%M")
+        except ValueError:
+            raise HTTPException(
+                status_code=400, detail="Invalid timeframe format. Use HH:MM-HH:MM."
+            )
+    if service_code is not None and duration_min is None:
+        duration_min = await database_async.get_processing_time(service_code)
+        if duration_min is None:
+            raise HTTPException(status_code=404, detail=f"Unknown service code {service_code}")
 
-    # Create an AppointmentAvailability object with required details
-    check_values = AppointmentAvailability(
-        telephone="5142433043",  # Placeholder for a phone number, adjust accordingly
-        timeframe=timeframe,
-        days=days_list,
-        number_of_weeks=3,
+    return await database_async.get_next_available_starts(
+        db,
+        after=after,
+        limit=limit,
+        days=weekdays.split(",") if weekdays else None,
+        start_time=start_time_str,
+        end_time=end_time_str,
+        duration_min=duration_min,
     )
 
-    try:
-        # Fetch availability data
-        data = await AvailabilityScrapper(check_values).get_availability()
 
-        # If no data is returned, raise an error
-        if not data:
-            raise HTTPException(status_code=404, detail="No availability data found")
+@router.get("/add_availabilities", summary="Refresh every availability week now")
+async def add_availabilities_api():
+    """
+    Endpoint to refresh the availability tables immediately.
+    The tables are normally kept fresh by the background refresher; this runs
+    every refresh tier now and waits for them. Tiers that are already refreshing
+    are skipped; if any were, the response is 202 with the outcome of each tier.
+    """
+    results = await availability_refresher.refresh_all()
+    failed = [tier for tier in availability_refresher.tiers if results[tier.name] == "failed"]
+    if failed:
+        raise HTTPException(status_code=500, detail="; ".join(f"{t.name}: {t.last_error}" for t in failed))
 
-        # Process and update the database with the fetched schedule data
-        db_availability.process_schedule_data(db, data)
+    if "skipped" in results.values():
+        return JSONResponse(status_code=202, content={
+            "message": "A refresh is already running for some weeks; they will be stored when it finishes",
+            "tiers": results,
+        })
+    return {"message": "Availability successfully added to the database", "tiers": results}
 
-        return {"message": "Availability successfully added to the database"}
 
-    except Exception as e:
-        print(e)
-        raise HTTPException(status_code=500, detail=str(e))
+@router.get("/availability_status", summary="Status of the background availability refresher")
+async def availability_status_api():
+    """
+    Endpoint reporting, for each refresh tier, its weeks, interval and last runs,
+    and the version of the in-memory availability snapshot.
+    """
+    snapshot = availability_snapshot.current()
+    return {
+        **availability_refresher.status(),
+        "snapshot": snapshot.info() if snapshot else None,
+    }
+
+
+@router.get("/writer_status", summary="Status of the call log and feedback writer")
+async def writer_status_api():
+    """
+    Endpoint reporting the writer queue depth and its backpressure (submissions
+    that waited for room or were rejected), and the size and duration of its group commits.
+    """
+    return call_log_writer.status()
+
+
+@router.get("/network_status", summary="Requests and bytes saved by resource blocking and the asset cache")
+async def network_status_api():
+    """
+    Endpoint reporting, since the process started, the requests aborted by the
+    scrapers' resource policies and the bundles served from the asset cache.
+    Aborted requests never report their size, so their bytes are an estimate
+    from a typical size per resource type; the asset cache bytes are exact.
+    """
+    return {
+        "blocked": {
+            **route_stats.as_dict(),
+            "bytes_saved_are_estimated": True,
+            "estimated_bytes_per_request": ESTIMATED_BYTES,
+        },
+        "asset_cache": asset_cache.stats.as_dict() if asset_cache is not None else None,
+    }
 
 
 @router.post("/call_log", summary="Add call log to database")
 async def add_call_log_api(
-    call_log: CallLogCreate, db: Session = Depends(db_availability.get_session)
+    call_log: CallLogCreate, db: AsyncSession = Depends(database_async.get_session)
 ):
     try:
         # Check if the appointment exists before inserting the call log
         if call_log.appointment_id:
-            appointment = (
-                db.query(db_availability.Appointment)
-                .filter(db_availability.Appointment.id == call_log.appointment_id)
-                .first()
-            )
+            appointment = await database_async.get_appointment(db, call_log.appointment_id)
             if not appointment:
                 raise HTTPException(status_code=400, detail="Appointment not found")
 
-        # Convert the Pydantic model to an SQLAlchemy model
-        call_log_instance = db_availability.Call_Log(**call_log.model_dump())
-        call_log_id = db_availability.insert_call_log_db(db, call_log_instance)
-        feedback = db_availability.Feedback(call_log_id=call_log_id, feedback=None)
-        db_availability.insert_feedback_db(db, feedback)
-        return {"message": "Call log added to the database"}
+        # Written with the other call events of the burst in one transaction
+        call_log_id, _ = await call_log_writer.add_call_log(call_log.model_dump())
+        return {"message": "Call log added to the database", "call_log_id": call_log_id}
     except HTTPException as e:
         raise e
     except IntegrityError as e:
-        db.rollback()  # Rollback in case of IntegrityError
         print(e)
         raise HTTPException(status_code=400, detail="Foreign key constraint violation")
     except Exception as e:
@@ -165,20 +259,56 @@ async def add_call_log_api(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/call_logs:bulk", summary="Add many call logs to database")
+async def add_call_logs_bulk_api(request: Request):
+    """
+    Endpoint ingesting a batch of call logs, e.g. to reconcile a day of telephony
+    records. The body is a JSON array of call logs, or one call log per line
+    with Content-Type: application/x-ndjson. Valid rows are inserted with their
+    empty feedback in one transaction; the response has one result per row, in order.
+    """
+    body = await request.body()
+    try:
+        if "ndjson" in request.headers.get("content-type", ""):
+            records = [json.loads(line) for line in body.decode("utf-8").splitlines() if line.strip()]
+        else:
+            records = json.loads(body)
+    except (UnicodeDecodeError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid JSON: {e}")
+    if not isinstance(records, list):
+        raise HTTPException(status_code=400, detail="Expected a JSON array of call logs")
+    if len(records) > CALL_LOG_BULK_MAX:
+        raise HTTPException(status_code=413, detail=f"At most {CALL_LOG_BULK_MAX} call logs per request")
+
+    results = [None] * len(records)
+    valid = {}  # index -> call log
+    for index, record in enumerate(records):
+        try:
+            valid[index] = CallLogCreate.model_validate(record).model_dump()
+        except ValidationError as e:
+            results[index] = {"index": index, "status": "invalid", "error": e.errors(include_url=False, include_context=False)}
+
+    try:
+        inserted = await call_log_writer.add_call_logs(list(valid.values())) if valid else []
+    except IntegrityError as e:
+        print(e)
+        raise HTTPException(status_code=400, detail="Foreign key constraint violation")
+    for index, ids in zip(valid, inserted):
+        if ids is None:
+            results[index] = {"index": index, "status": "appointment_not_found"}
+        else:
+            results[index] = {"index": index, "status": "created", "call_log_id": ids[0], "feedback_id": ids[1]}
+
+    created = sum(1 for result in results if result["status"] == "created")
+    return {"created": created, "failed": len(results) - created, "results": results}
+
+
 @router.post("/feedback", summary="Add or extend the feedback to database")
-async def add_feedback_api(
-    feedback: FeedbackCreate, db: Session = Depends(db_availability.get_session)
-):
+async def add_feedback_api(feedback: FeedbackCreate):
     try:
         logger.info(feedback)
-        feedback_db = db_availability.get_latest_feedback(db, feedback.phone_number)
-        if feedback_db is not None:
-            if feedback_db.feedback is None:
-                feedback_db.feedback = feedback.feedback
-            else:
-                feedback_db.feedback = feedback_db.feedback + "\n" + feedback.feedback
-            db_availability.update_feedback_db(db, feedback_db)
-        else:
+        feedback_id = await call_log_writer.append_feedback(feedback.phone_number, feedback.feedback)
+        if feedback_id is None:
             return JSONResponse(
                 content={"message": "No feedback found"}, status_code=404
             )
@@ -3,8 +3,13 @@ from api.graphql import graphql_app
 from api.scrapper import router as scraper
 from contextlib import asynccontextmanager
 import db.database_ops as db_ops
+import db.database_async as database_async
+from db.write_queue import call_log_writer
 import db.database_availability as db_availability
 from logs.logging_config import setup_logging
+from scrapers.browser import browser_manager
+from scrapers.page_pool import page_pool
+from scrapers.availability_refresher import availability_refresher
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
 import os
@@ -22,8 +27,12 @@ async def lifespan(app: FastAPI):
     Manages the lifespan of the FastAPI application.
 
     This function executes startup and shutdown code for the application.
-    On startup, it initializes the database and adds default data if not present.
-    On shutdown, it performs any necessary cleanup tasks.
+    On startup, it initializes the database and adds default data if not present,
+    then launches the shared Chromium browser used by the scrapers and parks
+    a pool of logged-in pages at the phone-number input, and starts the
+    call log writer and, when AVAILABILITY_REFRESH_ENABLED is true, the
+    background availability refresher.
+    On shutdown, it stops the refresher and the writer, closes the pool, the browser and the async database engine and performs any necessary cleanup tasks.
 
     Args:
         app (FastAPI): The FastAPI application instance.
@@ -34,9 +43,28 @@ async def lifespan(app: FastAPI):
     if was_created:
         db_ops.add_data_default_db()
     db_availability.create_db_if_not_exists()
+    db_availability.refresh_availability_snapshot()
     print("Database initialized.")
+    try:
+        await browser_manager.start()
+        await page_pool.start(browser_manager)
+    except Exception as e:
+        # Scrapers fall back to launching their own browser per request
+        logger.error(f"Could not launch the shared browser: {e}")
+    app.state.browser_manager = browser_manager
+    app.state.page_pool = page_pool
+    # Off by default: turn it on in exactly one process of the deployment (see AvailabilityRefresher)
+    if os.getenv("AVAILABILITY_REFRESH_ENABLED", "false").lower() == "true":
+        availability_refresher.start()
+    app.state.availability_refresher = availability_refresher
+    call_log_writer.start()
     yield
     # Code to run on shutdown (if any)
+    await availability_refresher.stop()
+    await call_log_writer.stop()
+    await page_pool.stop()
+    await browser_manager.stop()
+    await database_async.async_engine.dispose()
     print("Application shutdown.")
 app = FastAPI(name=f"{os.getenv('SDS_URL')[8:].split(".")[0].capitalize()} SDSweb API",
               title=f"{os.getenv('SDS_URL')[8:].split(".")[0].capitalize()} SDSweb API",
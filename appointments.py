@@ -1,12 +1,20 @@
 import os, sqlite3
+from db.engine import DB_ENGINE_PROFILE, SQLITE_BUSY_TIMEOUT_MS, apply_sqlite_pragmas, sqlite_pragmas
 
 DB_FILE = "./db.sqlite"
 
+
+def connect() -> sqlite3.Connection:
+    """Open DB_FILE with the same SQLite pragmas as the SQLAlchemy engines."""
+    conn = sqlite3.connect(DB_FILE, timeout=SQLITE_BUSY_TIMEOUT_MS / 1000)
+    apply_sqlite_pragmas(conn, sqlite_pragmas(DB_ENGINE_PROFILE))
+    return conn
+
 def create_db():
     """ Initiate the DB if DB is not configurate created """
     conn = None
     try:
-        conn = sqlite3.connect(DB_FILE)
+        conn = connect()
         cursor = conn.cursor()
         cursor.execute('''
                             CREATE TABLE IF NOT EXISTS SERVICE(
@@ -53,7 +61,7 @@ def add_data_default_db():
     """Insert default data to db if tables are empty."""
     conn = None
     try:
-        conn = sqlite3.connect(DB_FILE)
+        conn = connect()
         cursor = conn.cursor()
 
         # Check if SERVICE table is empty before inserting
@@ -98,7 +106,7 @@ def get_all_appointment_datetimes_db() -> list:
     """
     conn = None
     try:
-        conn = sqlite3.connect(DB_FILE)
+        conn = connect()
         cursor = conn.cursor()
         cursor.execute("SELECT date FROM APPOINTMENTS ORDER BY date")
         rows = cursor.fetchall()
@@ -116,7 +124,7 @@ def delete_all_appointments_by_telephone_db(telephone: str) -> bool:
     """
     conn = None
     try:
-        conn = sqlite3.connect(DB_FILE)
+        conn = connect()
         cursor = conn.cursor()
         cursor.execute("DELETE FROM APPOINTMENTS WHERE telephone = ?", (telephone,))
         conn.commit()
@@ -137,7 +145,7 @@ def delete_appointments_by_telephone_and_date_db(telephone: str, date_str: str)
     """
     conn = None
     try:
-        conn = sqlite3.connect(DB_FILE)
+        conn = connect()
         cursor = conn.cursor()
         # Normalize the input date_str to 'YYYY-MM-DD' for comparison target
         # This ensures we match the day, regardless of time in date_str
@@ -164,7 +172,7 @@ def get_all_appointments_by_telephone_db(telephone: str) -> list:
     """
     conn = None
     try:
-        conn = sqlite3.connect(DB_FILE)
+        conn = connect()
         conn.row_factory = sqlite3.Row # Access columns by name
         cursor = conn.cursor()
         query = """
@@ -211,7 +219,7 @@ def add_appointment_db(appointment_details: dict) -> bool:
         return False
 
     try:
-        conn = sqlite3.connect(DB_FILE)
+        conn = connect()
         cursor = conn.cursor()
 
         # Get service_id from SERVICE table
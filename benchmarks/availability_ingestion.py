@@ -0,0 +1,90 @@
+"""Compare row-by-row and bulk-upsert ingestion of availability snapshots.
+
+Builds synthetic 12-week snapshots, ingests them into a throwaway SQLite
+database with each path (a cold insert, then a refresh where ~10% of the
+slots changed) and prints the timings:
+
+    python -m benchmarks.availability_ingestion --weeks 12 --runs 3
+"""
+from db.database_availability import DB_Availability, month_map
+import db.database_availability as db_availability
+from sqlmodel import Session, create_engine
+from datetime import date, timedelta
+import argparse
+import contextlib
+import io
+import os
+import random
+import statistics
+import tempfile
+import time
+
+FRENCH_MONTHS = {english: french for french, english in month_map.items()}
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
+
+
+def week_label(start: date) -> str:
+    end = start + timedelta(days=6)
+    if start.month == end.month:
+        return f"Sem. du {start.day} au {end.day} {FRENCH_MONTHS[end.strftime('%B')]} {end.year}"
+    return (f"Sem. du {start.day} {FRENCH_MONTHS[start.strftime('%B')]} au "
+            f"{end.day} {FRENCH_MONTHS[end.strftime('%B')]} {end.year}")
+
+
+def snapshot(weeks: int, seed: int) -> dict:
+    rng = random.Random(seed)
+    first_sunday = date(2025, 8, 17)
+    times = [f"{(405 + 15 * i) // 60:02d}:{(405 + 15 * i) % 60:02d}" for i in range(62)]
+    return {
+        week_label(first_sunday + timedelta(weeks=w)): {
+            day: {t: rng.random() < 0.4 for t in times} for day in DAYS
+        }
+        for w in range(weeks)
+    }
+
+
+def mutate(data: dict, ratio: float, seed: int) -> dict:
+    rng = random.Random(seed)
+    return {
+        label: {day: {t: (not a) if rng.random() < ratio else a for t, a in slots.items()}
+                for day, slots in week.items()}
+        for label, week in data.items()
+    }
+
+
+def ingest(bulk: bool, first: dict, second: dict) -> tuple[float, float]:
+    db_availability.BULK_UPSERT = bulk
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{os.path.join(directory, 'bench.sqlite')}")
+        db_availability.enable_sqlite_foreign_keys(engine)
+        DB_Availability.metadata.create_all(bind=engine)
+        timings = []
+        for data in (first, second):
+            with Session(engine) as session, contextlib.redirect_stdout(io.StringIO()):
+                start = time.perf_counter()
+                db_availability.process_schedule_data(session, data)
+                timings.append(time.perf_counter() - start)
+        engine.dispose()
+    return timings[0], timings[1]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--weeks", type=int, default=12)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    first = snapshot(args.weeks, seed=1)
+    second = mutate(first, ratio=0.1, seed=2)
+    slots = sum(len(s) for week in first.values() for s in week.values())
+    print(f"{args.weeks} weeks, {slots} timeslots per snapshot")
+
+    for label, bulk in (("row-by-row", False), ("bulk upsert", True)):
+        results = [ingest(bulk, first, second) for _ in range(args.runs)]
+        cold = statistics.median(r[0] for r in results)
+        refresh = statistics.median(r[1] for r in results)
+        print(f"{label:>12}: cold insert {cold * 1000:8.1f} ms   refresh {refresh * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Compare the full-height calendar mode with the scrolling path.
+
+Runs the availability scrape against the SDSweb instance configured in .env
+(SDS_URL, USERNAME_SDS, PASSWORD_SDS) with each mode and prints the timings:
+
+    python -m benchmarks.calendar_rendering --telephone 5142069161 --runs 5
+"""
+from scrapers.availabilityScrapper import AvailabilityScrapper
+from scrapers.browser import browser_manager
+from scrapers.page_pool import page_pool
+from models.schemas import AppointmentAvailability
+import argparse
+import asyncio
+import statistics
+import time
+
+
+async def run_mode(config: AppointmentAvailability, full_height: bool, runs: int) -> list[float]:
+    timings = []
+    for _ in range(runs):
+        scrapper = AvailabilityScrapper(config)
+        scrapper.full_height_calendar = full_height
+        start = time.perf_counter()
+        result = await scrapper.get_availability()
+        timings.append(time.perf_counter() - start)
+        if not result:
+            print(f"  warning: empty result (full_height={full_height})")
+    return timings
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--telephone", required=True)
+    parser.add_argument("--timeframe", default="07:00-16:00")
+    parser.add_argument("--days", default="Monday,Tuesday,Wednesday,Thursday,Friday")
+    parser.add_argument("--weeks", type=int, default=3)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    config = AppointmentAvailability(
+        telephone=args.telephone,
+        timeframe=args.timeframe,
+        days=args.days.split(","),
+        number_of_weeks=args.weeks,
+    )
+
+    await browser_manager.start()
+    await page_pool.start(browser_manager)
+    try:
+        for label, full_height in (("scrolling", False), ("full-height", True)):
+            timings = await run_mode(config, full_height, args.runs)
+            print(f"{label:>12}: median {statistics.median(timings):.2f}s  "
+                  f"min {min(timings):.2f}s  max {max(timings):.2f}s  (n={len(timings)})")
+    finally:
+        await page_pool.stop()
+        await browser_manager.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
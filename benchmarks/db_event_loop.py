@@ -0,0 +1,95 @@
+"""Load test: do concurrent scrapes stall behind availability queries?
+
+Simulated scrapes tick on the event loop (like Playwright awaiting page
+events) while bursts of /check_availability queries hit a throwaway SQLite
+database, first through the synchronous session (as the handlers used to),
+then through the async engine. Prints the event-loop lag the scrapes saw:
+
+    python -m benchmarks.db_event_loop --weeks 52 --requests 50 --scrapes 20
+"""
+from benchmarks.availability_ingestion import snapshot
+from db.database_availability import DB_Availability
+import db.availability_snapshot as availability_snapshot
+import db.database_async as database_async
+import db.database_availability as db_availability
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlmodel import Session, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+from types import SimpleNamespace
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import tempfile
+import time
+
+DAYS = SimpleNamespace(days=["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"])
+TICK = 0.005
+
+
+async def scrape(stop: asyncio.Event, lags: list) -> None:
+    """Stand-in for a scrape: wakes up every TICK seconds and records how late it was."""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(TICK)
+        lags.append(time.perf_counter() - start - TICK)
+
+
+async def sync_request() -> None:
+    db_availability.get_available_appointments(DAYS, "06:45", "22:00")
+
+
+async def run(request, requests: int, scrapes: int) -> tuple[float, list]:
+    stop = asyncio.Event()
+    lags = []
+    scrapers = [asyncio.create_task(scrape(stop, lags)) for _ in range(scrapes)]
+    await asyncio.sleep(TICK * 2)
+    start = time.perf_counter()
+    await asyncio.gather(*(request() for _ in range(requests)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await asyncio.gather(*scrapers)
+    return elapsed, lags
+
+
+def report(label: str, elapsed: float, lags: list) -> None:
+    lags = sorted(lags)
+    p95 = lags[int(len(lags) * 0.95)] if lags else 0.0
+    print(f"{label:>6}: {elapsed * 1000:8.1f} ms for the burst   scrape lag p95 {p95 * 1000:7.1f} ms"
+          f"   max {max(lags, default=0.0) * 1000:7.1f} ms   ({len(lags)} ticks)")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--weeks", type=int, default=52)
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--scrapes", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "bench.sqlite")
+        engine = create_engine(f"sqlite:///{path}")
+        DB_Availability.metadata.create_all(bind=engine)
+        db_availability.engine = engine
+        with Session(engine) as session, contextlib.redirect_stdout(io.StringIO()):
+            db_availability.process_schedule_data(session, snapshot(args.weeks, seed=1), prune=False)
+        # Answer from the database, not from the in-memory snapshot
+        availability_snapshot.publish(None)
+
+        async_engine = create_async_engine(database_async.async_database_url(f"sqlite:///{path}"))
+        async_session = async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
+
+        async def async_request() -> None:
+            async with async_session() as session:
+                await database_async.get_available_appointments(session, DAYS, "06:45", "22:00")
+
+        print(f"{args.weeks} weeks, {args.requests} concurrent queries, {args.scrapes} scrapes")
+        report("sync", *await run(sync_request, args.requests, args.scrapes))
+        report("async", *await run(async_request, args.requests, args.scrapes))
+        await async_engine.dispose()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
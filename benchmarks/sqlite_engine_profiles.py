@@ -0,0 +1,100 @@
+"""Compare the read and write throughput of the SQLite engine profiles.
+
+For each profile of db/engine.py, seeds a throwaway availability database,
+then runs concurrent workers (like FastAPI's threadpool serving requests)
+for a fixed time: readers run the availability search, writers insert a
+call log and its feedback row. Prints operations per second and the number
+of "database is locked" failures:
+
+    python -m benchmarks.sqlite_engine_profiles --readers 8 --writers 4 --seconds 5
+"""
+from benchmarks.availability_ingestion import snapshot
+from db.database_availability import Call_Log, DB_Availability, Feedback
+from db.engine import SQLITE_PRAGMAS, create_db_engine
+import db.database_availability as db_availability
+from sqlalchemy.exc import OperationalError
+from sqlmodel import Session
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import threading
+import time
+
+DAY_ORDER = {day: i for i, day in enumerate(["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"])}
+
+
+def reader(engine, stop: threading.Event) -> tuple[int, int]:
+    done = failed = 0
+    query = db_availability.available_slots_query(DAY_ORDER, date(2025, 1, 1), 9 * 60, 12 * 60)
+    while not stop.is_set():
+        try:
+            with Session(engine) as session:
+                session.execute(query).all()
+            done += 1
+        except OperationalError:
+            failed += 1
+    return done, failed
+
+
+def writer(engine, stop: threading.Event) -> tuple[int, int]:
+    done = failed = 0
+    while not stop.is_set():
+        try:
+            with Session(engine) as session:
+                call_log = Call_Log(telephone="5149661015", telephone_from="5140000000",
+                                    time=str(time.time()), status="completed call")
+                session.add(call_log)
+                session.flush()
+                session.add(Feedback(call_log_id=call_log.id))
+                session.commit()
+            done += 1
+        except OperationalError:
+            failed += 1
+    return done, failed
+
+
+def run(profile: str, readers: int, writers: int, seconds: float, weeks: int) -> dict:
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_db_engine(f"sqlite:///{os.path.join(directory, 'bench.sqlite')}", profile=profile)
+        DB_Availability.metadata.create_all(bind=engine)
+        with Session(engine) as session, contextlib.redirect_stdout(io.StringIO()):
+            db_availability.upsert_schedule_data(session, snapshot(weeks, seed=1))
+            session.commit()
+
+        stop = threading.Event()
+        with ThreadPoolExecutor(max_workers=readers + writers) as pool:
+            futures = ([pool.submit(reader, engine, stop) for _ in range(readers)],
+                       [pool.submit(writer, engine, stop) for _ in range(writers)])
+            time.sleep(seconds)
+            stop.set()
+            reads, writes = ([f.result() for f in group] for group in futures)
+        engine.dispose()
+
+    return {
+        "reads/s": sum(done for done, _ in reads) / seconds,
+        "writes/s": sum(done for done, _ in writes) / seconds,
+        "locked": sum(failed for _, failed in reads + writes),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--weeks", type=int, default=12)
+    args = parser.parse_args()
+
+    print(f"{args.readers} readers, {args.writers} writers, {args.seconds:g} s, {args.weeks} weeks")
+    for profile in SQLITE_PRAGMAS:
+        result = run(profile, args.readers, args.writers, args.seconds, args.weeks)
+        print(f"{profile:>10}: {result['reads/s']:8.1f} reads/s   {result['writes/s']:8.1f} writes/s"
+              f"   {result['locked']} locked")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""Compressed archive of pruned availability weeks.
+
+Pruned days are written as one zstd-compressed NDJSON file per prune, one
+line per day with its bitmaps (from which every timeslot is derivable), so
+the history stays available for analytics without keeping it in the
+availability tables.
+"""
+from datetime import date, datetime
+from typing import Iterable, Iterator
+import zstandard
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_FIELDS = ("week_label", "start_date", "day_name", "day_date", "availability_bits", "known_bits")
+
+
+def write(directory: str, rows: Iterable[tuple], level: int = 10) -> str | None:
+    """Archive (week_label, start_date, day_name, day_date, availability_bits,
+    known_bits) rows; return the file written, or None when there was nothing to archive."""
+    lines = []
+    for row in rows:
+        record = dict(zip(ARCHIVE_FIELDS, row))
+        if isinstance(record["day_date"], date):
+            record["day_date"] = record["day_date"].isoformat()
+        lines.append(json.dumps(record, ensure_ascii=False))
+    if not lines:
+        return None
+
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"availability-{datetime.now():%Y%m%dT%H%M%S%f}.ndjson.zst")
+    body = zstandard.ZstdCompressor(level=level).compress("\n".join(lines).encode("utf-8"))
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(body)
+    os.replace(tmp_path, path)
+    logger.info(f"Archived {len(lines)} pruned days to {path} ({len(body)} bytes)")
+    return path
+
+
+def read(path: str) -> Iterator[dict]:
+    """Records of an archive file, in the order they were written."""
+    with open(path, "rb") as f:
+        body = zstandard.ZstdDecompressor().decompress(f.read())
+    for line in body.decode("utf-8").splitlines():
+        yield json.loads(line)
@@ -0,0 +1,132 @@
+"""Per-day availability bitmaps.
+
+A day's availability is one integer with a bit per 15-minute slot from
+06:45 to 22:00 (62 slots, so it fits a signed 64-bit column). Bit ``i`` is
+the slot starting ``FIRST_MINUTE + 15 * i`` minutes after midnight.
+
+Two masks are stored per day: ``availability_bits`` (slot is free) and
+``known_bits`` (slot was scraped at all), so the ``Timeslot`` rows of a day
+can be derived back exactly.
+"""
+
+FIRST_MINUTE = 6 * 60 + 45
+LAST_MINUTE = 22 * 60
+SLOT_MINUTES = 15
+SLOT_COUNT = (LAST_MINUTE - FIRST_MINUTE) // SLOT_MINUTES + 1
+FULL_MASK = (1 << SLOT_COUNT) - 1
+
+
+def slot_index(minute: int) -> int:
+    """Bit index of the slot starting at ``minute`` (minutes since midnight)."""
+    offset = minute - FIRST_MINUTE
+    if offset < 0 or offset % SLOT_MINUTES or minute > LAST_MINUTE:
+        raise ValueError(f"{minute} is not a slot between 06:45 and 22:00")
+    return offset // SLOT_MINUTES
+
+
+def slot_minute(index: int) -> int:
+    return FIRST_MINUTE + index * SLOT_MINUTES
+
+
+def slot_time(index: int) -> str:
+    minute = slot_minute(index)
+    return f"{minute // 60:02d}:{minute % 60:02d}"
+
+
+def _minute(time: str) -> int:
+    hours, minutes = time.split(":")[:2]
+    return int(hours) * 60 + int(minutes)
+
+
+def range_mask(start_minute: int, end_minute: int) -> int:
+    """Mask of the slots starting between ``start_minute`` and ``end_minute``, inclusive."""
+    first = max(0, -(-(start_minute - FIRST_MINUTE) // SLOT_MINUTES))
+    last = min(SLOT_COUNT - 1, (end_minute - FIRST_MINUTE) // SLOT_MINUTES)
+    if last < first:
+        return 0
+    return ((1 << (last - first + 1)) - 1) << first
+
+
+def set_slot(bits: int, index: int, available: bool) -> int:
+    return bits | (1 << index) if available else bits & ~(1 << index)
+
+
+def from_slots(slots: dict) -> tuple[int, int]:
+    """(availability_bits, known_bits) of a {"HH:MM": bool} mapping.
+
+    Unreadable slots (None) and times outside the grid are left unknown.
+    """
+    bits = known = 0
+    for time, available in slots.items():
+        if available is None:
+            continue
+        try:
+            index = slot_index(_minute(time))
+        except ValueError:
+            continue
+        known |= 1 << index
+        bits = set_slot(bits, index, available)
+    return bits, known
+
+
+def merge(bits: int, known: int, new_bits: int, new_known: int) -> tuple[int, int]:
+    """Overlay a newer (partial) scrape on a stored bitmap."""
+    return (bits & ~new_known) | (new_bits & new_known), known | new_known
+
+
+def to_slots(bits: int, known: int) -> dict:
+    """{"HH:MM": bool} of every known slot: the day's Timeslot rows."""
+    return {
+        slot_time(i): bool(bits >> i & 1)
+        for i in range(SLOT_COUNT)
+        if known >> i & 1
+    }
+
+
+def diff(old_bits: int, new_bits: int) -> tuple[int, int]:
+    """(slots that became available, slots that were taken) between two bitmaps."""
+    return new_bits & ~old_bits, old_bits & ~new_bits
+
+
+def indices(bits: int) -> list[int]:
+    """Set bit indices, lowest first."""
+    result = []
+    while bits:
+        low = bits & -bits
+        result.append(low.bit_length() - 1)
+        bits ^= low
+    return result
+
+
+def available_minutes(bits: int, start_minute: int, end_minute: int) -> list[int]:
+    """Start minutes of the available slots within a time window."""
+    return [slot_minute(i) for i in indices(bits & range_mask(start_minute, end_minute))]
+
+
+def runs(bits: int) -> list[tuple[int, int]]:
+    """Consecutive available slots as (first_index, last_index) pairs."""
+    result = []
+    while bits:
+        first = (bits & -bits).bit_length() - 1
+        # Adding the lowest bit carries through the whole run of ones
+        last = ((bits + (1 << first)) & ~bits).bit_length() - 2
+        result.append((first, last))
+        bits &= ~(((1 << (last - first + 1)) - 1) << first)
+    return result
+
+
+def fitting_starts(bits: int, slots_needed: int, window: int = FULL_MASK) -> list[int]:
+    """Indices where ``slots_needed`` consecutive slots are free, starting inside ``window``.
+
+    Uses a prefix sum over the grid, so each query is O(SLOT_COUNT).
+    """
+    if slots_needed <= 0:
+        return indices(bits & window)
+    prefix = [0] * (SLOT_COUNT + 1)
+    for i in range(SLOT_COUNT):
+        prefix[i + 1] = prefix[i] + (bits >> i & 1)
+    return [
+        i
+        for i in range(SLOT_COUNT - slots_needed + 1)
+        if window >> i & 1 and prefix[i + slots_needed] - prefix[i] == slots_needed
+    ]
@@ -0,0 +1,115 @@
+"""Immutable in-memory copy of the availability tables.
+
+A snapshot is rebuilt from the day bitmaps after every successful
+``process_schedule_data`` and published by swapping a single reference, so
+readers never see a half-built snapshot and never need a lock. Each snapshot
+records the availability version stored in the database when it was built;
+readers compare it with the stored version (a primary-key lookup) and rebuild
+when another process has stored a scrape since, instead of querying the tables.
+"""
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Iterable, Optional
+import db.availability_bitmap as bitmap
+import itertools
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class DayAvailability:
+    week_label: str
+    day_name: str
+    date: date
+    bits: int
+
+
+@dataclass(frozen=True)
+class AvailabilitySnapshot:
+    version: int
+    built_at: datetime
+    # Day name -> its days across weeks, in date order
+    days: dict
+    # db.database_availability.AvailabilityVersion when built (None: unknown, always stale)
+    db_version: Optional[int] = None
+
+    def available_appointments(self, day_names: Iterable[str], start_minute: int,
+                               end_minute: int, today: date) -> list[dict]:
+        """Same result as db.database_availability.get_available_appointments()."""
+        mask = bitmap.range_mask(start_minute, end_minute)
+        result = []
+        for day_name in dict.fromkeys(day_names):
+            for day in self.days.get(day_name, ()):
+                if day.date < today:
+                    continue
+                for first, last in bitmap.runs(day.bits & mask):
+                    result.append({
+                        "day": day.day_name,
+                        "week": day.week_label,
+                        "time": f"{_label(first)} to {_label(last)}",
+                    })
+        return result
+
+    def available_starts(self, day_names: Iterable[str], start_minute: int, end_minute: int,
+                         duration_min: int, today: date) -> list[dict]:
+        """Start times inside the window where ``duration_min`` of consecutive slots are free."""
+        window = bitmap.range_mask(start_minute, end_minute)
+        slots_needed = max(1, -(-duration_min // bitmap.SLOT_MINUTES))
+        result = []
+        for day_name in dict.fromkeys(day_names):
+            for day in self.days.get(day_name, ()):
+                if day.date < today:
+                    continue
+                for index in bitmap.fitting_starts(day.bits, slots_needed, window):
+                    end = bitmap.slot_minute(index) + duration_min
+                    result.append({
+                        "day": day.day_name,
+                        "week": day.week_label,
+                        "date": day.date.isoformat(),
+                        "start": bitmap.slot_time(index),
+                        "end": f"{end // 60:02d}:{end % 60:02d}",
+                    })
+        return result
+
+    def info(self) -> dict:
+        return {
+            "version": self.version,
+            "built_at": self.built_at,
+            "db_version": self.db_version,
+            "days": sum(len(days) for days in self.days.values()),
+        }
+
+
+def _label(index: int) -> str:
+    return f"{bitmap.slot_time(index)}:00"
+
+
+_versions = itertools.count(1)
+_current: Optional[AvailabilitySnapshot] = None
+
+
+def build(rows: Iterable[tuple], db_version: Optional[int] = None) -> AvailabilitySnapshot:
+    """Snapshot of (week_label, day_date, day_name, availability_bits) rows, in date order."""
+    days = {}
+    for week_label, day_date, day_name, bits in rows:
+        days.setdefault(day_name, []).append(DayAvailability(week_label, day_name, day_date, bits))
+    return AvailabilitySnapshot(
+        version=next(_versions),
+        built_at=datetime.now(),
+        days={name: tuple(entries) for name, entries in days.items()},
+        db_version=db_version,
+    )
+
+
+def publish(snapshot: Optional[AvailabilitySnapshot]) -> None:
+    global _current
+    _current = snapshot
+    if snapshot is None:
+        logger.info("Availability snapshot dropped, reads use the database.")
+    else:
+        logger.info(f"Availability snapshot v{snapshot.version} published: {snapshot.info()}")
+
+
+def current() -> Optional[AvailabilitySnapshot]:
+    return _current
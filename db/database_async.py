@@ -0,0 +1,163 @@
+"""Async access to the availability database for the FastAPI handlers.
+
+The handlers share the event loop with every Playwright scrape, so they must
+not block it on database I/O. This module runs the same models and queries
+as db.database_availability on an asyncio engine (aiosqlite for SQLite,
+asyncpg for Postgres). Queries that only exist as synchronous code are reused
+through AsyncSession.run_sync. The service lookups live in the operations
+database, which has no async engine, and run in a worker thread.
+"""
+from sqlalchemy import insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from datetime import datetime
+from typing import AsyncIterator, Optional
+import asyncio
+import itertools
+from fastapi import HTTPException
+import db.database_availability as db_availability
+import db.database_ops as db_ops
+from db.database_availability import Appointment, Call_Log, Feedback, Week
+from db.engine import create_async_db_engine
+
+# Async driver of each database backend
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+}
+
+
+def async_database_url(url: str) -> str:
+    """The asyncio-driver equivalent of a synchronous DATABASE_URL."""
+    scheme, rest = url.split("://", 1)
+    backend = scheme.split("+", 1)[0]
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver for database URL scheme '{scheme}'")
+    return f"{ASYNC_DRIVERS[backend]}://{rest}"
+
+
+async_engine = create_async_db_engine(async_database_url(db_availability.DATABASE_URL))
+async_session = async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
+
+
+# Dependency to get an async database session
+async def get_session() -> AsyncIterator[AsyncSession]:
+    async with async_session() as session:
+        yield session
+
+
+# --- Availability ---
+
+
+async def get_available_appointments(session: AsyncSession, check_values, start_time, end_time):
+    """Async db.database_availability.get_available_appointments()."""
+    today = datetime.today().date()
+    start_minute, end_minute = db_availability.minute_window(start_time, end_time)
+
+    snapshot = await session.run_sync(db_availability.current_availability_snapshot)
+    if snapshot is not None and snapshot.days:
+        return snapshot.available_appointments(check_values.days, start_minute, end_minute, today)
+
+    day_order = {day_name: i for i, day_name in enumerate(check_values.days)}
+    if (await session.exec(select(Week.week_id).limit(1))).first() is None:
+        raise HTTPException(status_code=404, detail="Weeks not found.")
+
+    rows = (await session.exec(
+        db_availability.available_slots_query(day_order, today, start_minute, end_minute)
+    )).all()
+    return db_availability.merge_timeframes(rows)
+
+
+async def get_available_start_times(session: AsyncSession, days: list, start_time: str,
+                                    end_time: str, duration_min: int):
+    """Async db.database_availability.get_available_start_times()."""
+    try:
+        snapshot = (await session.run_sync(db_availability.current_availability_snapshot)
+                    or await session.run_sync(db_availability.load_availability_snapshot))
+    except (SQLAlchemyError, ValueError) as e:
+        raise HTTPException(status_code=503, detail=f"Availability not ready: {e}")
+    return db_availability.snapshot_start_times(snapshot, days, start_time, end_time, duration_min)
+
+
+async def get_next_available_starts(session: AsyncSession, **kwargs) -> list:
+    """Async db.database_availability.get_next_available_starts()."""
+    return await session.run_sync(db_availability.next_available_starts, **kwargs)
+
+
+# --- Services ---
+
+
+async def get_processing_time(service_code: str) -> Optional[int]:
+    """Async db.database_ops.get_processing_time_db()."""
+    return await asyncio.to_thread(db_ops.get_processing_time_db, service_code)
+
+
+# --- Call logs and feedback ---
+
+
+async def get_appointment(session: AsyncSession, appointment_id: int) -> Optional[Appointment]:
+    return await session.get(Appointment, appointment_id)
+
+
+async def insert_call_log_db(session: AsyncSession, call_log: Call_Log):
+    session.add(call_log)
+    await session.commit()
+    await session.refresh(call_log)
+    return call_log.id
+
+
+async def insert_feedback_db(session: AsyncSession, feedback: Feedback):
+    session.add(feedback)
+    await session.commit()
+    await session.refresh(feedback)
+    return feedback.id
+
+
+async def get_latest_feedback(session: AsyncSession, phone_number: str) -> Feedback | None:
+    statement = (
+        select(Feedback)
+        .join(Feedback.call_log)
+        .where(Call_Log.telephone == phone_number)
+        .order_by(Feedback.id.desc())
+        .limit(1)
+    )
+    return (await session.exec(statement)).first()
+
+
+async def update_feedback_db(session: AsyncSession, feedback: Feedback) -> Feedback:
+    updated = await session.merge(feedback)
+    await session.commit()
+    await session.refresh(updated)
+    return updated
+
+
+async def insert_call_logs_bulk(session: AsyncSession, call_logs: list[dict]) -> list[Optional[tuple[int, int]]]:
+    """
+    Insert call logs and their empty feedback rows with set-based statements (no commit).
+    Appointment ids are checked with one IN query per chunk. Returns, for each
+    call log in order, (call_log_id, feedback_id), or None when its appointment does not exist.
+    """
+    appointment_ids = {c["appointment_id"] for c in call_logs if c.get("appointment_id")}
+    existing = set()
+    for chunk in itertools.batched(appointment_ids, db_availability.UPSERT_CHUNK_SIZE):
+        existing.update((await session.exec(select(Appointment.id).where(Appointment.id.in_(chunk)))).all())
+
+    def appointment_exists(call_log: dict) -> bool:
+        return not call_log.get("appointment_id") or call_log["appointment_id"] in existing
+
+    valid = [c for c in call_logs if appointment_exists(c)]
+    call_log_ids, feedback_ids = [], []
+    if valid:
+        call_log_ids = (await session.exec(
+            insert(Call_Log).returning(Call_Log.id, sort_by_parameter_order=True), params=valid
+        )).scalars().all()
+        feedback_ids = (await session.exec(
+            insert(Feedback).returning(Feedback.id, sort_by_parameter_order=True),
+            params=[{"call_log_id": call_log_id, "feedback": None} for call_log_id in call_log_ids],
+        )).scalars().all()
+
+    inserted = iter(zip(call_log_ids, feedback_ids))
+    return [next(inserted) if appointment_exists(c) else None for c in call_logs]
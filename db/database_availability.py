@@ -1,15 +1,17 @@
-from sqlalchemy import inspect, text
+from sqlalchemy import BigInteger, Index, and_, case, delete, event, func, inspect, or_, text, update
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
 from sqlmodel import select
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+from typing import Optional
 from fastapi import HTTPException
 
 # from sqlalchemy import MetaData
 from sqlmodel import (
     SQLModel,
     Field,
-    create_engine,
     Session,
     Relationship,
     Column,
@@ -18,6 +20,10 @@ from sqlmodel import (
 )
 import re
 import os
+import db.availability_archive as availability_archive
+import db.availability_bitmap as bitmap
+import db.availability_snapshot as availability_snapshot
+from db.engine import create_db_engine
 from sqlalchemy.orm import registry
 from dotenv import load_dotenv
 import calendar
@@ -26,6 +32,13 @@ load_dotenv()
 # Define the database connection URL (e.g., SQLite or PostgreSQL)
 # Change this URL for PostgreSQL or another DB
 DATABASE_URL = os.environ.get("DATABASE_URL", "sqlite:///test.sqlite")
+# Ingest scraped schedules with set-based INSERT ... ON CONFLICT statements
+BULK_UPSERT = os.environ.get("BULK_UPSERT", "true").lower() != "false"
+UPSERT_CHUNK_SIZE = 500
+# Weeks kept before the oldest scraped week when pruning (0 = only the scraped range)
+RETENTION_WEEKS = int(os.environ.get("AVAILABILITY_RETENTION_WEEKS", 0))
+# Pruned weeks are archived here as compressed NDJSON (empty = no archive)
+ARCHIVE_DIR = os.environ.get("AVAILABILITY_ARCHIVE_DIR", "")
 
 
 class DB_Availability(SQLModel, registry=registry()):
@@ -41,6 +54,12 @@ class Week(DB_Availability, table=True):
     week_label: str = Field(sa_column=Column(String(255)))
     days: list["Day"] = Relationship(back_populates="week", cascade_delete=True)
 
+    __table_args__ = (
+        Index("ux_week_label", "week_label", unique=True),
+        # Weeks are keyed by their ISO start date; dates compare as text
+        Index("ux_week_start_date", "start_date", unique=True),
+    )
+
 
 # Days Table
 class Day(DB_Availability, table=True):
@@ -51,6 +70,14 @@ class Day(DB_Availability, table=True):
     timeslots: list["Timeslot"] = Relationship(
         back_populates="day", cascade_delete=True
     )
+    # One bit per 06:45-22:00 slot (see db/availability_bitmap.py): free slots,
+    # and slots that were scraped at all, from which the timeslots are derivable
+    availability_bits: int | None = Field(default=None, sa_column=Column(BigInteger, nullable=True))
+    known_bits: int | None = Field(default=None, sa_column=Column(BigInteger, nullable=True))
+    # Actual date of the day, resolved once at ingestion
+    day_date: date | None = Field(default=None, index=True)
+
+    __table_args__ = (Index("ux_day_week_day_name", "week_id", "day_name", unique=True),)
 
 
 # Timeslots Table
@@ -58,9 +85,26 @@ class Timeslot(DB_Availability, table=True):
     timeslot_id: int = Field(default=None, primary_key=True)
     time: str
     availability: bool
+    # Minutes since midnight of `time`, so time windows are filtered in SQL
+    slot_minute: int | None = Field(default=None)
+    # Absolute start of the slot, for "next available" range scans
+    starts_at: datetime | None = Field(default=None)
     day_id: int = Field(foreign_key="day.day_id", ondelete="CASCADE")
     day: "Day" = Relationship(back_populates="timeslots")
 
+    __table_args__ = (
+        Index("ux_timeslot_day_time", "day_id", "time", unique=True),
+        Index("ix_timeslot_day_slot_minute", "day_id", "slot_minute"),
+        Index("ix_timeslot_availability_starts_at", "availability", "starts_at"),
+    )
+
+
+# Single row bumped in the same transaction as every stored scrape, so each
+# process can tell whether its in-memory snapshot is still current
+class AvailabilityVersion(DB_Availability, table=True):
+    id: int = Field(default=1, primary_key=True)
+    version: int = 0
+
 
 class Appointment(DB_Availability, table=True):
     id: int = Field(default=None, primary_key=True)
@@ -103,7 +147,21 @@ class Feedback(DB_Availability, table=True):
 
 
 # Connect to the Database
-engine = create_engine(DATABASE_URL, echo=True)
+engine = create_db_engine(DATABASE_URL)
+
+
+def enable_sqlite_foreign_keys(engine) -> None:
+    """Turn on foreign key enforcement (and so ON DELETE CASCADE) for SQLite connections."""
+    if engine.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(engine, "connect")
+    def _set_foreign_keys(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+
 # Create the tables in the database if they don't exist
 
 
@@ -127,9 +185,190 @@ def add_column_if_not_exists(
         print(f"Column '{column_name}' added successfully.")
 
 
+def slot_minute(time: str) -> int:
+    """Minutes since midnight of an "HH:MM" timeslot."""
+    hours, minutes = time.split(":")[:2]
+    return int(hours) * 60 + int(minutes)
+
+
+def day_date(week_start: Optional[str], day_name: str) -> Optional[date]:
+    """Actual date of `day_name` in the week starting on `week_start` (YYYY-MM-DD)."""
+    if not week_start:
+        return None
+    week_start_date = datetime.strptime(week_start, "%Y-%m-%d").date()
+    # Convert day name to index (Monday=0, Sunday=6)
+    target_weekday = list(calendar.day_name).index(day_name)
+    return week_start_date + timedelta(days=(target_weekday - week_start_date.weekday()) % 7)
+
+
+def slot_starts_at(week_start: Optional[str], day_name: str, time: str) -> Optional[datetime]:
+    slot_date = day_date(week_start, day_name)
+    if slot_date is None:
+        return None
+    return datetime.combine(slot_date, datetime.min.time()) + timedelta(minutes=slot_minute(time))
+
+
+def backfill_starts_at(engine) -> int:
+    """Fill starts_at for timeslots stored before the column existed."""
+    with Session(engine) as session:
+        rows = session.execute(
+            select(Timeslot.timeslot_id, Week.start_date, Day.day_name, Timeslot.time)
+            .join(Day, Day.day_id == Timeslot.day_id)
+            .join(Week, Week.week_id == Day.week_id)
+            .where(Timeslot.starts_at.is_(None), Week.start_date.is_not(None))
+        ).all()
+        if rows:
+            session.execute(
+                update(Timeslot),
+                [
+                    {"timeslot_id": i, "starts_at": slot_starts_at(start, day_name, t)}
+                    for i, start, day_name, t in rows
+                ],
+            )
+            session.commit()
+            print(f"Backfilled starts_at for {len(rows)} timeslots.")
+        return len(rows)
+
+
+def backfill_slot_minutes(engine) -> int:
+    """Fill slot_minute for timeslots stored before the column existed."""
+    with Session(engine) as session:
+        rows = session.execute(
+            select(Timeslot.timeslot_id, Timeslot.time).where(Timeslot.slot_minute.is_(None))
+        ).all()
+        if rows:
+            session.execute(
+                update(Timeslot),
+                [{"timeslot_id": i, "slot_minute": slot_minute(t)} for i, t in rows],
+            )
+            session.commit()
+            print(f"Backfilled slot_minute for {len(rows)} timeslots.")
+        return len(rows)
+
+
+def day_bitmap(session: Session, day_id: int) -> tuple[int, int]:
+    """(availability_bits, known_bits) of a day, computed from its timeslots."""
+    slots = session.execute(
+        select(Timeslot.time, Timeslot.availability).where(Timeslot.day_id == day_id)
+    ).all()
+    return bitmap.from_slots(dict(slots))
+
+
+def backfill_day_dates(engine) -> int:
+    """Resolve day_date for days stored before the column existed."""
+    with Session(engine) as session:
+        rows = session.execute(
+            select(Day.day_id, Week.start_date, Day.day_name)
+            .join(Week, Week.week_id == Day.week_id)
+            .where(Day.day_date.is_(None), Week.start_date.is_not(None))
+        ).all()
+        if rows:
+            session.execute(
+                update(Day),
+                [{"day_id": i, "day_date": day_date(start, name)} for i, start, name in rows],
+            )
+            session.commit()
+            print(f"Backfilled day_date for {len(rows)} days.")
+        return len(rows)
+
+
+def backfill_day_bitmaps(engine) -> int:
+    """Compute the bitmaps of days stored before the columns existed."""
+    with Session(engine) as session:
+        day_ids = session.execute(select(Day.day_id).where(Day.known_bits.is_(None))).scalars().all()
+        if day_ids:
+            updates = []
+            for day_id in day_ids:
+                bits, known = day_bitmap(session, day_id)
+                updates.append({"day_id": day_id, "availability_bits": bits, "known_bits": known})
+            session.execute(update(Day), updates)
+            session.commit()
+            print(f"Backfilled availability bitmaps for {len(day_ids)} days.")
+        return len(day_ids)
+
+
+def _duplicate_ids(session: Session, id_column, *key_columns) -> dict:
+    """Map the id of every duplicate row (same key) to the id kept: the newest one."""
+    keep = (
+        select(*key_columns, func.max(id_column).label("keep_id"))
+        .group_by(*key_columns)
+        .having(func.count() > 1)
+        .subquery()
+    )
+    rows = session.execute(
+        select(id_column, keep.c.keep_id)
+        .join(keep, and_(*(column == keep.c[column.key] for column in key_columns)))
+        .where(id_column != keep.c.keep_id)
+    ).all()
+    return dict(rows)
+
+
+def deduplicate_availability(engine) -> dict:
+    """
+    Merge duplicate weeks, days and timeslots so the unique indexes can be created.
+    The newest row of each key is kept; the days and timeslots of the others are
+    moved onto it (the newest timeslot wins) and the merged days get their
+    bitmap recomputed. Returns the number of rows removed per table.
+    """
+    removed = {"week": 0, "day": 0, "timeslot": 0}
+    with Session(engine) as session:
+        for key in (Week.start_date, Week.week_label):
+            duplicates = _duplicate_ids(session, Week.week_id, key)
+            for week_id, keep_id in duplicates.items():
+                session.execute(update(Day).where(Day.week_id == week_id).values(week_id=keep_id))
+            if duplicates:
+                session.execute(delete(Week).where(Week.week_id.in_(list(duplicates))))
+            removed["week"] += len(duplicates)
+
+        duplicates = _duplicate_ids(session, Day.day_id, Day.week_id, Day.day_name)
+        for day_id, keep_id in duplicates.items():
+            session.execute(update(Timeslot).where(Timeslot.day_id == day_id).values(day_id=keep_id))
+        for chunk in _chunks(list(duplicates)):
+            session.execute(delete(Day).where(Day.day_id.in_(chunk)))
+        for chunk in _chunks(list(set(duplicates.values()))):
+            # Recomputed by backfill_day_bitmaps()
+            session.execute(
+                update(Day).where(Day.day_id.in_(chunk)).values(availability_bits=None, known_bits=None)
+            )
+        removed["day"] = len(duplicates)
+
+        duplicates = _duplicate_ids(session, Timeslot.timeslot_id, Timeslot.day_id, Timeslot.time)
+        for chunk in _chunks(list(duplicates)):
+            session.execute(delete(Timeslot).where(Timeslot.timeslot_id.in_(chunk)))
+        removed["timeslot"] = len(duplicates)
+
+        session.commit()
+    if any(removed.values()):
+        print(f"Removed duplicate availability rows: {removed}")
+    return removed
+
+
+def upgrade_schema(engine):
+    """Bring availability tables created by an older version up to the current schema."""
+    add_column_if_not_exists(engine, "timeslot", "slot_minute", "INTEGER")
+    add_column_if_not_exists(engine, "timeslot", "starts_at", "TIMESTAMP")
+    add_column_if_not_exists(engine, "day", "availability_bits", "BIGINT")
+    add_column_if_not_exists(engine, "day", "known_bits", "BIGINT")
+    add_column_if_not_exists(engine, "day", "day_date", "DATE")
+    # Unique indexes cannot be created over duplicate rows
+    deduplicate_availability(engine)
+    # Tables created before the indexes existed do not get them from create_all
+    for model in (Week, Day, Timeslot):
+        for index in model.__table__.indexes:
+            try:
+                index.create(bind=engine, checkfirst=True)
+            except SQLAlchemyError as e:
+                print(f"Could not create index '{index.name}': {e}")
+    backfill_slot_minutes(engine)
+    backfill_starts_at(engine)
+    backfill_day_dates(engine)
+    backfill_day_bitmaps(engine)
+
+
 def create_db_if_not_exists():
     # Check if the tables exist before creating
     DB_Availability.metadata.create_all(bind=engine, checkfirst=True)
+    upgrade_schema(engine)
 
 
 # Dependency to get the database session
@@ -144,41 +383,78 @@ def get_session():
         yield session
 
 
-def get_next_available_time():
-    # Get current time
-    now = datetime.now()
-    current_time_str = now.strftime("%H:%M")  # Time in "HH:MM" format
-
-    # Get today's date and day of the week
-    day_of_week = now.strftime("%A")  # Example: 'Monday', 'Tuesday', etc.
-
-    # Query the database for all available timeslots for today
+def get_next_available_starts(
+    after: Optional[datetime] = None,
+    limit: int = 5,
+    days: Optional[list] = None,
+    start_time: Optional[str] = None,
+    end_time: Optional[str] = None,
+    duration_min: Optional[int] = None,
+) -> list:
+    """
+    The next `limit` start times after `after` (default: now), optionally only on
+    `days`, starting between start_time and end_time (HH:MM), and with room for
+    duration_min minutes of consecutive free slots.
+    Streams a single range scan of the (availability, starts_at) index in time
+    order and stops as soon as enough starts are found.
+    """
     with Session(engine) as session:
-        # Find the day record based on the current day of the week (e.g., 'Monday')
-        day = session.query(Day).filter(Day.day_name == day_of_week).first()
-
-        if not day:
-            raise HTTPException(
-                status_code=404, detail=f"No available slots for {day_of_week}"
-            )
-
-        # Get the available timeslots for the current day
-        available_timeslots = (
-            session.query(Timeslot)
-            .filter(Timeslot.day_id == day.day_id)
-            .filter(Timeslot.availability == True)
-            .all()
+        return next_available_starts(
+            session, after, limit, days, start_time, end_time, duration_min
         )
 
-        # Find the next available timeslot
-        for timeslot in available_timeslots:
-            if timeslot.time > current_time_str:
-                return timeslot.time
 
-    # If no available timeslot is found
-    raise HTTPException(
-        status_code=404, detail="No available timeslot found after now."
+def next_available_starts(
+    session: Session,
+    after: Optional[datetime] = None,
+    limit: int = 5,
+    days: Optional[list] = None,
+    start_time: Optional[str] = None,
+    end_time: Optional[str] = None,
+    duration_min: Optional[int] = None,
+) -> list:
+    """get_next_available_starts() on a given session (also usable through AsyncSession.run_sync)."""
+    after = after or datetime.now()
+    slots_needed = max(1, -(-(duration_min or 0) // 15))
+    duration = timedelta(minutes=max(duration_min or 0, 15))
+    first_minute = slot_minute(start_time) if start_time else 0
+    last_minute = slot_minute(end_time) if end_time else 24 * 60
+
+    query = (
+        select(Timeslot.starts_at)
+        .where(Timeslot.availability == True, Timeslot.starts_at >= after)
+        # The window bounds the start; the slots the service runs into may go past its end
+        .where(Timeslot.slot_minute.between(first_minute, last_minute + (slots_needed - 1) * 15))
     )
+    if days:
+        query = query.join(Day, Day.day_id == Timeslot.day_id).where(Day.day_name.in_(days))
+
+    results = []
+    run = []  # consecutive free slots ending at the current row
+    starts = session.execute(
+        query.order_by(Timeslot.starts_at).execution_options(yield_per=500)
+    ).scalars()
+    for starts_at in starts:
+        if run and starts_at == run[-1]:
+            continue
+        if run and starts_at - run[-1] != timedelta(minutes=15):
+            run = []
+        run.append(starts_at)
+        if len(run) < slots_needed:
+            continue
+        # The run ends at most slots_needed - 1 slots past the window, so its start is inside it
+        candidate = run[-slots_needed]
+        results.append({
+            "starts_at": candidate.isoformat(),
+            "date": candidate.date().isoformat(),
+            "day": candidate.strftime("%A"),
+            "start": candidate.strftime("%H:%M"),
+            "end": (candidate + duration).strftime("%H:%M"),
+        })
+        if len(results) >= limit:
+            break
+
+    return results
 
 
 def check_and_update_availability(
@@ -187,14 +463,25 @@ def check_and_update_availability(
     try:
         print(f"Searching for Week with label: '{week_label}'")  # Debug print
 
-        # Fetch the Week record, or create it if not found
-        week = session.exec(select(Week).filter(Week.week_label == week_label)).first()
+        # Fetch the Week record by its start date, the key the upsert uses, or create it if not found
+        start_date, end_date = parse_time_labels(week_label)
+        if start_date is not None:
+            week = session.exec(select(Week).filter(Week.start_date == start_date)).first()
+        else:
+            week = session.exec(select(Week).filter(Week.week_label == week_label)).first()
+
+        if week and week.week_label != week_label:
+            # Same week, relabelled by SDSweb: update the label in place
+            print(f"Week starting {start_date} relabelled from '{week.week_label}' to '{week_label}'")
+            week.week_label = week_label
+            week.end_date = end_date
+            session.add(week)
+            session.commit()
 
         if not week:
             # Debug print
             print(f"Week with label {week_label} not found, creating new week.")
             # Create a new Week record if not found
-            start_date, end_date = parse_time_labels(week_label)
             week = Week(
                 week_label=week_label,
                 start_date=start_date,
@@ -217,7 +504,10 @@ def check_and_update_availability(
             print(f"Day {day_name} not found in week {week_label}, creating new day.")
             # Create a new Day record if not found
             day = Day(
-                week_id=week.week_id, day_name=day_name, created_at=datetime.utcnow()
+                week_id=week.week_id,
+                day_name=day_name,
+                day_date=day_date(week.start_date, day_name),
+                created_at=datetime.utcnow(),
             )
             session.add(day)
             session.commit()  # Commit to get the generated `day_id`
@@ -244,7 +534,11 @@ def check_and_update_availability(
                 else:
                     # If no timeslot exists, create a new one
                     new_timeslot = Timeslot(
-                        day_id=day.day_id, time=time, availability=availability
+                        day_id=day.day_id,
+                        time=time,
+                        availability=availability,
+                        slot_minute=slot_minute(time),
+                        starts_at=slot_starts_at(week.start_date, day_name, time),
                     )
                     session.add(new_timeslot)
                     print(f"Added new timeslot for {week_label} - {day_name} - {time}")
@@ -259,6 +553,11 @@ def check_and_update_availability(
                     detail=f"Error occurred while processing timeslot {time} for {day_name}.",
                 )
 
+        # Keep the day's bitmap in step with its timeslots
+        session.flush()
+        day.availability_bits, day.known_bits = day_bitmap(session, day.day_id)
+        session.add(day)
+
         # Commit the changes after processing all timeslots for the day
         session.commit()
     except SQLAlchemyError as e:
@@ -278,55 +577,290 @@ def check_and_update_availability(
         )
 
 
+def _dialect_insert(session: Session):
+    dialect = session.get_bind().dialect.name
+    if dialect == "postgresql":
+        return postgresql_insert
+    if dialect == "sqlite":
+        return sqlite_insert
+    raise NotImplementedError(f"No bulk upsert for the '{dialect}' dialect")
+
+
+def _chunks(rows: list):
+    for i in range(0, len(rows), UPSERT_CHUNK_SIZE):
+        yield rows[i : i + UPSERT_CHUNK_SIZE]
+
+
+def upsert_schedule_data(session: Session, schedule_data: dict) -> dict:
+    """
+    Ingest a whole availability snapshot with set-based upserts.
+    Weeks, days and timeslots are each written with INSERT ... ON CONFLICT in
+    the session's transaction (nothing is committed here). Existing rows are
+    read once beforehand so unchanged timeslots are not written at all.
+    Args:
+        session: SQLAlchemy session object.
+        schedule_data: Dictionary with availability data for each week, day, and timeslot.
+    Returns:
+        {"week" | "day" | "timeslot": {"inserted": n, "updated": n, "unchanged": n}}
+    """
+    insert = _dialect_insert(session)
+    counts = {
+        table: {"inserted": 0, "updated": 0, "unchanged": 0}
+        for table in ("week", "day", "timeslot")
+    }
+
+    # --- Weeks, keyed by their ISO start date ---
+    weeks = {}
+    week_starts = {}  # scraped label -> start date
+    for week_label in schedule_data:
+        label = week_label.replace("Sem. du ", "").strip()
+        start_date, end_date = parse_time_labels(label)
+        if start_date is None:
+            print(f"Skipping week with unparseable label '{week_label}'")
+            continue
+        week_starts[week_label] = start_date
+        weeks[start_date] = {"week_label": label, "start_date": start_date, "end_date": end_date}
+
+    week_query = select(Week.start_date, Week.week_id, Week.week_label).where(
+        Week.start_date.in_(list(weeks))
+    )
+    existing_weeks = {start: label for start, _, label in session.execute(week_query).all()}
+    changed_weeks = [
+        row for start, row in weeks.items() if existing_weeks.get(start) != row["week_label"]
+    ]
+    for chunk in _chunks(changed_weeks):
+        statement = insert(Week).values(chunk)
+        session.execute(
+            statement.on_conflict_do_update(
+                index_elements=["start_date"],
+                set_={
+                    "week_label": statement.excluded.week_label,
+                    "end_date": statement.excluded.end_date,
+                },
+            )
+        )
+    counts["week"]["inserted"] = sum(1 for row in changed_weeks if row["start_date"] not in existing_weeks)
+    counts["week"]["updated"] = len(changed_weeks) - counts["week"]["inserted"]
+    counts["week"]["unchanged"] = len(weeks) - len(changed_weeks)
+    week_ids = {start: week_id for start, week_id, _ in session.execute(week_query).all()}
+
+    # --- Days ---
+    days = {
+        (week_ids[week_starts[week_label]], day_name): day_date(week_starts[week_label], day_name)
+        for week_label, week_data in schedule_data.items()
+        if week_label in week_starts
+        for day_name in week_data
+    }
+    day_query = select(Day.week_id, Day.day_name, Day.day_id).where(
+        Day.week_id.in_(list(week_ids.values()))
+    )
+    existing_days = {(w, d): i for w, d, i in session.execute(day_query).all()}
+    new_days = [
+        {"week_id": w, "day_name": d, "day_date": days[(w, d)]}
+        for w, d in sorted(days)
+        if (w, d) not in existing_days
+    ]
+    for chunk in _chunks(new_days):
+        session.execute(
+            insert(Day).values(chunk).on_conflict_do_nothing(index_elements=["week_id", "day_name"])
+        )
+    counts["day"]["inserted"] = len(new_days)
+    counts["day"]["unchanged"] = len(days) - len(new_days)
+    day_ids = {(w, d): i for w, d, i in session.execute(day_query).all()}
+
+    # --- Timeslots ---
+    existing_slots = {
+        (day_id, time): availability
+        for day_id, time, availability in session.execute(
+            select(Timeslot.day_id, Timeslot.time, Timeslot.availability).where(
+                Timeslot.day_id.in_(list(day_ids.values()))
+            )
+        ).all()
+    }
+    changed = []
+    for week_label, week_data in schedule_data.items():
+        if week_label not in week_starts:
+            continue
+        week_start = week_starts[week_label]
+        week_id = week_ids[week_start]
+        for day_name, timeslot_data in week_data.items():
+            day_id = day_ids[(week_id, day_name)]
+            for time, availability in timeslot_data.items():
+                if availability is None:
+                    # The scraper could not read this slot; keep what we had
+                    continue
+                key = (day_id, time)
+                if key not in existing_slots:
+                    counts["timeslot"]["inserted"] += 1
+                elif existing_slots[key] != availability:
+                    counts["timeslot"]["updated"] += 1
+                else:
+                    counts["timeslot"]["unchanged"] += 1
+                    continue
+                changed.append({
+                    "day_id": day_id,
+                    "time": time,
+                    "availability": availability,
+                    "slot_minute": slot_minute(time),
+                    "starts_at": slot_starts_at(week_start, day_name, time),
+                })
+
+    for chunk in _chunks(changed):
+        statement = insert(Timeslot).values(chunk)
+        session.execute(
+            statement.on_conflict_do_update(
+                index_elements=["day_id", "time"],
+                set_={
+                    "availability": statement.excluded.availability,
+                    "slot_minute": statement.excluded.slot_minute,
+                    "starts_at": statement.excluded.starts_at,
+                },
+            )
+        )
+
+    # --- Day bitmaps ---
+    day_slots = {}
+    for (day_id, time), availability in existing_slots.items():
+        day_slots.setdefault(day_id, {})[time] = availability
+    for row in changed:
+        day_slots.setdefault(row["day_id"], {})[row["time"]] = row["availability"]
+    touched = {day_ids[key] for key in days}
+    stored_bits = {
+        day_id: (bits, known)
+        for day_id, bits, known in session.execute(
+            select(Day.day_id, Day.availability_bits, Day.known_bits).where(
+                Day.day_id.in_(list(touched))
+            )
+        ).all()
+    }
+    bitmap_updates = []
+    for day_id in sorted(touched):
+        bits, known = bitmap.from_slots(day_slots.get(day_id, {}))
+        if stored_bits.get(day_id) != (bits, known):
+            bitmap_updates.append({"day_id": day_id, "availability_bits": bits, "known_bits": known})
+    if bitmap_updates:
+        session.execute(update(Day), bitmap_updates)
+    new_day_ids = {day_ids[(row["week_id"], row["day_name"])] for row in new_days}
+    updated_days = sum(1 for row in bitmap_updates if row["day_id"] not in new_day_ids)
+    counts["day"]["updated"] = updated_days
+    counts["day"]["unchanged"] -= updated_days
+
+    return counts
+
+
+def expired_weeks(week_labels: list, retention_weeks: int = 0):
+    """
+    Predicate selecting the weeks to prune: every week ending the retention
+    window before the oldest kept week, after the newest one, or without a date.
+    """
+    start_dates = [start for start, _ in map(parse_time_labels, week_labels) if start]
+    expired = Week.start_date.is_(None)
+    if start_dates:
+        oldest = date.fromisoformat(min(start_dates)) - timedelta(weeks=retention_weeks)
+        # ISO dates compare as text
+        expired = or_(expired, Week.start_date < oldest.isoformat(), Week.start_date > max(start_dates))
+    return expired
+
+
+def prune_weeks(session: Session, expired, archive_dir: str = "") -> int:
+    """
+    Delete the weeks matching ``expired`` with one DELETE statement; their days
+    and timeslots go with them through ON DELETE CASCADE. Returns the number of
+    weeks deleted. Does not commit.
+    """
+    if archive_dir:
+        rows = session.execute(
+            select(Week.week_label, Week.start_date, Day.day_name, Day.day_date,
+                   Day.availability_bits, Day.known_bits)
+            .join(Day, Day.week_id == Week.week_id)
+            .where(expired)
+            .order_by(Week.start_date, Day.day_date)
+        ).all()
+        availability_archive.write(archive_dir, rows)
+
+    result = session.execute(
+        delete(Week).where(expired).execution_options(synchronize_session=False)
+    )
+    # Weeks loaded in this session may have just been deleted
+    session.expire_all()
+    return result.rowcount
+
+
 def delete_old_weeks(session: Session, week_labels: list):
     """
     Delete old weeks from the database.
     Args:
         session: SQLAlchemy session object.
         week_labels: List of week labels to keep.
+    Weeks outside the date range of the kept weeks, widened by RETENTION_WEEKS
+    into the past, are deleted (and archived when ARCHIVE_DIR is set).
     """
     try:
-        # Get all weeks from the database
-        weeks = session.exec(select(Week)).all()
-        for week in weeks:
-            if week.week_label not in week_labels:
-                session.delete(week)
+        deleted = prune_weeks(session, expired_weeks(week_labels, RETENTION_WEEKS), ARCHIVE_DIR)
         session.commit()
-    except SQLAlchemyError as e:
-        # Handle database errors
+        if deleted:
+            print(f"Pruned {deleted} old weeks.")
+        return deleted
+    except (SQLAlchemyError, OSError) as e:
+        # Handle database and archive errors
         session.rollback()
         raise HTTPException(
             status_code=500, detail=f"Database error occurred: {str(e)}"
         )
 
 
-def process_schedule_data(session: Session, schedule_data: dict):
+def process_schedule_data(
+    session: Session,
+    schedule_data: dict,
+    prune: bool = True,
+    keep_weeks: Optional[list] = None,
+):
     """
     Process the full schedule data and update the database.
     Args:
         session: SQLAlchemy session object.
         schedule_data: Dictionary with availability data for each week, day, and timeslot.
+        prune: Delete the weeks that are not kept. Partial refreshes pass False.
+        keep_weeks: Week labels kept when pruning (default: the weeks in schedule_data).
+    Returns:
+        Inserted/updated/unchanged counts per table, or None for row-by-row ingestion.
     """
     try:
-        week_labels = []
-        for week_label, week_data in schedule_data.items():
-            new_week_label = week_label.replace("Sem. du ", "").strip()
-            week_labels.append(new_week_label)
-            for day_name, timeslot_data in week_data.items():
-                try:
-                    # Call the check_and_update_availability function for each week and day
-                    check_and_update_availability(
-                        session, new_week_label, day_name, timeslot_data
-                    )
-                except HTTPException as e:
-                    # If an HTTPException is raised during the process, we log and continue with the next one
-                    print(
-                        f"Error while processing schedule for {new_week_label} - {day_name}: {e.detail}"
-                    )
-                    continue
-        delete_old_weeks(session, week_labels)
+        week_labels = [label.replace("Sem. du ", "").strip() for label in schedule_data]
+        counts = None
+        if BULK_UPSERT:
+            try:
+                counts = upsert_schedule_data(session, schedule_data)
+                print(f"Schedule upserted: {counts}")
+            except (SQLAlchemyError, NotImplementedError) as e:
+                # e.g. a database without the unique indexes the upsert relies on
+                session.rollback()
+                print(f"Bulk upsert failed, falling back to row-by-row ingestion: {e}")
+
+        if counts is None:
+            for week_label, week_data in schedule_data.items():
+                new_week_label = week_label.replace("Sem. du ", "").strip()
+                for day_name, timeslot_data in week_data.items():
+                    try:
+                        # Call the check_and_update_availability function for each week and day
+                        check_and_update_availability(
+                            session, new_week_label, day_name, timeslot_data
+                        )
+                    except HTTPException as e:
+                        # If an HTTPException is raised during the process, we log and continue with the next one
+                        print(
+                            f"Error while processing schedule for {new_week_label} - {day_name}: {e.detail}"
+                        )
+                        continue
+        if prune:
+            if keep_weeks is not None:
+                week_labels = [label.replace("Sem. du ", "").strip() for label in keep_weeks]
+            delete_old_weeks(session, week_labels)
+        bump_availability_version(session)
         # Commit the changes after processing all schedule data
         session.commit()
+        refresh_availability_snapshot(session)
+        return counts
 
     except SQLAlchemyError as e:
         # Handle any errors related to SQLAlchemy
@@ -359,79 +893,222 @@ month_map = {
     "nov.": "November",
     "déc.": "December",
 }
+# French month abbreviation -> month number, with or without the trailing dot
+MONTH_NUMBERS = {
+    **{french.rstrip("."): i for i, french in enumerate(month_map, start=1)},
+    **{french: i for i, french in enumerate(month_map, start=1)},
+}
+
+_MONTH = r"([a-zéû\.]+)"
+# "17 au 23 août 2025"
+SAME_MONTH_LABEL_RE = re.compile(
+    rf"(?:Sem\. du\s+)?(\d{{1,2}})\s+au\s+(\d{{1,2}})\s+{_MONTH}\s+(\d{{4}})", re.IGNORECASE
+)
+# "31 août au 6 sept. 2025", "28 déc. au 3 janv. 2026", "28 déc. 2025 au 3 janv. 2026"
+CROSS_MONTH_LABEL_RE = re.compile(
+    rf"(?:Sem\. du\s+)?(\d{{1,2}})\s+{_MONTH}(?:\s+(\d{{4}}))?\s+au\s+(\d{{1,2}})\s+{_MONTH}\s+(\d{{4}})",
+    re.IGNORECASE,
+)
 
 
-# Function to convert French date string to datetime
-def convert_french_date_to_datetime(date_str):
-    # Match the day and month from the French date string
-    for french_month, english_month in month_map.items():
-        if french_month in date_str:
-            # Find the day and month
-            date_parts = re.findall(r"(\d{1,2})\s" + french_month, date_str)
-            if date_parts:
-                day = int(date_parts[0])
-                month = english_month
-                year = (
-                    datetime.now().year
-                )  # Assuming current year if no year is specified
-                return datetime(year, datetime.strptime(month, "%B").month, day)
-    return None
+def _month_number(month_str: str) -> Optional[int]:
+    return MONTH_NUMBERS.get(month_str.strip().lower())
 
 
 # Function to parse the given time labels
 def parse_time_labels(label):
-    # Pattern for case: "17 au 23 août 2025"
-    match1 = re.match(
-        r"(\d{1,2})\s+au\s+(\d{1,2})\s+([a-zéû\.]+)\s+(\d{4})", label, re.IGNORECASE
+    """
+    ISO (start_date, end_date) of a scraped week label, or (None, None).
+    A week crossing new year ("28 déc. au 3 janv. 2026") starts in the previous year.
+    """
+    match = SAME_MONTH_LABEL_RE.match(label.strip())
+    if match:
+        start_day, end_day, month_str, year = match.groups()
+        month = _month_number(month_str)
+        if month:
+            start_date = date(int(year), month, int(start_day))
+            end_date = date(int(year), month, int(end_day))
+            return start_date.isoformat(), end_date.isoformat()
+
+    match = CROSS_MONTH_LABEL_RE.match(label.strip())
+    if match:
+        start_day, start_month_str, start_year, end_day, end_month_str, year = match.groups()
+        start_month = _month_number(start_month_str)
+        end_month = _month_number(end_month_str)
+        if start_month and end_month:
+            end_date = date(int(year), end_month, int(end_day))
+            if start_year is None:
+                start_year = end_date.year - 1 if start_month > end_month else end_date.year
+            start_date = date(int(start_year), start_month, int(start_day))
+            return start_date.isoformat(), end_date.isoformat()
+
+    return None, None
+
+
+def availability_version(session: Session) -> int:
+    """Version of the stored availability, bumped by every process_schedule_data()."""
+    return session.execute(
+        select(AvailabilityVersion.version).where(AvailabilityVersion.id == 1)
+    ).scalar() or 0
+
+
+def bump_availability_version(session: Session) -> None:
+    """Bump the availability version in the session's transaction (nothing is committed here)."""
+    bumped = session.execute(
+        update(AvailabilityVersion)
+        .where(AvailabilityVersion.id == 1)
+        .values(version=AvailabilityVersion.version + 1)
     )
-    if match1:
-        start_day = int(match1.group(1))
-        end_day = int(match1.group(2))
-        month_str = match1.group(3).strip()
-        year = int(match1.group(4))
-
-        if month_str in month_map:
-            month_name = month_map[month_str]
-            month_num = datetime.strptime(month_name, "%B").month
-            start_date = datetime(year, month_num, start_day)
-            end_date = datetime(year, month_num, end_day)
-            return start_date.strftime("%Y-%m-%d"), end_date.strftime("%Y-%m-%d")
-
-    # Pattern for case: "31 août au 6 sept. 2025"
-    match2 = re.match(
-        r"(\d{1,2})\s+([a-zéû\.]+)\s+au\s+(\d{1,2})\s+([a-zéû\.]+)\s+(\d{4})",
-        label,
-        re.IGNORECASE,
+    if bumped.rowcount == 0:
+        session.add(AvailabilityVersion(id=1, version=1))
+        session.flush()
+
+
+def load_availability_snapshot(session: Session) -> "availability_snapshot.AvailabilitySnapshot":
+    """Build an availability snapshot from the day bitmaps (without publishing it)."""
+    # Read first: a write committed meanwhile only makes the next read rebuild again
+    version = availability_version(session)
+    rows = session.execute(
+        select(Week.week_label, Day.day_date, Day.day_name, Day.availability_bits)
+        .join(Day, Day.week_id == Week.week_id)
+        .where(Day.day_date.is_not(None))
+        .order_by(Day.day_date, Day.day_id)
+    ).all()
+    if any(bits is None for *_, bits in rows):
+        raise ValueError("some days have no availability bitmap yet")
+    return availability_snapshot.build(rows, db_version=version)
+
+
+def current_availability_snapshot(session: Session) -> Optional["availability_snapshot.AvailabilitySnapshot"]:
+    """
+    The published snapshot, rebuilt first when the stored availability version has
+    moved on, e.g. because another worker process stored a scrape. None when no
+    snapshot is published (or it cannot be rebuilt), so reads use the database.
+    """
+    snapshot = availability_snapshot.current()
+    if snapshot is None or snapshot.db_version == availability_version(session):
+        return snapshot
+    try:
+        snapshot = load_availability_snapshot(session)
+    except (SQLAlchemyError, ValueError) as e:
+        print(f"Could not rebuild the stale availability snapshot: {e}")
+        snapshot = None
+    availability_snapshot.publish(snapshot)
+    return snapshot
+
+
+def refresh_availability_snapshot(session: Session = None) -> None:
+    """
+    Rebuild the in-memory availability snapshot from the day bitmaps and swap it in.
+    On failure the snapshot is dropped so reads fall back to the database
+    rather than serving stale data.
+    """
+    try:
+        if session is None:
+            with Session(engine) as own_session:
+                availability_snapshot.publish(load_availability_snapshot(own_session))
+        else:
+            availability_snapshot.publish(load_availability_snapshot(session))
+    except Exception as e:
+        print(f"Could not build the availability snapshot: {e}")
+        availability_snapshot.publish(None)
+
+
+def get_available_start_times(days: list, start_time: str, end_time: str, duration_min: int):
+    """
+    Start times between start_time and end_time (HH:MM) on the given days, for today
+    or later, where duration_min minutes of consecutive slots are free.
+    Answered from the snapshot, or from the day bitmaps when none is published.
+    """
+    try:
+        with Session(engine) as session:
+            snapshot = current_availability_snapshot(session) or load_availability_snapshot(session)
+    except (SQLAlchemyError, ValueError) as e:
+        raise HTTPException(status_code=503, detail=f"Availability not ready: {e}")
+    return snapshot_start_times(snapshot, days, start_time, end_time, duration_min)
+
+
+def snapshot_start_times(snapshot, days: list, start_time: str, end_time: str, duration_min: int):
+    """The get_available_start_times() answer from a given snapshot."""
+    start = datetime.strptime(start_time, "%H:%M")
+    end = datetime.strptime(end_time, "%H:%M")
+    if not snapshot.days:
+        raise HTTPException(status_code=404, detail="Weeks not found.")
+    return snapshot.available_starts(
+        days,
+        start.hour * 60 + start.minute,
+        end.hour * 60 + end.minute,
+        duration_min,
+        datetime.today().date(),
     )
-    if match2:
-        start_day = int(match2.group(1))
-        start_month_str = match2.group(2).strip()
-        end_day = int(match2.group(3))
-        end_month_str = match2.group(4).strip()
-        year = int(match2.group(5))
-
-        if start_month_str in month_map and end_month_str in month_map:
-            start_month_name = month_map[start_month_str]
-            end_month_name = month_map[end_month_str]
-            start_month_num = datetime.strptime(start_month_name, "%B").month
-            end_month_num = datetime.strptime(end_month_name, "%B").month
-            start_date = datetime(year, start_month_num, start_day)
-            end_date = datetime(year, end_month_num, end_day)
-            return start_date.strftime("%Y-%m-%d"), end_date.strftime("%Y-%m-%d")
 
-    return None, None
+
+def _minute_label(minute: int) -> str:
+    # Same text as str(datetime.time), e.g. "07:45:00"
+    return f"{minute // 60:02d}:{minute % 60:02d}:00"
+
+
+def available_slots_query(day_order: dict, today: date, start_minute: int, end_minute: int):
+    """
+    Available slots of the requested days (day name -> position in the answer)
+    from today on, within [start_minute, end_minute], sorted for timeframe merging.
+    """
+    return (
+        select(
+            Day.day_name,
+            Week.week_label,
+            Day.day_id,
+            Timeslot.slot_minute,
+        )
+        .join(Day, Day.week_id == Week.week_id)
+        .join(Timeslot, Timeslot.day_id == Day.day_id)
+        .where(
+            Day.day_name.in_(list(day_order)),
+            Day.day_date >= today,
+            Timeslot.availability == True,
+            Timeslot.slot_minute.between(start_minute, end_minute),
+        )
+        .order_by(
+            case(day_order, value=Day.day_name),
+            Day.day_date,
+            Day.day_id,
+            Timeslot.slot_minute,
+        )
+    )
 
 
 def get_available_appointments(check_values, start_time, end_time):
     """
     Get availability data from the database and group available timeslots into timeframes,
     but only for today or future days.
+    Answered from the in-memory snapshot when one is published; otherwise the
+    requested days, time window, availability and past weeks are filtered
+    in a single joined query on slot_minute; consecutive 15-minute slots are
+    then merged in one pass over the sorted minute offsets.
     """
-    available_appointments = []
-
     # Get today's date
     today = datetime.today().date()
+    start_minute, end_minute = minute_window(start_time, end_time)
 
+    day_order = {day_name: i for i, day_name in enumerate(check_values.days)}
+
+    with Session(engine) as db:
+        snapshot = current_availability_snapshot(db)
+        if snapshot is not None and snapshot.days:
+            return snapshot.available_appointments(check_values.days, start_minute, end_minute, today)
+
+        if db.execute(select(Week.week_id).limit(1)).first() is None:
+            raise HTTPException(status_code=404, detail="Weeks not found.")
+
+        rows = db.execute(
+            available_slots_query(day_order, today, start_minute, end_minute)
+        ).all()
+
+    return merge_timeframes(rows)
+
+
+def minute_window(start_time, end_time) -> tuple[int, int]:
+    """Minutes since midnight of a start and end given as datetime, time or "HH:MM"."""
     # If start_time and end_time are datetime objects, extract just the time part
     if isinstance(start_time, datetime):
         start_time = start_time.time()  # Extract time only
@@ -444,108 +1121,35 @@ def get_available_appointments(check_values, start_time, end_time):
     if isinstance(end_time, str):
         end_time = datetime.strptime(end_time, "%H:%M").time()
 
-    with Session(engine) as db:
-        # Retrieve weeks, assuming you're looking for the current week or a specific one
-        weeks = db.query(Week).all()
-        if not weeks:
-            raise HTTPException(status_code=404, detail="Weeks not found.")
+    return start_time.hour * 60 + start_time.minute, end_time.hour * 60 + end_time.minute
 
-        for day_name in check_values.days:
-            # Iterate through weeks to get matching days
-            for week in weeks:
-                # Fetch days for each week in bulk
-                days = (
-                    db.query(Day)
-                    .filter(Day.week_id == week.week_id, Day.day_name == day_name)
-                    .all()
-                )
-                if not days:
-                    continue  # Skip if the day is not found
-
-                for day in days:
-                    # Convert start_date (string) to a datetime.date object
-                    day_start_date = datetime.strptime(
-                        week.start_date, "%Y-%m-%d"
-                    ).date()
-                    # Convert day name to index (Monday=0, Sunday=6)
-                    target_weekday = list(calendar.day_name).index(day_name)
-
-                    # Get actual date of that day in the current week
-                    day_date = day_start_date + timedelta(
-                        days=(target_weekday - day_start_date.weekday()) % 7
-                    )
 
-                    # Then use this for filtering
-                    if day_date < today:
-                        continue
-
-                    # Fetch timeslots for each day
-                    timeslots = (
-                        db.query(Timeslot).filter(Timeslot.day_id == day.day_id).all()
-                    )
+def merge_timeframes(rows) -> list:
+    """Merge (day_name, week_label, day_id, slot_minute) rows of available_slots_query() into timeframes."""
+    available_appointments = []
+    timeframe = None  # [day_id, day_name, week_label, start_minute, end_minute]
+    for day_name, week_label, day_id, minute in rows:
+        if timeframe and timeframe[0] == day_id and minute == timeframe[4] + 15:
+            # Continue the current timeframe (each slot is 15 minutes)
+            timeframe[4] = minute
+            continue
+        if timeframe:
+            available_appointments.append(_timeframe_result(timeframe))
+        timeframe = [day_id, day_name, week_label, minute, minute]
+
+    if timeframe:
+        available_appointments.append(_timeframe_result(timeframe))
 
-                    # Prepare a list of available timeslots (timeslot.time as datetime.time object)
-                    available_times = []
-                    for timeslot in timeslots:
-                        if isinstance(timeslot.time, str):
-                            timeslot_time = datetime.strptime(
-                                timeslot.time, "%H:%M"
-                            ).time()  # Convert string to time
-                        else:
-                            timeslot_time = (
-                                timeslot.time
-                            )  # Already a datetime.time object
-
-                        if (
-                            start_time <= timeslot_time <= end_time
-                            and timeslot.availability
-                        ):
-                            available_times.append(timeslot_time)
-
-                    # Now group the available times into timeframes
-                    if available_times:
-                        # Sort the available times
-                        available_times.sort()
-
-                        # Create timeframes by grouping consecutive available times
-                        timeframes = []
-                        current_start = available_times[0]
-                        current_end = available_times[0]
-
-                        for i in range(1, len(available_times)):
-                            if (
-                                available_times[i]
-                                == (
-                                    datetime.combine(datetime.today(), current_end)
-                                    + timedelta(minutes=15)
-                                ).time()
-                            ):
-                                # Continue the current timeframe (assuming each slot is 15 minutes)
-                                current_end = available_times[i]
-                            else:
-                                # End the current timeframe and start a new one
-                                timeframes.append(
-                                    {
-                                        "day": day_name,
-                                        "week": week.week_label,
-                                        "time": f"{current_start} to {current_end}",
-                                    }
-                                )
-                                current_start = available_times[i]
-                                current_end = available_times[i]
-
-                        # Append the last timeframe
-                        timeframes.append(
-                            {
-                                "day": day_name,
-                                "week": week.week_label,
-                                "time": f"{current_start} to {current_end}",
-                            }
-                        )
+    return available_appointments
 
-                        available_appointments.extend(timeframes)
 
-    return available_appointments
+def _timeframe_result(timeframe: list) -> dict:
+    _, day_name, week_label, start_minute, end_minute = timeframe
+    return {
+        "day": day_name,
+        "week": week_label,
+        "time": f"{_minute_label(start_minute)} to {_minute_label(end_minute)}",
+    }
 
 
 def insert_appointment_db(appointment: Appointment):
@@ -1,18 +1,17 @@
 # database_ops.py
 
-from typing import Optional, Tuple
-from sqlmodel import select
+from typing import Optional, Tuple, List, Dict, Any
 from pathlib import Path
-from sqlmodel import SQLModel, Field, create_engine, Session, Relationship, select, MetaData, Column, JSON
+from sqlmodel import SQLModel, Field, Session, select, Column, JSON
 from sqlalchemy.orm import registry
-from typing import Optional, List, Dict, Any
+from db.engine import create_db_engine
 import json
 import os
 
 DB_FILE = "./db.sqlite"
 DATABASE_URL = f"sqlite:///{DB_FILE}"
 
-engine = create_engine(DATABASE_URL, echo=False)
+engine = create_db_engine(DATABASE_URL)
 
 
 def get_session():
@@ -260,6 +259,15 @@ def get_service_id(oil_type, is_suv, cylinders):
         return result if result else None
 
 
+def get_processing_time_db(service_code: str) -> Optional[int]:
+    """Processing time in minutes of a service code, or None if it is unknown."""
+    with get_session() as session:
+        stmt = select(ServiceMapping.processing_time_min).where(
+            ServiceMapping.service_id == service_code.upper()
+        )
+        return session.exec(stmt).first()
+
+
 def get_all_services_db() -> List[Dict[str, Any]]:
     with get_session() as session:
         services = session.exec(
@@ -0,0 +1,100 @@
+"""Shared SQLAlchemy engine factory.
+
+Every database module builds its engine here so they all get the same
+connection settings. The profile is chosen with DB_ENGINE_PROFILE:
+
+- ``production`` (default): SQLite runs in WAL mode with ``synchronous=NORMAL``,
+  a busy timeout instead of immediate "database is locked" errors, memory-mapped
+  reads and a larger page cache, on a pool of connections shared across threads.
+- ``default``: SQLAlchemy's defaults, i.e. the setup before this module existed
+  (with foreign keys still enforced, which ON DELETE CASCADE relies on).
+
+Postgres URLs get a pre-pinged, sized connection pool under either profile.
+"""
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import StaticPool
+from sqlmodel import create_engine
+from dotenv import load_dotenv
+import os
+
+load_dotenv()
+
+DB_ENGINE_PROFILE = os.getenv("DB_ENGINE_PROFILE", "production")
+DB_ECHO = os.getenv("DB_ECHO", "false").lower() != "false"
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", 5000))
+
+# PRAGMAs run on every new SQLite connection, per profile
+SQLITE_PRAGMAS = {
+    "default": {
+        "foreign_keys": "ON",
+    },
+    "production": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "busy_timeout": SQLITE_BUSY_TIMEOUT_MS,
+        "foreign_keys": "ON",
+        "temp_store": "MEMORY",
+        "mmap_size": 256 * 1024 * 1024,
+        # Negative: in KiB rather than pages
+        "cache_size": -64 * 1024,
+    },
+}
+
+
+def sqlite_pragmas(profile: str) -> dict:
+    if profile not in SQLITE_PRAGMAS:
+        raise ValueError(f"Unknown database engine profile '{profile}' (expected one of {list(SQLITE_PRAGMAS)})")
+    return SQLITE_PRAGMAS[profile]
+
+
+def apply_sqlite_pragmas(dbapi_connection, pragmas: dict) -> None:
+    cursor = dbapi_connection.cursor()
+    for name, value in pragmas.items():
+        cursor.execute(f"PRAGMA {name}={value}")
+    cursor.close()
+
+
+def _engine_options(url: str, profile: str) -> tuple[dict, dict]:
+    """(create_engine keyword arguments, SQLite pragmas) for a URL and profile."""
+    url = make_url(url)
+    options = {"echo": DB_ECHO}
+    if url.get_backend_name() != "sqlite":
+        sqlite_pragmas(profile)  # Reject unknown profiles for every backend
+        options.update(pool_pre_ping=True, pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW)
+        return options, {}
+
+    pragmas = sqlite_pragmas(profile)
+    if profile == "production":
+        # Connections are handed between the event loop and worker threads
+        options["connect_args"] = {"check_same_thread": False, "timeout": SQLITE_BUSY_TIMEOUT_MS / 1000}
+        if url.database in (None, "", ":memory:"):
+            # Every connection to ":memory:" would be a different database
+            options["poolclass"] = StaticPool
+        else:
+            options.update(pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW)
+    return options, pragmas
+
+
+def _listen_for_pragmas(engine: Engine, pragmas: dict) -> None:
+    if pragmas:
+        event.listen(engine, "connect", lambda dbapi_connection, _: apply_sqlite_pragmas(dbapi_connection, pragmas))
+
+
+def create_db_engine(url: str, profile: str | None = None, **kwargs) -> Engine:
+    """Engine for ``url`` configured by ``profile`` (default: DB_ENGINE_PROFILE)."""
+    options, pragmas = _engine_options(url, profile or DB_ENGINE_PROFILE)
+    engine = create_engine(url, **{**options, **kwargs})
+    _listen_for_pragmas(engine, pragmas)
+    return engine
+
+
+def create_async_db_engine(url: str, profile: str | None = None, **kwargs) -> AsyncEngine:
+    """create_db_engine() for an asyncio-driver URL (sqlite+aiosqlite, postgresql+asyncpg)."""
+    options, pragmas = _engine_options(url, profile or DB_ENGINE_PROFILE)
+    engine = create_async_engine(url, **{**options, **kwargs})
+    _listen_for_pragmas(engine.sync_engine, pragmas)
+    return engine
@@ -0,0 +1,222 @@
+"""Single writer for call logs and feedback.
+
+The telephony platform posts call events in bursts. Instead of every request
+committing on its own (and SQLite rejecting the writers that lose the lock
+race), requests put their write on a bounded queue and await the result.
+One background task drains the queue and writes everything that arrived
+within a few milliseconds, up to a batch size, in a single transaction.
+"""
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Optional
+from dotenv import load_dotenv
+from fastapi import HTTPException
+import db.database_async as database_async
+from db.database_availability import Call_Log, Feedback
+import asyncio
+import logging
+import os
+import time
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class WriteJob:
+    kind: str  # "call_log", "call_logs" (bulk) or "feedback"
+    payload: dict
+    future: asyncio.Future
+
+
+@dataclass
+class WriterStats:
+    submitted: int = 0
+    written: int = 0
+    failed: int = 0
+    batches: int = 0
+    last_batch_size: int = 0
+    last_commit_ms: float = 0.0
+    # Backpressure: submissions that found the queue full, and those that gave up
+    waited_for_room: int = 0
+    rejected: int = 0
+    high_water: int = 0
+    last_error: Optional[str] = None
+    last_batch_at: Optional[datetime] = None
+
+
+@dataclass
+class WriteQueue:
+    """Batches call-log and feedback writes from a bounded queue into group commits."""
+    session_factory: Callable = database_async.async_session
+    max_batch: int = 200
+    max_delay_ms: float = 5
+    maxsize: int = 2000
+    # How long a request waits for room in a full queue before a 503
+    put_timeout: float = 2.0
+    stats: WriterStats = field(default_factory=WriterStats)
+    _queue: Optional[asyncio.Queue] = None
+    _task: Optional[asyncio.Task] = None
+
+    @property
+    def is_running(self) -> bool:
+        return (
+            self._task is not None
+            and not self._task.done()
+            and self._task.get_loop() is asyncio.get_running_loop()
+        )
+
+    def start(self) -> None:
+        if self._task is not None and not self._task.done():
+            return
+        self._queue = asyncio.Queue(maxsize=self.maxsize)
+        self._task = asyncio.create_task(self._run(), name="call-log-writer")
+
+    async def stop(self) -> None:
+        """Write what is already queued, then stop the writer."""
+        if self._task is None:
+            return
+        await self._queue.join()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def status(self) -> dict:
+        stats = self.stats
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "depth": self._queue.qsize() if self._queue else 0,
+            "maxsize": self.maxsize,
+            "max_batch": self.max_batch,
+            "max_delay_ms": self.max_delay_ms,
+            **stats.__dict__,
+            "average_batch_size": stats.written / stats.batches if stats.batches else 0.0,
+        }
+
+    # --- Submitting ---
+
+    async def add_call_log(self, call_log: dict) -> tuple[int, int]:
+        """Insert a call log and its empty feedback row; return (call_log_id, feedback_id)."""
+        return await self._submit("call_log", call_log)
+
+    async def add_call_logs(self, call_logs: list[dict]) -> list[Optional[tuple[int, int]]]:
+        """Bulk add_call_log(); None for call logs whose appointment does not exist."""
+        return await self._submit("call_logs", {"call_logs": call_logs})
+
+    async def append_feedback(self, phone_number: str, text: str) -> Optional[int]:
+        """Append to the latest feedback of a phone number; return its id, or None if there is none."""
+        return await self._submit("feedback", {"phone_number": phone_number, "feedback": text})
+
+    async def _submit(self, kind: str, payload: dict) -> Any:
+        self.stats.submitted += 1
+        job = WriteJob(kind, payload, asyncio.get_running_loop().create_future())
+        if not self.is_running:
+            # No writer on this loop (e.g. outside the app lifespan): write it directly
+            await self._write([job])
+            return await job.future
+
+        if self._queue.full():
+            self.stats.waited_for_room += 1
+        try:
+            await asyncio.wait_for(self._queue.put(job), timeout=self.put_timeout)
+        except asyncio.TimeoutError:
+            self.stats.rejected += 1
+            raise HTTPException(status_code=503, detail="Too many writes in progress, retry later")
+        self.stats.high_water = max(self.stats.high_water, self._queue.qsize())
+        return await job.future
+
+    # --- Writing ---
+
+    async def _run(self) -> None:
+        while True:
+            batch = [await self._queue.get()]
+            deadline = time.monotonic() + self.max_delay_ms / 1000
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                await self._write(batch)
+            except Exception as e:
+                # Never let the writer die: fail the batch and keep going
+                logger.error(f"Call log writer failed on a batch of {len(batch)}: {e}", exc_info=True)
+                for job in batch:
+                    if not job.future.done():
+                        job.future.set_exception(e)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _write(self, batch: list[WriteJob]) -> None:
+        """Write the batch in one transaction; if that fails, write its jobs one by one."""
+        start = time.perf_counter()
+        try:
+            async with self.session_factory() as session:
+                results = [await self._apply(session, job) for job in batch]
+                await session.commit()
+        except Exception as e:
+            # Any bad job (database error, invalid payload) only fails itself
+            if len(batch) == 1:
+                self._fail(batch[0], e)
+                return
+            logger.warning(f"Group commit of {len(batch)} writes failed, retrying them one by one: {e}")
+            for job in batch:
+                await self._write([job])
+            return
+
+        for job, result in zip(batch, results):
+            if not job.future.done():
+                job.future.set_result(result)
+        self.stats.written += len(batch)
+        self.stats.batches += 1
+        self.stats.last_batch_size = len(batch)
+        self.stats.last_commit_ms = (time.perf_counter() - start) * 1000
+        self.stats.last_batch_at = datetime.now()
+
+    def _fail(self, job: WriteJob, error: Exception) -> None:
+        self.stats.failed += 1
+        self.stats.last_error = str(error)
+        if not job.future.done():
+            job.future.set_exception(error)
+
+    @staticmethod
+    async def _apply(session, job: WriteJob) -> Any:
+        if job.kind == "call_log":
+            call_log = Call_Log(**job.payload)
+            session.add(call_log)
+            await session.flush()
+            feedback = Feedback(call_log_id=call_log.id, feedback=None)
+            session.add(feedback)
+            await session.flush()
+            return call_log.id, feedback.id
+
+        if job.kind == "call_logs":
+            return await database_async.insert_call_logs_bulk(session, job.payload["call_logs"])
+
+        if job.kind == "feedback":
+            feedback = await database_async.get_latest_feedback(session, job.payload["phone_number"])
+            if feedback is None:
+                return None
+            if feedback.feedback is None:
+                feedback.feedback = job.payload["feedback"]
+            else:
+                feedback.feedback = feedback.feedback + "\n" + job.payload["feedback"]
+            await session.flush()
+            return feedback.id
+
+        raise ValueError(f"Unknown write job '{job.kind}'")
+
+
+call_log_writer = WriteQueue(
+    max_batch=int(os.getenv("CALL_LOG_WRITER_BATCH", 200)),
+    max_delay_ms=float(os.getenv("CALL_LOG_WRITER_DELAY_MS", 5)),
+    maxsize=int(os.getenv("CALL_LOG_WRITER_QUEUE_SIZE", 2000)),
+)
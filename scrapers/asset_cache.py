@@ -0,0 +1,268 @@
+from playwright.async_api import BrowserContext, Route
+from dataclasses import dataclass
+from typing import Optional
+from dotenv import load_dotenv
+import zstandard
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Response headers worth replaying; the body is stored decoded so
+# content-encoding / content-length must not be kept.
+KEPT_HEADERS = ("content-type", "etag", "last-modified", "cache-control")
+CACHED_RESOURCE_TYPES = frozenset({"script", "stylesheet"})
+MAX_AGE_RE = re.compile(r"max-age=(\d+)")
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    revalidated: int = 0
+    misses: int = 0
+    bytes_served: int = 0
+
+    def as_dict(self) -> dict:
+        return dict(self.__dict__)
+
+
+class AssetCache:
+    """Content-addressed disk cache for SDSweb JS/CSS bundles.
+
+    Bodies are stored zstd-compressed under their SHA-256 and indexed by
+    URL. Fresh entries (``Cache-Control: max-age`` / ``immutable``) are
+    served straight from disk; stale ones are revalidated with the origin's
+    ETag / Last-Modified, so a 304 replaces a full bundle download. The
+    cache is bounded by ``max_bytes`` with least-recently-used eviction.
+
+    Blobs are read and written off the event loop. The index is saved every
+    ``save_every`` stores and by ``close()``, not on every store.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, level: int = 3, save_every: int = 20):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.save_every = save_every
+        self.stats = CacheStats()
+        self._compressor = zstandard.ZstdCompressor(level=level)
+        self._decompressor = zstandard.ZstdDecompressor()
+        self._index_path = os.path.join(directory, "index.json")
+        self._index: dict = self._load_index()
+        # URLs per blob and the size of the distinct blobs, kept up to date as entries come and go
+        self._refs: dict[str, int] = {}
+        self._total_bytes = 0
+        for entry in self._index.values():
+            self._ref(entry)
+        self._unsaved = 0
+        self._save_lock = asyncio.Lock()
+
+    # --- Index and blob storage ---
+
+    def _load_index(self) -> dict:
+        try:
+            with open(self._index_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable asset cache index: {e}")
+            return {}
+
+    def _save_index(self, data: str) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = f"{self._index_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(tmp_path, self._index_path)
+
+    async def flush(self) -> None:
+        """Save the index (in a worker thread)."""
+        async with self._save_lock:
+            self._unsaved = 0
+            await asyncio.to_thread(self._save_index, json.dumps(self._index))
+
+    async def close(self) -> None:
+        await self.flush()
+
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self.directory, digest[:2], f"{digest}.zst")
+
+    @property
+    def total_bytes(self) -> int:
+        # Blobs shared by several URLs are only counted once
+        return self._total_bytes
+
+    def _ref(self, entry: dict) -> None:
+        count = self._refs.get(entry["digest"], 0)
+        if count == 0:
+            self._total_bytes += entry["size"]
+        self._refs[entry["digest"]] = count + 1
+
+    def _drop(self, url: str) -> Optional[str]:
+        """Remove a URL from the index; return its digest if no other URL uses that blob."""
+        entry = self._index.pop(url, None)
+        if entry is None:
+            return None
+        digest = entry["digest"]
+        self._refs[digest] -= 1
+        if self._refs[digest] > 0:
+            return None
+        del self._refs[digest]
+        self._total_bytes -= entry["size"]
+        return digest
+
+    async def get(self, url: str) -> Optional[tuple[dict, bytes]]:
+        """Return (entry, body) for a cached URL, or None."""
+        entry = self._index.get(url)
+        if entry is None:
+            return None
+        try:
+            body = await asyncio.to_thread(self._read_blob, entry["digest"])
+        except (OSError, zstandard.ZstdError) as e:
+            logger.warning(f"Dropping unreadable cached asset {url}: {e}")
+            if self._index.get(url) is entry:
+                self._drop(url)
+            return None
+        entry["last_access"] = time.time()
+        return entry, body
+
+    def _read_blob(self, digest: str) -> bytes:
+        with open(self._blob_path(digest), "rb") as f:
+            return self._decompressor.decompress(f.read())
+
+    async def put(self, url: str, body: bytes, headers: dict) -> None:
+        digest = hashlib.sha256(body).hexdigest()
+        size = await asyncio.to_thread(self._write_blob, digest, body)
+
+        now = time.time()
+        kept = {k: v for k, v in headers.items() if k.lower() in KEPT_HEADERS}
+        entry = {
+            "digest": digest,
+            "size": size,
+            "headers": kept,
+            "stored_at": now,
+            "last_access": now,
+        }
+        replaced = self._drop(url)
+        self._index[url] = entry
+        self._ref(entry)
+        orphans = self._evict()
+        if replaced is not None and replaced not in self._refs and replaced not in orphans:
+            orphans.append(replaced)
+        if orphans:
+            await asyncio.to_thread(self._remove_blobs, orphans)
+        self._unsaved += 1
+        if self._unsaved >= self.save_every:
+            await self.flush()
+
+    def _write_blob(self, digest: str, body: bytes) -> int:
+        """Compress and write a blob unless it is already stored; return its size on disk."""
+        path = self._blob_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Two routes may store the same bundle at once
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(self._compressor.compress(body))
+            os.replace(tmp_path, path)
+        return os.path.getsize(path)
+
+    def _remove_blobs(self, digests: list[str]) -> None:
+        for digest in digests:
+            try:
+                os.remove(self._blob_path(digest))
+            except FileNotFoundError:
+                pass
+
+    def _evict(self) -> list[str]:
+        """Drop least recently used entries until under max_bytes; return the digests no entry uses."""
+        orphans = []
+        if self._total_bytes <= self.max_bytes:
+            return orphans
+        by_age = sorted(self._index, key=lambda url: self._index[url]["last_access"])
+        for url in by_age:
+            if self._total_bytes <= self.max_bytes:
+                break
+            digest = self._drop(url)
+            if digest is not None:
+                orphans.append(digest)
+        return orphans
+
+    @staticmethod
+    def is_fresh(entry: dict) -> bool:
+        cache_control = entry["headers"].get("cache-control", "")
+        if "no-cache" in cache_control or "no-store" in cache_control:
+            return False
+        if "immutable" in cache_control:
+            return True
+        match = MAX_AGE_RE.search(cache_control)
+        return bool(match) and time.time() - entry["stored_at"] < int(match.group(1))
+
+    # --- Playwright routing ---
+
+    async def attach(self, context: BrowserContext) -> None:
+        await context.route("**/*", self.handle)
+
+    async def handle(self, route: Route) -> None:
+        request = route.request
+        if request.method != "GET" or request.resource_type not in CACHED_RESOURCE_TYPES:
+            await route.fallback()
+            return
+
+        cached = await self.get(request.url)
+        if cached is not None and self.is_fresh(cached[0]):
+            await self._fulfill_cached(route, *cached)
+            self.stats.hits += 1
+            return
+
+        headers = dict(request.headers)
+        if cached is not None:
+            entry_headers = cached[0]["headers"]
+            if "etag" in entry_headers:
+                headers["if-none-match"] = entry_headers["etag"]
+            if "last-modified" in entry_headers:
+                headers["if-modified-since"] = entry_headers["last-modified"]
+
+        try:
+            response = await route.fetch(headers=headers)
+        except Exception as e:
+            logger.warning(f"Asset fetch failed for {request.url}: {e}")
+            await route.fallback()
+            return
+
+        if response.status == 304 and cached is not None:
+            await self._fulfill_cached(route, *cached)
+            self.stats.revalidated += 1
+            return
+
+        body = await response.body()
+        # The body is already decoded, so the transfer headers no longer apply
+        response_headers = {k: v for k, v in response.headers.items()
+                            if k.lower() not in ("content-encoding", "content-length")}
+        if response.status == 200 and ("etag" in response.headers or "last-modified" in response.headers
+                                       or "max-age" in response.headers.get("cache-control", "")):
+            await self.put(request.url, body, response.headers)
+        self.stats.misses += 1
+        await route.fulfill(status=response.status, headers=response_headers, body=body)
+
+    async def _fulfill_cached(self, route: Route, entry: dict, body: bytes) -> None:
+        self.stats.bytes_served += len(body)
+        await route.fulfill(status=200, headers=entry["headers"], body=body)
+
+
+asset_cache = (
+    AssetCache(
+        directory=os.getenv("ASSET_CACHE_DIR", ".asset_cache"),
+        max_bytes=int(os.getenv("ASSET_CACHE_MAX_MB", 200)) * 1024 * 1024,
+    )
+    if os.getenv("ASSET_CACHE_ENABLED", "true").lower() != "false"
+    else None
+)
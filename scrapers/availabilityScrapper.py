@@ -1,6 +1,11 @@
 from scrapers.scrapper import Scrapper
+from scrapers.network import AGGRESSIVE
+from scrapers.waits import wait_for_dom_stable, wait_for_text_change
 from models.schemas import AppointmentAvailability
-from playwright.async_api import Playwright
+from contextlib import asynccontextmanager
+from playwright.async_api import Page
+from typing import AsyncIterator, Optional
+import asyncio
 import os
 import math
 from dotenv import load_dotenv
@@ -10,19 +15,162 @@ from datetime import datetime, timedelta
 logger = logging.getLogger(__name__)
 load_dotenv(override=True)
 
+# Scrolls the virtuoso time list from top to bottom once while a
+# MutationObserver records every rendered row between `start` and `end`
+# (data-index), so the whole week comes back from a single evaluate call.
+# Returns {data-index: {day: {"time": str, "available": bool} | null}}.
+GRID_EXTRACTION_JS = """
+async (opts) => {
+    const scroller = document.querySelector(opts.scroller);
+    // Other virtuoso lists can come first in the page: take the time table's own
+    const list = scroller ? scroller.querySelector(opts.itemList) : null;
+    if (!scroller || !list) throw new Error("Availability grid not found");
+
+    const rows = {};
+    const record = (row) => {
+        const index = Number(row.getAttribute && row.getAttribute("data-index"));
+        if (!(index >= opts.start && index <= opts.end)) return;
+        const tiles = {};
+        for (const [day, position] of Object.entries(opts.days)) {
+            const tile = row.querySelector(
+                `div.css-122qvno.e1ri7uk73:nth-child(${position}) div.e1ri7uk72.KL-Tile-root:nth-child(1)`);
+            tiles[day] = tile
+                ? {time: tile.textContent, available: !tile.classList.contains("KL-Tile-disabled")}
+                : null;
+        }
+        rows[index] = tiles;
+    };
+    const complete = () => {
+        for (let i = opts.start; i <= opts.end; i++) if (!(i in rows)) return false;
+        return true;
+    };
+
+    let wake = null;
+    const observer = new MutationObserver((mutations) => {
+        for (const m of mutations) {
+            const row = m.target.closest ? m.target.closest("[data-index]") : null;
+            if (row) record(row);
+            m.addedNodes.forEach((n) => n.nodeType === 1 && n.matches("[data-index]") && record(n));
+        }
+        if (wake) wake();
+    });
+    observer.observe(list, {subtree: true, childList: true, attributes: true, attributeFilter: ["class"]});
+    // Resolve on the next batch of mutations, or after settleMs without any
+    const settle = () => new Promise((resolve) => {
+        const timer = setTimeout(resolve, opts.settleMs);
+        wake = () => { clearTimeout(timer); wake = null; setTimeout(resolve, 16); };
+    });
+
+    try {
+        scroller.scrollTop = 0;
+        await settle();
+        while (true) {
+            list.querySelectorAll(":scope > [data-index]").forEach(record);
+            if (complete()) break;
+            const bottom = scroller.scrollTop + scroller.clientHeight >= scroller.scrollHeight - 1;
+            if (bottom) break;
+            scroller.scrollTop += Math.max(scroller.clientHeight * 0.8, 50);
+            await settle();
+        }
+    } finally {
+        observer.disconnect();
+    }
+    return rows;
+}
+"""
+
 
 class AvailabilityScrapper(Scrapper):
     day_position = {"Sunday": 1, "Monday": 2, "Tuesday": 3, "Wednesday": 4,
                     "Thursday": 5, "Friday": 6, "Saturday": 7}
     MAX_RETRIES = int(os.getenv("MAX_RETRIES_AVAILABILITY", 20))
     RETRY_DELAY_MS = int(os.getenv("RETRY_AVAILABILITY_DELAY_MS", 500))
-
-    def __init__(self, config: AppointmentAvailability):
+    resource_policy = AGGRESSIVE
+    # The warm pool is kept for live-call lookups; bulk week scrapes open their own contexts
+    use_page_pool = False
+    # Read each week's grid with GRID_EXTRACTION_JS instead of slot by slot
+    grid_extraction = os.getenv("AVAILABILITY_GRID_EXTRACTION", "true").lower() != "false"
+    GRID_SETTLE_MS = int(os.getenv("AVAILABILITY_GRID_SETTLE_MS", 150))
+    # Browser contexts scraping separate ranges of weeks at the same time
+    PARALLEL_CONTEXTS = int(os.getenv("AVAILABILITY_PARALLEL_CONTEXTS", 3))
+    # Contexts all availability scrapes together (refresher tiers included) may hold at once.
+    # The cap is per process: it assumes the refresher runs in a single worker
+    # (AVAILABILITY_REFRESH_ENABLED on one process only), or each worker adds its own.
+    MAX_CONTEXTS = int(os.getenv("AVAILABILITY_MAX_CONTEXTS", 3))
+    _context_slots: Optional[tuple[asyncio.AbstractEventLoop, asyncio.Semaphore]] = None
+
+    def __init__(self, config: AppointmentAvailability, week_offset: int = 0,
+                 number_of_weeks: Optional[int] = None):
         super().__init__(config.telephone)
         self.config = config
+        # Weeks to skip from the current one, and how many to scrape from there
+        self.week_offset = week_offset
+        self.number_of_weeks = config.number_of_weeks if number_of_weeks is None else number_of_weeks
+
+    @classmethod
+    def context_slots(cls) -> asyncio.Semaphore:
+        """Semaphore capping the contexts of every availability scrape on the running loop."""
+        loop = asyncio.get_running_loop()
+        if AvailabilityScrapper._context_slots is None or AvailabilityScrapper._context_slots[0] is not loop:
+            AvailabilityScrapper._context_slots = (loop, asyncio.Semaphore(cls.MAX_CONTEXTS))
+        return AvailabilityScrapper._context_slots[1]
+
+    @asynccontextmanager
+    async def parked_page(self) -> AsyncIterator[Page]:
+        """Scrapper.parked_page(), once one of the MAX_CONTEXTS context slots is free."""
+        async with self.context_slots():
+            async with super().parked_page() as page:
+                yield page
 
     async def get_availability(self):
-        return await self.action()
+        if min(self.PARALLEL_CONTEXTS, self.number_of_weeks) <= 1:
+            return await self.action()
+        return await self.get_availability_parallel()
+
+    def week_chunks(self, workers: int) -> list[tuple[int, int]]:
+        """Split the horizon into contiguous (week_offset, number_of_weeks) ranges."""
+        size, extra = divmod(self.number_of_weeks, workers)
+        chunks, offset = [], self.week_offset
+        for i in range(workers):
+            count = size + (1 if i < extra else 0)
+            if count:
+                chunks.append((offset, count))
+                offset += count
+        return chunks
+
+    async def get_availability_parallel(self) -> dict:
+        """Scrape the weeks across several contexts and merge them in week order.
+
+        Every worker parks its own page in a new context seeded with the
+        stored session, jumps to its first week and scrapes
+        its range. The result is all-or-nothing like the sequential scrape, so
+        a failed range never makes the caller prune weeks it did not see.
+        """
+        chunks = self.week_chunks(min(self.PARALLEL_CONTEXTS, self.number_of_weeks))
+        logger.info(f"Scraping {self.number_of_weeks} weeks across {len(chunks)} contexts: {chunks}")
+
+        async def scrape(offset: int, count: int) -> dict:
+            worker = AvailabilityScrapper(self.config, week_offset=offset, number_of_weeks=count)
+            result = await worker.action()
+            if len(result) < count:
+                logger.warning(f"Weeks {offset}-{offset + count - 1} incomplete, retrying once")
+                result = await AvailabilityScrapper(self.config, week_offset=offset,
+                                                    number_of_weeks=count).action()
+            return result
+
+        results = await asyncio.gather(*(scrape(offset, count) for offset, count in chunks))
+
+        merged = {}
+        for (offset, count), result in zip(chunks, results):
+            if len(result) < count:
+                logger.error(f"Could not scrape weeks {offset}-{offset + count - 1}")
+                return {}
+            merged.update(result)
+        return merged
+
+    def error_result(self, error: Exception) -> dict:
+        print(f"An error occurred: {error}")
+        return {}
 
     def get_weeks_until_date(self,target_date: str) -> int:
         target = datetime.strptime(target_date, "%Y-%m-%d").date()
@@ -142,7 +290,7 @@ class AvailabilityScrapper(Scrapper):
             last_index_str = await last_child.get_attribute("data-index")
 
             if first_index_str is None or last_index_str is None:
-                await self.page.wait_for_timeout(100)
+                await wait_for_dom_stable(self.page, quiet_ms=50, timeout=100)
                 continue
 
             first_index = int(first_index_str)
@@ -166,7 +314,7 @@ class AvailabilityScrapper(Scrapper):
                 f"Attempt {attempt}: First={first_index}, Last={last_index}, Target={target_index}, Scrolling {direction}"
             )
 
-            await self.page.wait_for_timeout(250)
+            await wait_for_dom_stable(self.page, quiet_ms=50, timeout=250)
 
         raise Exception(f"X Failed to scroll to target index {target_index} after {max_attempts} attempts.")
     def format_time(self, time_str: str) -> str:
@@ -187,7 +335,7 @@ class AvailabilityScrapper(Scrapper):
                 if time_slot_locator:
                     break
                 await self.scroll_by(200)
-                await self.page.wait_for_timeout(self.RETRY_DELAY_MS)
+                await wait_for_dom_stable(self.page, quiet_ms=50, timeout=self.RETRY_DELAY_MS)
                 retries += 1
 
             if time_slot_locator is None:
@@ -221,39 +369,74 @@ class AvailabilityScrapper(Scrapper):
         return availability
 
 
+    async def extract_grid(self, start_timeframe: int, end_timeframe: int) -> dict:
+        """Same result as check_availability(), read in a single JavaScript pass."""
+        rows = await self.page.evaluate(GRID_EXTRACTION_JS, {
+            "scroller": self.selectors["make-appointment"]["time-scrooler"],
+            "itemList": self.selectors["make-appointment"]["time-table"],
+            "start": start_timeframe,
+            "end": end_timeframe,
+            "days": {day: self.day_position[day] for day in self.config.days},
+            "settleMs": self.GRID_SETTLE_MS,
+        })
+
+        availability = {day: {} for day in self.config.days}
+        for time_slot_index in range(start_timeframe, end_timeframe + 1):
+            tiles = rows.get(str(time_slot_index))
+            if tiles is None:
+                logger.warning(f"Time slot {time_slot_index} not found after scrolling.")
+                continue
+            for day_name in self.config.days:
+                tile = tiles.get(day_name)
+                if tile is None:
+                    logger.warning(f"Time slot {time_slot_index} not found for {day_name}.")
+                    continue
+                logger.debug(f"{day_name} @ index {tile['time']}: {tile['available']}")
+                availability[day_name][self.format_time(tile["time"])] = tile["available"]
+        return availability
+
+    async def read_week(self, start_timeframe: int, end_timeframe: int) -> dict:
+        number_of_timeframes = end_timeframe - start_timeframe + 1
+        if self.grid_extraction:
+            try:
+                return await self.extract_grid(start_timeframe, end_timeframe)
+            except Exception as e:
+                logger.warning(f"Grid extraction failed, reading slot by slot: {e}")
+        return await self.check_availability(
+            start_timeframe=start_timeframe,
+            number_of_timeframes=number_of_timeframes
+        )
+
     async def check_calendar(self) -> dict:
         result = {}
-        await self.page.wait_for_timeout(1000)
-        # Keep scroll_to_time just to compute indices
-        start_timeframe, end_timeframe, number_of_timeframes, _ = await self.scroll_to_time()
-        print(f"Checking availability from index {start_timeframe} for {number_of_timeframes} slots")
-        for _ in range(self.config.number_of_weeks):
-            week = await self.page.query_selector(self.selectors["make-appointment"]["week"])
-            result[await week.text_content()] = await self.check_availability(
-                start_timeframe=start_timeframe,
-                number_of_timeframes=number_of_timeframes
-            )
-            await self.page.wait_for_timeout(500)
+        await wait_for_dom_stable(self.page, quiet_ms=300, timeout=1000)
+        week_selector = self.selectors["make-appointment"]["week"]
+        for _ in range(self.week_offset):
+            week_label = await self.page.text_content(week_selector)
             await self.page.click(self.selectors["make-appointment"]["calender-next"])
+            if await wait_for_text_change(self.page, week_selector, week_label, timeout=5000) is None:
+                raise Exception(f"Calendar did not move past week '{week_label}'")
+        async with self.calendar_view() as full_height:
+            if full_height:
+                # Every row is rendered: slots are direct data-index lookups
+                start_timeframe, end_timeframe = self.timeframe_index(self.config.timeframe)
+                number_of_timeframes = end_timeframe - start_timeframe + 1
+            else:
+                # Keep scroll_to_time just to compute indices
+                start_timeframe, end_timeframe, number_of_timeframes, _ = await self.scroll_to_time()
+            print(f"Checking availability from index {start_timeframe} for {number_of_timeframes} slots")
+            for _ in range(self.number_of_weeks):
+                week_label = await self.page.text_content(week_selector)
+                result[week_label] = await self.read_week(start_timeframe, end_timeframe)
+                await self.page.click(self.selectors["make-appointment"]["calender-next"])
+                # Wait for the next week to render instead of a fixed delay
+                await wait_for_text_change(self.page, week_selector, week_label, timeout=5000)
         return result
 
-    async def scrapper(self, playwright: Playwright):
+    async def scrapper(self):
         results = {}
-        chromium = playwright.chromium
-        # Set to True for production
-        browser = await chromium.launch(headless=True)
-        self.page = await browser.new_page()
 
         try:
-            await self.page.goto(f"{os.getenv('SDS_URL')}login", wait_until="networkidle")
-
-            # Add your logic to scrape results here
-            await self.login()
-
-            await self.click_redenvous()
-
-            await self.chose_aviseurs()
-
             await self.insert_phone_number()
 
             logger.info(" Moving to car info")
@@ -279,7 +462,5 @@ class AvailabilityScrapper(Scrapper):
 
         except Exception as e:
             print(f"An error occurred: {e}")
-        finally:
-            await browser.close()
 
         return results
@@ -0,0 +1,201 @@
+"""Background refresh of the availability tables.
+
+Weeks are refreshed on tiers: the current week every few minutes, next week
+less often and the rest of the horizon hourly. Each tier runs in its own
+loop with jitter so the scrapes do not line up, and a per-week lock makes
+sure a week is never scraped by two refreshes at once. The scrapes run on
+their own browser contexts, capped by AvailabilityScrapper.MAX_CONTEXTS,
+so the warm page pool stays free for live calls.
+
+The locks and the context cap only hold within one process, so the refresher
+is meant to run in exactly one process of a deployment. It is off unless
+AVAILABILITY_REFRESH_ENABLED is true; with several workers, set it on one.
+"""
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Optional
+from dotenv import load_dotenv
+from sqlmodel import Session
+from models.schemas import AppointmentAvailability
+from .availabilityScrapper import AvailabilityScrapper
+import db.database_availability as db_availability
+import asyncio
+import logging
+import os
+import random
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RefreshTier:
+    name: str
+    first_week: int
+    number_of_weeks: int
+    interval_seconds: float
+    # Status, exposed by AvailabilityRefresher.status()
+    runs: int = 0
+    failures: int = 0
+    skipped: int = 0
+    running: bool = False
+    last_started: Optional[datetime] = None
+    last_success: Optional[datetime] = None
+    last_error: Optional[str] = None
+    next_run: Optional[datetime] = None
+
+    @property
+    def week_offsets(self) -> range:
+        return range(self.first_week, self.first_week + self.number_of_weeks)
+
+    def status(self) -> dict:
+        return {
+            "name": self.name,
+            "weeks": list(self.week_offsets),
+            "interval_seconds": self.interval_seconds,
+            "runs": self.runs,
+            "failures": self.failures,
+            "skipped": self.skipped,
+            "running": self.running,
+            "last_started": self.last_started,
+            "last_success": self.last_success,
+            "last_error": self.last_error,
+            "next_run": self.next_run,
+        }
+
+
+@dataclass
+class AvailabilityRefresher:
+    """Runs every RefreshTier in the background and writes the results to the DB.
+
+    Refreshes only update the weeks they scraped. Weeks are pruned once
+    every offset of the horizon has been seen, using the latest label
+    seen for each offset, which is what a full scrape used to keep.
+    """
+    tiers: list[RefreshTier]
+    telephone: str
+    timeframe: str
+    days: list[str]
+    jitter: float = 0.1
+    _locks: dict = field(default_factory=dict)
+    _labels: dict = field(default_factory=dict)
+    _tasks: list = field(default_factory=list)
+
+    @property
+    def is_running(self) -> bool:
+        return any(not task.done() for task in self._tasks)
+
+    def start(self) -> None:
+        if self.is_running:
+            return
+        self._tasks = [asyncio.create_task(self._run_tier(tier)) for tier in self.tiers]
+        logger.info(f"Availability refresher started: {[t.name for t in self.tiers]}")
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def status(self) -> dict:
+        return {
+            "running": self.is_running,
+            "weeks_refreshing": sorted(o for o, lock in self._locks.items() if lock.locked()),
+            "week_labels": dict(sorted(self._labels.items())),
+            "tiers": [tier.status() for tier in self.tiers],
+        }
+
+    def _delay(self, seconds: float) -> float:
+        return seconds * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    async def _run_tier(self, tier: RefreshTier) -> None:
+        # Stagger the first runs so the tiers do not all scrape at startup
+        await asyncio.sleep(self._delay(tier.interval_seconds) * random.uniform(0, 0.1))
+        while True:
+            await self.refresh(tier)
+            delay = self._delay(tier.interval_seconds)
+            tier.next_run = datetime.fromtimestamp(datetime.now().timestamp() + delay)
+            await asyncio.sleep(delay)
+
+    async def refresh(self, tier: RefreshTier) -> bool:
+        """Scrape and store the weeks of one tier; skip it if one of them is already refreshing."""
+        return await self._refresh(tier) == "refreshed"
+
+    async def _refresh(self, tier: RefreshTier) -> str:
+        """refresh(), returning "refreshed", "skipped" or "failed"."""
+        locks = [self._locks.setdefault(o, asyncio.Lock()) for o in tier.week_offsets]
+        if any(lock.locked() for lock in locks):
+            tier.skipped += 1
+            logger.info(f"Refresh '{tier.name}' skipped: its weeks are already refreshing")
+            return "skipped"
+
+        for lock in locks:
+            await lock.acquire()
+        tier.running = True
+        tier.runs += 1
+        tier.last_started = datetime.now()
+        try:
+            config = AppointmentAvailability(
+                telephone=self.telephone,
+                timeframe=self.timeframe,
+                days=self.days,
+                number_of_weeks=tier.number_of_weeks,
+            )
+            data = await AvailabilityScrapper(
+                config, week_offset=tier.first_week, number_of_weeks=tier.number_of_weeks
+            ).get_availability()
+            if len(data) < tier.number_of_weeks:
+                raise Exception(f"Scraped {len(data)} of {tier.number_of_weeks} weeks")
+
+            for offset, week_label in zip(tier.week_offsets, data):
+                self._labels[offset] = week_label
+            await asyncio.to_thread(self._store, data)
+
+            tier.last_success = datetime.now()
+            tier.last_error = None
+            logger.info(f"Refresh '{tier.name}' done in "
+                        f"{(tier.last_success - tier.last_started).total_seconds():.1f}s")
+            return "refreshed"
+        except Exception as e:
+            tier.failures += 1
+            tier.last_error = str(getattr(e, "detail", e))
+            logger.error(f"Refresh '{tier.name}' failed: {tier.last_error}")
+            return "failed"
+        finally:
+            tier.running = False
+            for lock in locks:
+                lock.release()
+
+    async def refresh_all(self) -> dict:
+        """Refresh every tier now; return {tier name: "refreshed" | "skipped" | "failed"}."""
+        results = await asyncio.gather(*(self._refresh(tier) for tier in self.tiers))
+        return {tier.name: result for tier, result in zip(self.tiers, results)}
+
+    def _store(self, data: dict) -> None:
+        horizon = {o for tier in self.tiers for o in tier.week_offsets}
+        keep = list(self._labels.values()) if horizon <= set(self._labels) else None
+        with Session(db_availability.engine) as session:
+            counts = db_availability.process_schedule_data(
+                session, data, prune=keep is not None, keep_weeks=keep
+            )
+        logger.info(f"Stored {len(data)} weeks: {counts}")
+
+
+def tiers_from_env() -> list[RefreshTier]:
+    weeks = int(os.getenv("AVAILABILITY_WEEKS", 12))
+    tiers = [
+        RefreshTier("current_week", 0, 1, float(os.getenv("AVAILABILITY_REFRESH_CURRENT_MIN", 5)) * 60),
+        RefreshTier("next_week", 1, 1, float(os.getenv("AVAILABILITY_REFRESH_NEXT_MIN", 20)) * 60),
+        RefreshTier("later_weeks", 2, weeks - 2, float(os.getenv("AVAILABILITY_REFRESH_LATER_MIN", 60)) * 60),
+    ]
+    return [tier for tier in tiers if tier.first_week < weeks and tier.number_of_weeks > 0]
+
+
+availability_refresher = AvailabilityRefresher(
+    tiers=tiers_from_env(),
+    telephone=os.getenv("AVAILABILITY_TELEPHONE", "5142433043"),
+    timeframe=os.getenv("AVAILABILITY_TIMEFRAME", "06:45-17:00"),
+    days=os.getenv("AVAILABILITY_DAYS", "Monday,Tuesday,Wednesday,Thursday,Friday").split(","),
+    jitter=float(os.getenv("AVAILABILITY_REFRESH_JITTER", 0.1)),
+)
@@ -0,0 +1,126 @@
+from playwright.async_api import async_playwright, Playwright, Browser, BrowserContext
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+from dotenv import load_dotenv
+from .session_store import SessionStore, session_store
+from .asset_cache import AssetCache, asset_cache
+import asyncio
+import logging
+import os
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+
+class BrowserManager:
+    """Owns a single long-lived Chromium process shared by every scraper.
+
+    The app starts it from the FastAPI lifespan and each scrape gets its own
+    isolated ``BrowserContext`` (separate cookies, storage and pages) instead
+    of paying for a full browser launch.
+    """
+
+    def __init__(self, headless: bool = True, args: Optional[list[str]] = None,
+                 session_store: Optional[SessionStore] = None,
+                 asset_cache: Optional[AssetCache] = None):
+        self.headless = headless
+        self.args = args if args is not None else ["--start-maximized"]
+        self.session_store = session_store
+        self.asset_cache = asset_cache
+        self._playwright: Optional[Playwright] = None
+        self._browser: Optional[Browser] = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def is_running(self) -> bool:
+        return self._browser is not None and self._browser.is_connected()
+
+    async def start(self) -> None:
+        async with self._lock:
+            if self.is_running:
+                return
+            if self._playwright is None:
+                self._playwright = await async_playwright().start()
+            try:
+                self._browser = await self._playwright.chromium.launch(
+                    headless=self.headless, args=self.args
+                )
+            except Exception:
+                await self._playwright.stop()
+                self._playwright = None
+                raise
+            logger.info("Shared Chromium browser launched.")
+
+    async def stop(self) -> None:
+        async with self._lock:
+            if self._browser is not None:
+                try:
+                    await self._browser.close()
+                except Exception as e:
+                    logger.warning(f"Error while closing shared browser: {e}")
+                self._browser = None
+            if self._playwright is not None:
+                await self._playwright.stop()
+                self._playwright = None
+            if self.asset_cache is not None:
+                await self.asset_cache.close()
+            logger.info("Shared Chromium browser stopped.")
+
+    def _with_session(self, options: dict) -> dict:
+        """Seed new contexts with the persisted SDSweb login when there is one."""
+        if self.session_store is not None and "storage_state" not in options:
+            state = self.session_store.load()
+            if state is not None:
+                options = {**options, "storage_state": state}
+        return options
+
+    async def open_context(self, **options) -> BrowserContext:
+        """Open a context on the shared browser; the caller owns closing it."""
+        if self._playwright is not None and not self.is_running:
+            logger.warning("Shared browser is disconnected, relaunching it.")
+            await self.start()
+        if not self.is_running:
+            raise RuntimeError("Shared browser is not running")
+        context = await self._browser.new_context(**self._with_session(options))
+        if self.asset_cache is not None:
+            await self.asset_cache.attach(context)
+        return context
+
+    @asynccontextmanager
+    async def new_context(self, **options) -> AsyncIterator[BrowserContext]:
+        """Yield an isolated browser context, closed when the block exits.
+
+        If the shared browser was started but has crashed it is relaunched.
+        Outside of the app lifespan (scripts, tests) a one-off browser is
+        launched for the duration of the block.
+        """
+        if self._playwright is None:
+            async with async_playwright() as playwright:
+                browser = await playwright.chromium.launch(
+                    headless=self.headless, args=self.args
+                )
+                try:
+                    context = await browser.new_context(**self._with_session(options))
+                    if self.asset_cache is not None:
+                        await self.asset_cache.attach(context)
+                    yield context
+                finally:
+                    await browser.close()
+            return
+
+        context = await self.open_context(**options)
+        try:
+            yield context
+        finally:
+            try:
+                await context.close()
+            except Exception as e:
+                logger.warning(f"Error while closing browser context: {e}")
+
+
+browser_manager = BrowserManager(
+    headless=os.getenv("BROWSER_HEADLESS", "true").lower() != "false",
+    session_store=session_store,
+    asset_cache=asset_cache,
+)
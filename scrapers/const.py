@@ -1,5 +1,6 @@
 import json
 from playwright.async_api import Playwright, Page
+from .waits import NetworkTracker
 
 # --- Selectors (kept as provided by user, with notes) ---
 selectors = {
@@ -78,8 +79,9 @@ async def login(page: Page, username: str, password: str) -> None:
 async def insert_phone_number(page: Page, telephone_number: int) -> None:
     await page.wait_for_selector(selectors["telephoneInput"], timeout=10000)
     await page.fill(selectors["telephoneInput"], str(telephone_number))
-    await page.keyboard.press("Enter")
-    await page.wait_for_timeout(1000)
+    async with NetworkTracker(page) as network:
+        await page.keyboard.press("Enter")
+        await network.wait_for_idle(idle_ms=250, timeout=3000)
 
 
 async def click_redenvous(page: Page) -> None:
@@ -1,23 +1,80 @@
 from .scrapper import Scrapper
+from .network import AGGRESSIVE
+from .waits import wait_for_any_selector, wait_for_dom_stable
 import logging
 import os
 import db.database_ops as db
-from playwright.async_api import Playwright, Locator, Page, ElementHandle
+from playwright.async_api import Locator, Page, ElementHandle
 from playwright.async_api import TimeoutError as PlaywrightTimeoutError
 from dotenv import load_dotenv
-from typing import List, Dict, Tuple, Optional, Union
+from typing import Awaitable, List, Dict, Tuple, Optional, Union
 import asyncio
 
 load_dotenv(override=True)
 logger = logging.getLogger(__name__)
 
+# Same fields as GetCarScrapper._read_car_details, read in one round trip.
+CAR_DETAILS_JS = """
+(sel) => {
+    const text = (el) => el ? el.textContent : null;
+    return {
+        car_info: Array.from(document.querySelectorAll(sel.carInfo), el => el.textContent),
+        cylinders: text(document.querySelector(sel.cylinders)),
+        is_hybrid: document.querySelector(sel.hybrid) !== null,
+        caller: text(document.querySelector(sel.caller)),
+    };
+}
+"""
+
+# Builds {date: {"services": [...], "kilometers": str}} exactly like the
+# per-element loop in GetCarScrapper._extract_service_history.
+SERVICE_HISTORY_JS = """
+(sel) => {
+    const main = document.querySelector(sel.top);
+    if (!main) return {error: "Service history main element not found"};
+    const timeEl = main.querySelector(".MuiTypography-root");
+    const kmEl = main.querySelector(".MuiTypography-root.MuiTypography-subtitle2");
+    if (!timeEl || !kmEl) return {error: "Required service history elements not found"};
+
+    let currentTime = timeEl.textContent;
+    const result = {[currentTime]: {services: [], kilometers: kmEl.textContent}};
+
+    const wrapper = document.querySelector(sel.wrapper);
+    if (!wrapper) return result;
+
+    for (const el of wrapper.querySelectorAll("div[data-known-size]")) {
+        if (getComputedStyle(el).position === "sticky") {
+            // New date section
+            const t = el.querySelector(".MuiTypography-root");
+            const k = el.querySelector(".MuiTypography-root.MuiTypography-subtitle2");
+            if (t && k) {
+                currentTime = t.textContent.trim();
+                result[currentTime] = {services: [], kilometers: k.textContent};
+            }
+        } else {
+            // Service entry
+            const text = el.textContent.trim();
+            if (text && currentTime in result) result[currentTime].services.push(text);
+        }
+    }
+    return result;
+}
+"""
+
 
 class GetCarScrapper(Scrapper):
+    context_options = {"viewport": {"width": 1920, "height": 1080}}
+    resource_policy = AGGRESSIVE
+    # Extract car details and service history with one page.evaluate each
+    batched_extraction = os.getenv("BATCHED_EXTRACTION", "true").lower() != "false"
+
     def __init__(self, telephone: str, car: str = None):
         super().__init__(telephone)
         self.max_retries = 3
         self.default_timeout = 5000
         self.quick_timeout = 1000
+        # Upper bound for each concurrently raced page-state detector
+        self.detect_timeout = 3000
         self.car = car
         self.service_defaults = {
             "SERVICE 1": {
@@ -61,8 +118,8 @@ class GetCarScrapper(Scrapper):
             await btn.click(timeout=self.quick_timeout)
 
             logger.info("'Rendez-vous existants' popup handled.")
-            # Wait a moment for the action to register before the script proceeds to wait for navigation.
-            await self.page.wait_for_timeout(500)
+            # Let the click register before the script proceeds to wait for navigation.
+            await wait_for_dom_stable(self.page, quiet_ms=150, timeout=500)
 
         except PlaywrightTimeoutError:
             # This is the expected and normal outcome if no immediate popup appears.
@@ -79,8 +136,8 @@ class GetCarScrapper(Scrapper):
         """
         logger.info("Starting iterative popup clearing process on new page...")
         for attempt in range(max_attempts):
-            # Wait for potential popups to render
-            await self.page.wait_for_timeout(1000)
+            # Wait for potential popups to finish rendering
+            await wait_for_dom_stable(self.page, quiet_ms=300, timeout=1000)
 
             try:
                 popup_title_loc = self.page.locator(
@@ -233,56 +290,88 @@ class GetCarScrapper(Scrapper):
         for strategy in dismiss_strategies:
             try:
                 await strategy()
-                await self.page.wait_for_timeout(300)
-                if not await popup_locator.is_visible(timeout=500):
-                    return True
+                await popup_locator.wait_for(state="hidden", timeout=500)
+                return True
             except Exception:
                 continue
         return False
 
+    async def _first_definitive(self, checks: List[Tuple[str, Awaitable]]) -> Optional[Tuple]:
+        """Run state detectors concurrently and return the first definitive answer.
+
+        A result is definitive unless its state starts with "NO_". The remaining
+        detectors are cancelled as soon as one answers; each decision is logged
+        with the time it took.
+        """
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        tasks = {asyncio.create_task(coro): name for name, coro in checks}
+        try:
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    name = tasks[task]
+                    elapsed = loop.time() - start
+                    if task.exception() is not None:
+                        logger.warning(f"Error in {name} check after {elapsed:.2f}s: {task.exception()}")
+                        continue
+                    result = task.result()
+                    if result and not result[0].startswith("NO_"):
+                        logger.info(f"State {result[0]} decided by {name} check in {elapsed:.2f}s")
+                        return result
+                    logger.debug(f"{name} check ruled itself out in {elapsed:.2f}s")
+            return None
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
     async def determine_page_state(self) -> Tuple[str, Optional[Union[Locator, Page]]]:
-        """Streamlined state determination with proper single car page detection."""
-        await self.page.wait_for_timeout(300)  # Brief wait for page stabilization
+        """Race every state detector and return the first definitive state."""
+        await wait_for_dom_stable(self.page, quiet_ms=150, timeout=300)
         logger.info(f"Determining page state for URL: {self.page.url}")
 
-        # Quick checks for error states first
-        state_checks = [
+        result = await self._first_definitive([
             ("NOT_FOUND", self._check_not_found_fast()),
-            ("POPUP", self._check_popup_fast()),
-        ]
+            ("POPUP", self._detect_popup()),
+            ("SINGLE_CAR", self._check_single_car_page()),
+        ])
 
-        for state_name, check_coro in state_checks:
+        # Popups sit on top of the car page, so they are always handled first
+        if result and (result[0] == "POPUP" or await self.page.locator(self.selectors["popupTitle"]).is_visible()):
             try:
-                result = await check_coro
-                if result[0] != f"NO_{state_name}":
-                    return result
+                return await self._check_popup_fast()
             except Exception as e:
-                logger.warning(f"Error in {state_name} check: {e}")
-                continue
-
-        # Now specifically check for single car page using the "Dernier service" indicator
-        try:
-            single_car_result = await self._check_single_car_page()
-            if single_car_result[0] != "NO_SINGLE_CAR":
-                return single_car_result
-        except Exception as e:
-            logger.warning(f"Error checking single car page: {e}")
+                logger.warning(f"Error in POPUP check: {e}")
+                return "UNKNOWN", None
+        if result:
+            return result
 
         # If we get here, we're in an unknown state
         logger.warning(f"Unknown page state. Current URL: {self.page.url}")
         return "UNKNOWN", None
 
     async def _check_not_found_fast(self) -> Tuple[str, Optional[Locator]]:
-        """Fast check for 404/not found states."""
+        """Wait for the 404/not found snackbar."""
         try:
             not_found_loc = self.page.locator(self.selectors["notFound"])
-            if await not_found_loc.is_visible(timeout=self.quick_timeout):
-                logger.info("State: NOT_FOUND")
-                return "NOT_FOUND", not_found_loc
+            await not_found_loc.first.wait_for(state="visible", timeout=self.detect_timeout)
+            logger.info("State: NOT_FOUND")
+            return "NOT_FOUND", not_found_loc
         except PlaywrightTimeoutError:
             pass
         return "NO_NOT_FOUND", None
 
+    async def _detect_popup(self) -> Tuple[str, Optional[Locator]]:
+        """Wait for any dialog title; handling is left to _check_popup_fast."""
+        try:
+            popup_title_loc = self.page.locator(self.selectors["popupTitle"])
+            await popup_title_loc.first.wait_for(state="visible", timeout=self.detect_timeout)
+            return "POPUP", popup_title_loc
+        except PlaywrightTimeoutError:
+            return "NO_POPUP", None
+
     async def _check_popup_fast(self) -> Tuple[str, Optional[Locator]]:
         """Fast popup detection and handling."""
         try:
@@ -325,7 +414,7 @@ class GetCarScrapper(Scrapper):
             btn = (self.page.locator(self.selectors["popupTitle-add-redenvous"])
                    .locator("..").locator("..").locator(".."))
             await btn.click(timeout=self.quick_timeout)
-            await self.page.wait_for_timeout(500)
+            await wait_for_dom_stable(self.page, quiet_ms=150, timeout=500)
 
             # After handling popup, check if we're now on single car page
             logger.info(
@@ -358,10 +447,10 @@ class GetCarScrapper(Scrapper):
             if await self._dismiss_popup_safely(revision_loc):
                 logger.info("Successfully dismissed revision alert popup")
 
-                # After dismissing, wait a bit longer for the page to fully load
+                # After dismissing, wait for the page to finish loading
                 logger.info(
                     "Waiting for page to stabilize after revision alert dismissal...")
-                await self.page.wait_for_timeout(2000)
+                await wait_for_dom_stable(self.page, quiet_ms=300, timeout=2000)
 
                 # Since we successfully dismissed a revision alert and we know we're on the right URL,
                 # we should be on the single car page
@@ -387,6 +476,14 @@ class GetCarScrapper(Scrapper):
             logger.error(f"Error handling revision popup: {e}")
             return "REVISION_ALERT_HANDLE_FAILED", None
 
+    async def _detect_dernier_service(self, locator: Locator) -> Tuple[str, Optional[Page]]:
+        """One single-car detection strategy: wait for the locator and check its text."""
+        await locator.first.wait_for(timeout=2000)
+        text_content = await locator.first.text_content()
+        if text_content and ("Dernier service" in text_content or "Dernier" in text_content):
+            return "ONE_CAR_PAGE", self.page
+        return "NO_SINGLE_CAR", None
+
     async def _check_single_car_page(self) -> Tuple[str, Optional[Page]]:
         """Check if we're on a single car page by looking for 'Dernier service' text."""
         current_url = self.page.url
@@ -404,44 +501,23 @@ class GetCarScrapper(Scrapper):
             # Wait for page to be ready after popup dismissal
             await self.page.wait_for_load_state("domcontentloaded", timeout=3000)
 
-            # Try multiple approaches to find the "Dernier service" text
-            search_strategies = [
+            # Race every way of finding the "Dernier service" text
+            result = await self._first_definitive([
                 # Strategy 1: Use the specific selector
-                lambda: self.page.locator(self.selectors["one-car-detect"]),
+                ("strategy 1", self._detect_dernier_service(
+                    self.page.locator(self.selectors["one-car-detect"]))),
                 # Strategy 2: Search for text anywhere on page
-                lambda: self.page.locator("text=Dernier service"),
+                ("strategy 2", self._detect_dernier_service(
+                    self.page.locator("text=Dernier service"))),
                 # Strategy 3: Search for partial text match
-                lambda: self.page.locator(":has-text('Dernier')"),
+                ("strategy 3", self._detect_dernier_service(
+                    self.page.locator(":has-text('Dernier')"))),
                 # Strategy 4: Search in common container elements
-                lambda: self.page.locator("div, span, p, h1, h2, h3").filter(
-                    has_text="Dernier service"),
-            ]
-
-            for i, strategy in enumerate(search_strategies, 1):
-                try:
-                    logger.info(f"Trying detection strategy {i}/4...")
-                    locator = strategy()
-
-                    # Wait for element to be present
-                    await locator.first.wait_for(timeout=2000)
-
-                    # Check if it's visible and get text
-                    if await locator.first.is_visible(timeout=1000):
-                        text_content = await locator.first.text_content()
-                        logger.info(
-                            f"Strategy {i} found text: '{text_content}'")
-
-                        if text_content and ("Dernier service" in text_content or "Dernier" in text_content):
-                            logger.info(
-                                f"Successfully detected single car page with strategy {i}")
-                            return "ONE_CAR_PAGE", self.page
-
-                except PlaywrightTimeoutError:
-                    logger.info(f"Strategy {i} timed out")
-                    continue
-                except Exception as e:
-                    logger.warning(f"Strategy {i} failed: {e}")
-                    continue
+                ("strategy 4", self._detect_dernier_service(
+                    self.page.locator("div, span, p, h1, h2, h3").filter(has_text="Dernier service"))),
+            ])
+            if result:
+                return result
 
             # If all strategies failed but we're on the right URL, do a final check
             logger.info(
@@ -474,17 +550,41 @@ class GetCarScrapper(Scrapper):
         logger.info("Could not confirm single car page")
         return "NO_SINGLE_CAR", None
 
+    async def _read_car_details(self) -> Dict:
+        """Per-element fallback for CAR_DETAILS_JS: one round trip per field."""
+        car_elements = await self.page.query_selector_all(self.selectors["singleCarInfo"])
+        cylinders_element = await self.page.query_selector(self.selectors["cylanders"])
+        hybrid_element = await self.page.query_selector(self.selectors["gas-pump-HV"])
+        caller_element = await self.page.query_selector(self.selectors["owner-telephone"])
+        return {
+            "car_info": [await el.text_content() for el in car_elements],
+            "cylinders": (await cylinders_element.text_content()) if cylinders_element else None,
+            "is_hybrid": hybrid_element is not None,
+            "caller": (await caller_element.text_content()) if caller_element else None,
+        }
+
     async def extract_single_car_from_page(self) -> List[Dict]:
         """Extract car information with better error handling."""
         try:
             await self.page.wait_for_selector(self.selectors["singleCarInfo"], timeout=self.default_timeout)
 
+            # Read every field in one page.evaluate round trip when batching is on
+            if self.batched_extraction:
+                details = await self.page.evaluate(CAR_DETAILS_JS, {
+                    "carInfo": self.selectors["singleCarInfo"],
+                    "cylinders": self.selectors["cylanders"],
+                    "hybrid": self.selectors["gas-pump-HV"],
+                    "caller": self.selectors["owner-telephone"],
+                })
+            else:
+                details = await self._read_car_details()
+
             # Get car info elements
-            car_elements = await self.page.query_selector_all(self.selectors["singleCarInfo"])
-            if len(car_elements) < 6:
+            car_texts = details["car_info"]
+            if len(car_texts) < 6:
                 raise ValueError("Insufficient car info elements found")
 
-            car_text = await car_elements[5].text_content()
+            car_text = car_texts[5]
             if not car_text:
                 raise ValueError("No car text found")
 
@@ -496,22 +596,16 @@ class GetCarScrapper(Scrapper):
             year = car_parts[-1]
             model = car_parts[1:-1][0].replace("-", "")
 
-            # Get cylinders info
-            cylinders_element = await self.page.query_selector(self.selectors["cylanders"])
-            cylinders = (await cylinders_element.text_content()) if cylinders_element else ""
-
-            # Check if hybrid
-            hybrid_element = await self.page.query_selector(self.selectors["gas-pump-HV"])
-            is_hybrid = hybrid_element is not None
-            # Check callers name
-            caller_element = await (await self.page.query_selector(self.selectors["owner-telephone"])).text_content()
+            cylinders = details["cylinders"] or ""
+            if details["caller"] is None:
+                raise ValueError("Owner telephone element not found")
             return [{
                 "maker": maker.strip(),
                 "model": model.strip(),
                 "year": year.strip(),
-                "caller": caller_element.strip(),
+                "caller": details["caller"].strip(),
                 "cylinders": cylinders.strip(),
-                "is_hybrid": is_hybrid
+                "is_hybrid": details["is_hybrid"]
             }]
 
         except Exception as e:
@@ -568,9 +662,11 @@ class GetCarScrapper(Scrapper):
             # mini_pupup = await self.page.locator(self.selectors["denier-service-popup"]["no-history"])
             # if mini_pupup:
             #     return []
-            await self.page.wait_for_timeout(1000)
 
             # Check if history popup opened
+            await wait_for_any_selector(
+                self.page, [self.selectors["denier-service-popup"]["header-title"]],
+                timeout=self.default_timeout)
             title_h2 = self.page.locator(
                 self.selectors["denier-service-popup"]["header-title"])
             if not await title_h2.is_visible(timeout=self.default_timeout):
@@ -625,6 +721,17 @@ class GetCarScrapper(Scrapper):
 
     async def _extract_service_history(self) -> Dict:
         """Extract service history data efficiently."""
+        if self.batched_extraction:
+            try:
+                # The whole history structure in a single round trip
+                return await self.page.evaluate(SERVICE_HISTORY_JS, {
+                    "top": self.selectors["denier-service-popup"]["top-element"],
+                    "wrapper": self.selectors["denier-service-popup"]["wrapper-els"],
+                })
+            except Exception as e:
+                logger.error(f"Error extracting service history: {e}")
+                return {"error": f"Failed to extract service history: {str(e)}"}
+
         try:
             main_el = await self.page.query_selector(
                 self.selectors["denier-service-popup"]["top-element"]
@@ -706,8 +813,8 @@ class GetCarScrapper(Scrapper):
 
             logger.info(f"Found car '{car_name}'. Clicking it.")
             await car_button_locator.first.click(timeout=self.default_timeout)
-            # Short wait for the click to process.
-            await self.page.wait_for_timeout(500)
+            # Let the click process.
+            await wait_for_dom_stable(self.page, quiet_ms=150, timeout=500)
             logger.info(f"Successfully clicked on '{car_name}'.")
 
         except PlaywrightTimeoutError:
@@ -718,23 +825,11 @@ class GetCarScrapper(Scrapper):
                 f"An error occurred while selecting the car from the popup: {e}")
             raise e
 
-    async def scrapper(self, playwright: Playwright) -> List:
+    async def scrapper(self) -> List:
         """Main scraping method with separate flows for targeted car search vs. general phone search."""
         results = []
-        browser = None
 
         try:
-            # --- Browser launch and initial login steps ---
-            chromium = playwright.chromium
-            browser = await chromium.launch(headless=True)
-            self.page = await browser.new_page()
-            await self.page.set_viewport_size({"width": 1920, "height": 1080})
-
-            await self.page.goto(f"{os.getenv('SDS_URL')}login", wait_until="networkidle")
-            await self.login()
-            await self.click_redenvous()
-            await self.chose_aviseurs()
-
             # Insert phone number, which is common to both flows
             await self.insert_phone_number()
 
@@ -845,12 +940,13 @@ class GetCarScrapper(Scrapper):
             results.append({"error": f"Critical scrapper error: {str(e)}"})
 
         finally:
-            if browser:
-                await browser.close()
             logger.info(f"Final results for phone {self.telephone}: {results}")
 
         return results
 
+    def error_result(self, error: Exception) -> List:
+        return [{"error": f"Critical scrapper error: {str(error)}"}]
+
     # State handler methods
     async def _handle_not_found_state(self, element: ElementHandle) -> List:
         message = "Phone number not found"
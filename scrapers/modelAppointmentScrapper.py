@@ -1,7 +1,9 @@
 from .scrapper import Scrapper
+from .network import CONSERVATIVE
+from .waits import wait_for_dom_stable, wait_for_text_change, wait_for_url_match
 import logging
 import os
-from playwright.async_api import Playwright, Locator
+from playwright.async_api import Locator
 from playwright.async_api import TimeoutError as PlaywrightTimeoutError
 from models.schemas import AppointmentInfo
 from dotenv import load_dotenv
@@ -16,6 +18,8 @@ logger = logging.getLogger(__name__)
 class MakeAppointmentScrapper(Scrapper):
     transport_types = ["aucun", "courtoisie",
                        "attente", "reconduire", "laisser"]
+    context_options = {"viewport": {"width": 1920, "height": 1080}}
+    resource_policy = CONSERVATIVE
 
     def __init__(self, config: AppointmentInfo):
         super().__init__(config.telephone)
@@ -27,6 +31,10 @@ class MakeAppointmentScrapper(Scrapper):
     async def makeAppointment(self):
         return await self.action()
 
+    def error_result(self, error: Exception) -> dict:
+        return {"error": f"An error occurred during appointment creation: {error}",
+                "message": "Appointment creation failed"}
+
     # --- HELPER FUNCTIONS: These are self-contained utilities ---
 
     
@@ -127,8 +135,8 @@ class MakeAppointmentScrapper(Scrapper):
                 raise Exception(
                     f"Car '{car_name}' not found in the list of vehicles.")
 
-            # Short wait for the click to process.
-            await self.page.wait_for_timeout(500)
+            # Let the click process.
+            await wait_for_dom_stable(self.page, quiet_ms=150, timeout=500)
             logger.info(f"Successfully clicked on '{car_name}'.")
 
         except PlaywrightTimeoutError:
@@ -147,8 +155,8 @@ class MakeAppointmentScrapper(Scrapper):
         """
         logger.info("Starting iterative popup clearing process...")
         for attempt in range(max_attempts):
-            # Wait for potential popups to render
-            await self.page.wait_for_timeout(1000)
+            # Wait for potential popups to finish rendering
+            await wait_for_dom_stable(self.page, quiet_ms=300, timeout=1000)
 
             try:
                 popup_title_loc = self.page.locator(
@@ -194,22 +202,43 @@ class MakeAppointmentScrapper(Scrapper):
 
         logger.warning("Reached max attempts for clearing popups.")
 
+    async def _scroll_to_slot_and_click(self, time_slot_locator: Locator) -> None:
+        """Scroll the virtual list until the time slot renders, then click it."""
+        max_retries = 20
+        found = False
+        for i in range(max_retries):
+            # Check if the element is now visible in the viewport
+            if await time_slot_locator.is_visible():
+                logger.info("Time slot element is now visible.")
+                found = True
+                break
+
+            # If not visible, scroll the specific container down
+            logger.info(
+                f"Scrolling container to find time slot... (Attempt {i+1}/{max_retries})")
+            scroll_container_selector = self.selectors["make-appointment"]['time-scrooler']
+            await self.page.evaluate(f"""
+                let container = document.querySelector("{scroll_container_selector}");
+                if (container) {{
+                    container.scrollBy(0, 200);
+                }}
+            """)
+            await wait_for_dom_stable(self.page, quiet_ms=50, timeout=300)  # Let the scroll render
+
+        if not found:
+            raise Exception(
+                f"Could not find time slot element after {max_retries} scroll attempts.")
+
+        # Once found, click the element
+        await time_slot_locator.click()
+
     # --- MAIN SCRAPPER METHOD: Refactored for resilience ---
 
-    async def scrapper(self, playwright: Playwright) -> dict:
-        browser = None
+    async def scrapper(self) -> dict:
         error_message = None
 
         try:
-            # --- 1. SETUP AND LOGIN ---
-            chromium = playwright.chromium
-            browser = await chromium.launch(headless=True, args=["--start-maximized"])
-            self.page = await browser.new_page(viewport={"width": 1920, "height": 1080})
-
-            await self.page.goto(f"{os.getenv('SDS_URL')}/login", wait_until="networkidle")
-            await self.login()
-            await self.click_redenvous()
-            await self.chose_aviseurs()
+            # --- 1. CUSTOMER LOOKUP (page is already logged in) ---
             await self.insert_phone_number()
 
             # --- 2. ROBUST NAVIGATION TO CAR PAGE ---
@@ -254,10 +283,12 @@ class MakeAppointmentScrapper(Scrapper):
             # Navigate to the correct week
             clicks, weekday, timeHM = self.get_weeks_until_date(
                 self.config.date)
+            week_selector = self.selectors["make-appointment"]["week"]
             for i in range(int(clicks)):
-                # Small delay to prevent stale element issues
-                await self.page.wait_for_timeout(300)
+                previous_week = await self.page.text_content(week_selector)
                 await self.page.click(self.selectors["make-appointment"]["calender-next"])
+                # Wait for the next week to render to prevent stale element issues
+                await wait_for_text_change(self.page, week_selector, previous_week, timeout=self.default_timeout)
 
             # Select the correct time slot
             # ... inside the scrapper method ...
@@ -270,35 +301,14 @@ class MakeAppointmentScrapper(Scrapper):
             print(time_slot_selector)
             time_slot_locator = self.page.locator(time_slot_selector)
 
-            # NEW: Targeted scrolling loop
-            max_retries = 20
-            found = False
-            for i in range(max_retries):
-                # Check if the element is now visible in the viewport
-                if await time_slot_locator.is_visible():
-                    logger.info("Time slot element is now visible.")
-                    found = True
-                    break
-
-                # If not visible, scroll the specific container down
-                logger.info(
-                    f"Scrolling container to find time slot... (Attempt {i+1}/{max_retries})")
-                scroll_container_selector = self.selectors["make-appointment"]['time-scrooler']
-                await self.page.evaluate(f"""
-                    let container = document.querySelector("{scroll_container_selector}");
-                    if (container) {{
-                        container.scrollBy(0, 200);
-                    }}
-                """)
-                await self.page.wait_for_timeout(300)  # Brief pause for scroll to render
-
-            if not found:
-                raise Exception(
-                    f"Could not find time slot element after {max_retries} scroll attempts.")
+            async with self.calendar_view() as full_height:
+                if full_height and await time_slot_locator.count() > 0:
+                    # The whole day is rendered: no scrolling needed
+                    logger.info("Time slot element found by direct lookup.")
+                    await time_slot_locator.click()
+                else:
+                    await self._scroll_to_slot_and_click(time_slot_locator)
 
-            # Once found, click the element
-            await time_slot_locator.click()
-            
             logger.info("Successfully clicked the time slot.")
             # ...
             # --- 6. FINALIZE ---
@@ -313,10 +323,9 @@ class MakeAppointmentScrapper(Scrapper):
 
             logger.info(
                 "Appointment made successfully. Waiting for confirmation.")
-            # Wait for confirmation to appear / page to change
-            await self.page.wait_for_timeout(2000)
-            url = self.page.url
-            if url == f'{os.getenv('SDS_URL')}t1/appointments-qab/1':
+            # Wait for the page to change to the confirmation URL
+            if await wait_for_url_match(self.page, f"{os.getenv('SDS_URL')}t1/appointments-qab/1",
+                                        timeout=self.default_timeout):
                 logger.info("Appointment made successfully.")
             else:
                 error_message = "Appointment creation failed."
@@ -329,9 +338,6 @@ class MakeAppointmentScrapper(Scrapper):
             # await self.page.screenshot(path=f"error_{self.config.telephone}.png")
 
         finally:
-            if browser:
-                await browser.close()
-
             if error_message:
                 return {"error": error_message, "message": "Appointment creation failed"}
             else:
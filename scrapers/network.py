@@ -0,0 +1,131 @@
+from playwright.async_api import Page, Route
+from dataclasses import dataclass, field
+from typing import Optional
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+# Typical transfer size of a request we abort, used to estimate the bytes saved
+# (an aborted request never tells us its real size).
+ESTIMATED_BYTES = {
+    "image": 40_000,
+    "media": 500_000,
+    "font": 60_000,
+    "stylesheet": 30_000,
+    "script": 80_000,
+    "other": 5_000,
+}
+
+# Third-party trackers/analytics the DOM extraction never needs
+ANALYTICS_URL_PATTERNS = (
+    r"google-analytics\.com",
+    r"googletagmanager\.com",
+    r"doubleclick\.net",
+    r"hotjar\.com",
+    r"clarity\.ms",
+    r"sentry\.io",
+    r"newrelic\.com|nr-data\.net",
+    r"facebook\.(net|com)/tr",
+)
+
+
+@dataclass(frozen=True)
+class ResourcePolicy:
+    """Which requests a scraper lets through, keyed on resource type and URL.
+
+    ``allowed_url_patterns`` win over everything else, then a request is
+    blocked if its resource type or its URL matches the deny lists.
+    """
+    name: str
+    blocked_types: frozenset = frozenset()
+    blocked_url_patterns: tuple = ()
+    allowed_url_patterns: tuple = ()
+
+    def __post_init__(self):
+        object.__setattr__(self, "_blocked_re", _compile(self.blocked_url_patterns))
+        object.__setattr__(self, "_allowed_re", _compile(self.allowed_url_patterns))
+
+    def should_block(self, resource_type: str, url: str) -> bool:
+        if self._allowed_re is not None and self._allowed_re.search(url):
+            return False
+        if resource_type in self.blocked_types:
+            return True
+        return self._blocked_re is not None and self._blocked_re.search(url) is not None
+
+
+def _compile(patterns: tuple) -> Optional[re.Pattern]:
+    return re.compile("|".join(f"(?:{p})" for p in patterns), re.IGNORECASE) if patterns else None
+
+
+# Read-only scrapes only need the DOM: drop every asset that is not layout-critical
+AGGRESSIVE = ResourcePolicy(
+    name="aggressive",
+    blocked_types=frozenset({"image", "media", "font", "texttrack", "eventsource", "manifest"}),
+    blocked_url_patterns=ANALYTICS_URL_PATTERNS + (r"\.(png|jpe?g|gif|webp|svg|ico|woff2?|ttf|otf)(\?|$)",),
+)
+
+# Booking clicks through the real UI: only drop media and third-party analytics
+CONSERVATIVE = ResourcePolicy(
+    name="conservative",
+    blocked_types=frozenset({"media"}),
+    blocked_url_patterns=ANALYTICS_URL_PATTERNS,
+)
+
+
+@dataclass
+class RouteStats:
+    blocked_requests: int = 0
+    estimated_bytes_saved: int = 0
+    by_type: dict = field(default_factory=dict)
+
+    def record(self, resource_type: str) -> None:
+        self.blocked_requests += 1
+        self.estimated_bytes_saved += ESTIMATED_BYTES.get(resource_type, ESTIMATED_BYTES["other"])
+        self.by_type[resource_type] = self.by_type.get(resource_type, 0) + 1
+
+    def merge(self, other: "RouteStats") -> None:
+        self.blocked_requests += other.blocked_requests
+        self.estimated_bytes_saved += other.estimated_bytes_saved
+        for resource_type, count in other.by_type.items():
+            self.by_type[resource_type] = self.by_type.get(resource_type, 0) + count
+
+    def as_dict(self) -> dict:
+        return {
+            "blocked_requests": self.blocked_requests,
+            "estimated_bytes_saved": self.estimated_bytes_saved,
+            "by_type": dict(self.by_type),
+        }
+
+
+# Totals since the process started, across every scrape
+route_stats = RouteStats()
+
+
+class ResourceBlocker:
+    """Page route handler applying a ResourcePolicy and counting what it saved."""
+
+    def __init__(self, policy: ResourcePolicy):
+        self.policy = policy
+        self.stats = RouteStats()
+
+    async def handle(self, route: Route) -> None:
+        request = route.request
+        if self.policy.should_block(request.resource_type, request.url):
+            self.stats.record(request.resource_type)
+            await route.abort("blockedbyclient")
+        else:
+            # Let other handlers (or the network) serve the request
+            await route.fallback()
+
+    async def attach(self, page: Page) -> None:
+        await page.route("**/*", self.handle)
+
+    async def detach(self, page: Page) -> None:
+        try:
+            if not page.is_closed():
+                await page.unroute("**/*", self.handle)
+        except Exception as e:
+            logger.debug(f"Error while removing route handler: {e}")
+        route_stats.merge(self.stats)
+        logger.info(f"Resource policy '{self.policy.name}' saved: {self.stats.as_dict()}")
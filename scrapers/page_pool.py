@@ -0,0 +1,176 @@
+from playwright.async_api import Page
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+from dotenv import load_dotenv
+from .const import selectors, login, click_redenvous, chose_aviseurs
+from .browser import BrowserManager
+from .session_store import session_store
+import asyncio
+import logging
+import os
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+
+async def park_page(page: Page) -> None:
+    """Bring a page to the phone-number input: login, rendez-vous, aviseur.
+
+    This is the customer-independent preamble of every scrape. Login is
+    skipped when the page's context is already authenticated, e.g. seeded
+    from the persisted session. A fresh login is saved for other contexts.
+    """
+    await page.goto(f"{os.getenv('SDS_URL')}login", wait_until="networkidle")
+    if await page.locator(selectors["username"]).is_visible():
+        if session_store.load() is not None:
+            # The context was seeded with a session the server no longer accepts
+            logger.info("SDSweb session rejected, re-authenticating.")
+            session_store.invalidate()
+        await login(page, os.getenv('USERNAME_SDS'), os.getenv('PASSWORD_SDS'))
+        await session_store.save(page.context)
+    await click_redenvous(page)
+    await chose_aviseurs(page)
+    await page.wait_for_selector(selectors["telephoneInput"], timeout=10000)
+
+
+class PagePool:
+    """Warm pool of logged-in pages parked at the ``#CUSTOMER_PHONE`` input.
+
+    Each page lives in its own browser context. A scrape borrows a page,
+    runs from ``insert_phone_number()`` onward and gives it back; the page
+    is then reset to the parked state in the background and only returned
+    to the pool once the phone input is visible and empty again.
+    """
+
+    def __init__(self, size: int, acquire_timeout_ms: int = 500,
+                 context_options: Optional[dict] = None):
+        self.size = size
+        self.acquire_timeout_ms = acquire_timeout_ms
+        self.context_options = context_options or {
+            "viewport": {"width": 1920, "height": 1080}}
+        self._manager: Optional[BrowserManager] = None
+        self._idle: asyncio.Queue[Page] = asyncio.Queue()
+        self._pages: set[Page] = set()
+        self._tasks: set[asyncio.Task] = set()
+        self._running = False
+
+    @property
+    def is_running(self) -> bool:
+        return self._running
+
+    def stats(self) -> dict:
+        return {
+            "size": self.size,
+            "pages": len(self._pages),
+            "idle": self._idle.qsize(),
+            "in_use": len(self._pages) - self._idle.qsize(),
+        }
+
+    async def start(self, manager: BrowserManager) -> None:
+        if self._running or self.size <= 0:
+            return
+        self._manager = manager
+        self._running = True
+        results = await asyncio.gather(
+            *(self._add_page() for _ in range(self.size)), return_exceptions=True
+        )
+        failures = [r for r in results if isinstance(r, Exception)]
+        for failure in failures:
+            logger.warning(f"Could not park a pooled page: {failure}")
+        logger.info(f"Page pool started: {self.stats()}")
+
+    async def stop(self) -> None:
+        self._running = False
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        for page in list(self._pages):
+            await self._discard(page)
+        self._idle = asyncio.Queue()
+        logger.info("Page pool stopped.")
+
+    async def is_healthy(self, page: Page) -> bool:
+        """A pooled page is healthy when it sits at an empty phone input."""
+        if page.is_closed():
+            return False
+        try:
+            phone_input = page.locator(selectors["telephoneInput"])
+            return await phone_input.is_visible() and await phone_input.input_value() == ""
+        except Exception:
+            return False
+
+    async def _add_page(self) -> None:
+        context = await self._manager.open_context(**self.context_options)
+        try:
+            page = await context.new_page()
+            await park_page(page)
+        except Exception:
+            await context.close()
+            raise
+        self._pages.add(page)
+        self._idle.put_nowait(page)
+
+    async def _discard(self, page: Page) -> None:
+        self._pages.discard(page)
+        try:
+            await page.context.close()
+        except Exception as e:
+            logger.debug(f"Error while closing pooled context: {e}")
+
+    async def _reset(self, page: Page) -> bool:
+        try:
+            await park_page(page)
+            return await self.is_healthy(page)
+        except Exception as e:
+            logger.warning(f"Failed to reset pooled page: {e}")
+            return False
+
+    async def _replace(self, page: Page) -> None:
+        await self._discard(page)
+        if self._running:
+            try:
+                await self._add_page()
+            except Exception as e:
+                logger.warning(f"Could not replace pooled page: {e}")
+
+    async def _release(self, page: Page) -> None:
+        if self._running and await self._reset(page):
+            self._idle.put_nowait(page)
+        else:
+            await self._replace(page)
+
+    def _spawn(self, coro) -> None:
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    @asynccontextmanager
+    async def borrow(self) -> AsyncIterator[Optional[Page]]:
+        """Yield a parked page, or None when the pool cannot serve one in time."""
+        if not self._running:
+            yield None
+            return
+        try:
+            page = await asyncio.wait_for(
+                self._idle.get(), timeout=self.acquire_timeout_ms / 1000)
+        except asyncio.TimeoutError:
+            logger.info(f"No pooled page available: {self.stats()}")
+            yield None
+            return
+
+        if not await self.is_healthy(page) and not await self._reset(page):
+            self._spawn(self._replace(page))
+            yield None
+            return
+
+        try:
+            yield page
+        finally:
+            self._spawn(self._release(page))
+
+
+page_pool = PagePool(
+    size=int(os.getenv("PAGE_POOL_SIZE", 2)),
+    acquire_timeout_ms=int(os.getenv("PAGE_POOL_ACQUIRE_TIMEOUT_MS", 500)),
+)
@@ -1,7 +1,13 @@
 from helpers.function import normalize_canadian_number
-from playwright.async_api import async_playwright, Playwright, Page
-from typing import Optional
+from playwright.async_api import Page
+from typing import AsyncIterator, Optional
+from contextlib import asynccontextmanager, nullcontext
 from .const import selectors, daysWeek
+from .browser import browser_manager
+from .page_pool import page_pool, park_page
+from .network import ResourceBlocker, ResourcePolicy
+from .waits import wait_for_any_selector
+from .virtual_list import full_height_calendar
 import os, time, logging
 from dotenv import load_dotenv
 from abc import ABC, abstractmethod
@@ -17,6 +23,15 @@ class Scrapper(ABC):
     transport_types = ["aucun", "courtoisie", "attente", "reconduire", "laisser"]
     username = os.getenv('USERNAME_SDS')
     password = os.getenv('PASSWORD_SDS')
+    # Options passed to browser.new_context() for every scrape of this class
+    context_options: dict = {}
+    # Borrow a pre-logged-in page from the pool when one is available
+    use_page_pool = True
+    # Requests aborted while this scraper drives the page (None = no blocking)
+    resource_policy: Optional[ResourcePolicy] = None
+    # Render every calendar row at once instead of scrolling the virtual list
+    full_height_calendar = os.getenv("CALENDAR_FULL_HEIGHT", "true").lower() != "false"
+    calendar_viewport_height = int(os.getenv("CALENDAR_VIEWPORT_HEIGHT", 4000))
 
     def __init__(self, telephone: str):
         self.telephone = normalize_canadian_number(telephone)
@@ -36,14 +51,19 @@ class Scrapper(ABC):
         await self.page.wait_for_selector(self.selectors["telephoneInput"], timeout=10000)
         await self.page.fill(self.selectors["telephoneInput"], self.telephone)
         await self.page.keyboard.press("Enter")
-        await self.page.wait_for_timeout(1000)
+        # The customer lookup is back once it shows a dialog (vehicles, alerts),
+        # the car page or the not-found snackbar; each next step waits for its own element
+        await wait_for_any_selector(self.page, [
+            self.selectors["popupTitle"],
+            self.selectors["make-appointment"]["car-page"],
+            self.selectors["notFound"],
+        ], timeout=1000)
 
     async def click_redenvous(self) -> None:
         if not self.page:
             raise RuntimeError("Page must be set before calling click_redenvous()")
         await self.page.wait_for_selector(self.selectors["redenzvous"], timeout=15000)
         await self.page.click(self.selectors["redenzvous"])
-        await self.page.wait_for_timeout(500)
 
     async def chose_aviseurs(self) -> None:
         if not self.page:
@@ -51,17 +71,74 @@ class Scrapper(ABC):
         await self.page.wait_for_selector(self.selectors["popupAvisaur"], timeout=10000)
         await self.page.click(self.selectors["chris"])
 
+    async def open_session(self) -> None:
+        """Login and navigate self.page to the phone-number input."""
+        if not self.page:
+            raise RuntimeError("Page must be set before calling open_session()")
+        await park_page(self.page)
+
+    def calendar_view(self):
+        """Async context manager yielding True when the whole calendar is rendered."""
+        if not self.full_height_calendar:
+            return nullcontext(False)
+        return full_height_calendar(self.page, self.selectors["make-appointment"]["time-scrooler"],
+                                    self.calendar_viewport_height)
+
+    @asynccontextmanager
+    async def parked_page(self) -> AsyncIterator[Page]:
+        """Yield a page waiting at the phone-number input.
+
+        Pages come from the warm pool when possible, otherwise a fresh
+        context is opened and the login preamble is run on it. The class's
+        resource policy is applied for as long as the page is held.
+        """
+        blocker = ResourceBlocker(self.resource_policy) if self.resource_policy else None
+
+        if self.use_page_pool:
+            async with page_pool.borrow() as page:
+                if page is not None:
+                    if blocker:
+                        await blocker.attach(page)
+                    try:
+                        yield page
+                    finally:
+                        if blocker:
+                            await blocker.detach(page)
+                    return
+
+        async with browser_manager.new_context(**self.context_options) as context:
+            self.page = await context.new_page()
+            if blocker:
+                await blocker.attach(self.page)
+            try:
+                await self.open_session()
+                yield self.page
+            finally:
+                if blocker:
+                    await blocker.detach(self.page)
+
     @abstractmethod
-    async def scrapper(self, playwright: Playwright) -> str:
-        """This must be implemented by subclasses and should set self.page"""
+    async def scrapper(self) -> str:
+        """This must be implemented by subclasses. It runs on self.page, which
+        is already parked at the phone-number input, from insert_phone_number() onward."""
         pass
 
+    def error_result(self, error: Exception):
+        """Result returned by action() when no parked page could be obtained.
+        Subclasses override this to keep their usual error shape."""
+        raise error
+
     async def action(self) -> str:
         start_time = time.time()
         logger.info(f"\n--- Checking cars with number: {self.telephone} ---")
 
-        async with async_playwright() as playwright:
-            result = await self.scrapper(playwright)
+        try:
+            async with self.parked_page() as page:
+                self.page = page
+                result = await self.scrapper()
+        except Exception as e:
+            logger.critical(f"Could not run scrapper: {e}", exc_info=True)
+            result = self.error_result(e)
 
         end_time = time.time()
         logger.info(f"Total execution time: {end_time - start_time:.2f} seconds")
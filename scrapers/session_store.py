@@ -0,0 +1,66 @@
+from playwright.async_api import BrowserContext
+from typing import Optional
+from dotenv import load_dotenv
+import json
+import logging
+import os
+import time
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+
+class SessionStore:
+    """Authenticated SDSweb storage state (cookies + localStorage) kept on disk.
+
+    The state is captured once after a successful login and new browser
+    contexts are seeded from it, so cold processes (restarts, other uvicorn
+    workers) can skip the login form until the file expires or the server
+    rejects the session.
+    """
+
+    def __init__(self, path: str, ttl_seconds: int):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+
+    def load(self) -> Optional[dict]:
+        """Return the stored state, or None if missing, unreadable or expired."""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable session file {self.path}: {e}")
+            return None
+
+        if data.get("expires_at", 0) <= time.time():
+            logger.info("Stored SDSweb session has expired.")
+            return None
+        return data.get("storage_state")
+
+    async def save(self, context: BrowserContext) -> None:
+        state = await context.storage_state()
+        data = {"expires_at": time.time() + self.ttl_seconds, "storage_state": state}
+
+        # Write to a temp file and swap it in so concurrent workers never read a partial file
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
+        logger.info(f"Saved SDSweb session to {self.path}.")
+
+    def invalidate(self) -> None:
+        try:
+            os.remove(self.path)
+            logger.info("Stored SDSweb session invalidated.")
+        except FileNotFoundError:
+            pass
+
+
+session_store = SessionStore(
+    path=os.getenv("SDS_SESSION_FILE", ".sds_session.json"),
+    ttl_seconds=int(os.getenv("SDS_SESSION_TTL_MINUTES", 480)) * 60,
+)
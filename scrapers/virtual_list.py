@@ -0,0 +1,78 @@
+"""Full-height rendering mode for the react-virtuoso calendar.
+
+Virtuoso only renders the rows that fit in its scroller, which is why the
+availability and booking flows scroll and retry to reach a time slot. Giving
+the scroller room for the whole 06:45-22:00 day makes every ``data-index``
+row render at once, so a slot becomes a direct lookup.
+"""
+from playwright.async_api import Page
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+import logging
+
+logger = logging.getLogger(__name__)
+
+# True once the scroller has nothing left to scroll, i.e. every row is rendered
+FULLY_RENDERED_JS = """
+(scroller) => {
+    const el = document.querySelector(scroller);
+    return !!el && el.querySelector("[data-index]") !== null
+        && el.scrollHeight <= el.clientHeight + 1;
+}
+"""
+
+# Last resort when the page layout caps the scroller: size it to its content
+FORCE_HEIGHT_JS = """
+(scroller) => {
+    const el = document.querySelector(scroller);
+    if (!el) return false;
+    el.style.maxHeight = "none";
+    el.style.height = `${el.scrollHeight}px`;
+    return true;
+}
+"""
+
+
+async def wait_fully_rendered(page: Page, scroller: str, timeout: int) -> bool:
+    try:
+        await page.wait_for_function(FULLY_RENDERED_JS, arg=scroller, timeout=timeout)
+        return True
+    except PlaywrightTimeoutError:
+        return False
+
+
+@asynccontextmanager
+async def full_height_calendar(page: Page, scroller: str, viewport_height: int,
+                               timeout: int = 2000) -> AsyncIterator[bool]:
+    """Render the whole calendar while inside the block; yield whether it worked.
+
+    The viewport is made ``viewport_height`` tall (and the scroller forced to
+    its content height if that is not enough), then restored on exit. When
+    False is yielded, callers keep using their scrolling path.
+    """
+    original = page.viewport_size
+    rendered = False
+    try:
+        if original is not None:
+            await page.set_viewport_size({"width": original["width"], "height": viewport_height})
+        rendered = await wait_fully_rendered(page, scroller, timeout)
+        if not rendered:
+            # Virtuoso keeps measuring rows as they appear, so re-check after forcing
+            for _ in range(3):
+                if not await page.evaluate(FORCE_HEIGHT_JS, scroller):
+                    break
+                if rendered := await wait_fully_rendered(page, scroller, timeout // 3):
+                    break
+    except Exception as e:
+        logger.warning(f"Could not render the full calendar: {e}")
+
+    logger.info(f"Full-height calendar {'rendered' if rendered else 'incomplete, scrolling instead'}")
+    try:
+        yield rendered
+    finally:
+        if original is not None and not page.is_closed():
+            try:
+                await page.set_viewport_size(original)
+            except Exception as e:
+                logger.debug(f"Could not restore the viewport: {e}")
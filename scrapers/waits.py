@@ -0,0 +1,166 @@
+"""Event-driven wait conditions for the SDSweb scrapers.
+
+Each helper takes a single ``timeout`` (ms) that bounds the whole condition
+and returns as soon as the page is actually ready, instead of sleeping for
+a fixed amount of time. They return a falsy value on timeout rather than
+raising, so callers keep deciding what a missing element means.
+"""
+from playwright.async_api import Page, Request
+from playwright.async_api import Error as PlaywrightError
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+from typing import Iterable, Optional, Pattern, Union
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Resolves true after `quietMs` without DOM mutations, false at the deadline.
+DOM_STABLE_JS = """
+([quietMs, timeoutMs]) => new Promise(resolve => {
+    let quietTimer;
+    const finish = (stable) => {
+        observer.disconnect();
+        clearTimeout(quietTimer);
+        clearTimeout(deadline);
+        resolve(stable);
+    };
+    const observer = new MutationObserver(() => {
+        clearTimeout(quietTimer);
+        quietTimer = setTimeout(() => finish(true), quietMs);
+    });
+    observer.observe(document, {subtree: true, childList: true, attributes: true, characterData: true});
+    quietTimer = setTimeout(() => finish(true), quietMs);
+    const deadline = setTimeout(() => finish(false), timeoutMs);
+})
+"""
+
+
+def _now() -> float:
+    return asyncio.get_running_loop().time()
+
+
+async def wait_for_any_selector(page: Page, selectors: Iterable[str], timeout: int,
+                                state: str = "visible") -> Optional[str]:
+    """Wait until any of ``selectors`` reaches ``state``; return the one that did."""
+    tasks = {
+        asyncio.create_task(page.locator(selector).first.wait_for(state=state, timeout=timeout)): selector
+        for selector in selectors
+    }
+    try:
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return tasks[task]
+        return None
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def wait_for_url_match(page: Page, url: Union[str, Pattern], timeout: int) -> bool:
+    """Wait until the page URL matches ``url`` (glob, regex or exact string)."""
+    try:
+        await page.wait_for_url(url, timeout=timeout, wait_until="commit")
+        return True
+    except PlaywrightTimeoutError:
+        return False
+
+
+async def wait_for_text_change(page: Page, selector: str, previous: Optional[str],
+                               timeout: int) -> Optional[str]:
+    """Wait until the text of ``selector`` differs from ``previous``; return the new text."""
+    try:
+        handle = await page.wait_for_function(
+            """([selector, previous]) => {
+                const el = document.querySelector(selector);
+                return el && el.textContent !== previous ? el.textContent : null;
+            }""",
+            arg=[selector, previous],
+            timeout=timeout,
+        )
+        return await handle.json_value()
+    except PlaywrightTimeoutError:
+        return None
+
+
+async def wait_for_dom_stable(page: Page, quiet_ms: int, timeout: int) -> bool:
+    """Wait until no DOM mutation happened for ``quiet_ms``."""
+    deadline = _now() + timeout / 1000
+    while True:
+        remaining_ms = int((deadline - _now()) * 1000)
+        if remaining_ms <= 0:
+            return False
+        try:
+            return await page.evaluate(DOM_STABLE_JS, [quiet_ms, remaining_ms])
+        except PlaywrightError as e:
+            # A navigation destroyed the execution context: the DOM is clearly
+            # still changing, so start observing the new document.
+            if "context was destroyed" not in str(e) and "navigat" not in str(e):
+                raise
+            await asyncio.sleep(0.05)
+
+
+class NetworkTracker:
+    """Counts in-flight requests of a page, to wait for "network idle for X ms".
+
+    Enter it *before* triggering the action so requests it starts are seen::
+
+        async with NetworkTracker(page) as network:
+            await page.keyboard.press("Enter")
+            await network.wait_for_idle(idle_ms=250, timeout=3000)
+    """
+
+    # Long-lived connections never "finish" and would keep the page busy forever
+    IGNORED_TYPES = frozenset({"websocket", "eventsource"})
+
+    def __init__(self, page: Page):
+        self.page = page
+        self._inflight: set = set()
+        self._last_activity = 0.0
+
+    async def __aenter__(self) -> "NetworkTracker":
+        self._last_activity = _now()
+        self.page.on("request", self._on_request)
+        self.page.on("requestfinished", self._on_done)
+        self.page.on("requestfailed", self._on_done)
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        self.page.remove_listener("request", self._on_request)
+        self.page.remove_listener("requestfinished", self._on_done)
+        self.page.remove_listener("requestfailed", self._on_done)
+
+    def _on_request(self, request: Request) -> None:
+        if request.resource_type not in self.IGNORED_TYPES:
+            self._inflight.add(request)
+            self._last_activity = _now()
+
+    def _on_done(self, request: Request) -> None:
+        if request in self._inflight:
+            self._inflight.discard(request)
+            self._last_activity = _now()
+
+    @property
+    def inflight(self) -> int:
+        return len(self._inflight)
+
+    async def wait_for_idle(self, idle_ms: int, timeout: int) -> bool:
+        deadline = _now() + timeout / 1000
+        idle = idle_ms / 1000
+        while True:
+            now = _now()
+            if not self._inflight and now - self._last_activity >= idle:
+                return True
+            if now >= deadline:
+                logger.debug(f"Network not idle after {timeout} ms ({self.inflight} in flight)")
+                return False
+            await asyncio.sleep(min(0.05, deadline - now))
+
+
+async def wait_for_network_idle(page: Page, idle_ms: int, timeout: int) -> bool:
+    """Wait until the page made no request for ``idle_ms`` (from now on)."""
+    async with NetworkTracker(page) as network:
+        return await network.wait_for_idle(idle_ms, timeout)
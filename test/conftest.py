@@ -0,0 +1,24 @@
+import pytest
+from pathlib import Path
+from playwright.async_api import async_playwright
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+def fixture_html(name: str) -> str:
+    """A saved SDSweb page fragment from test/fixtures."""
+    return (FIXTURES / name).read_text(encoding="utf-8")
+
+
+@pytest.fixture
+async def browser_page():
+    """A blank Chromium page; the test is skipped where no browser is installed."""
+    async with async_playwright() as playwright:
+        try:
+            browser = await playwright.chromium.launch()
+        except Exception as e:
+            pytest.skip(f"Chromium is not available: {str(e).splitlines()[0]}")
+        try:
+            yield await browser.new_page()
+        finally:
+            await browser.close()
@@ -0,0 +1,161 @@
+import threading
+import urllib.error
+import urllib.request
+import pytest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import AsyncMock, MagicMock
+from scrapers.asset_cache import AssetCache
+
+BUNDLE = b"console.log('sdsweb');" * 500
+
+
+class BundleHandler(BaseHTTPRequestHandler):
+    """Stand-in for the SDSweb static server: one bundle with an ETag."""
+    requests_served = 0
+
+    def do_GET(self):
+        BundleHandler.requests_served += 1
+        if self.headers.get("If-None-Match") == '"v1"':
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/javascript")
+        self.send_header("ETag", '"v1"')
+        self.send_header("Content-Length", str(len(BUNDLE)))
+        self.end_headers()
+        self.wfile.write(BUNDLE)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), BundleHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    BundleHandler.requests_served = 0
+    yield f"http://127.0.0.1:{httpd.server_port}"
+    httpd.shutdown()
+
+
+def make_route(url: str, resource_type: str = "script"):
+    """Fake Playwright route whose fetch() really hits the stand-in server."""
+    async def fetch(headers):
+        request = urllib.request.Request(url, headers=headers)
+        try:
+            with urllib.request.urlopen(request) as resp:
+                status, resp_headers, body = resp.status, dict(resp.headers), resp.read()
+        except urllib.error.HTTPError as e:
+            status, resp_headers, body = e.code, dict(e.headers), b""
+        response = MagicMock()
+        response.status = status
+        response.headers = {k.lower(): v for k, v in resp_headers.items()}
+        response.body = AsyncMock(return_value=body)
+        return response
+
+    route = MagicMock()
+    route.request.url = url
+    route.request.method = "GET"
+    route.request.resource_type = resource_type
+    route.request.headers = {}
+    route.fetch = AsyncMock(side_effect=fetch)
+    route.fulfill = AsyncMock()
+    route.fallback = AsyncMock()
+    return route
+
+
+class TestAssetCache:
+
+    @pytest.mark.asyncio
+    async def test_miss_then_revalidated_hit(self, server, tmp_path):
+        cache = AssetCache(str(tmp_path), max_bytes=10 * 1024 * 1024)
+        url = f"{server}/static/js/main.js"
+
+        first = make_route(url)
+        await cache.handle(first)
+        assert first.fulfill.await_args.kwargs["body"] == BUNDLE
+        await cache.close()
+
+        # A new cache instance (cold process) reuses the files on disk
+        cache = AssetCache(str(tmp_path), max_bytes=10 * 1024 * 1024)
+        second = make_route(url)
+        await cache.handle(second)
+
+        assert second.fulfill.await_args.kwargs["body"] == BUNDLE
+        assert cache.stats.revalidated == 1
+        assert BundleHandler.requests_served == 2
+
+    @pytest.mark.asyncio
+    async def test_non_static_requests_fall_through(self, server, tmp_path):
+        cache = AssetCache(str(tmp_path), max_bytes=10 * 1024 * 1024)
+        route = make_route(f"{server}/api/customers", resource_type="xhr")
+
+        await cache.handle(route)
+
+        route.fallback.assert_awaited_once()
+        route.fetch.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_fresh_entry_served_without_request(self, tmp_path):
+        cache = AssetCache(str(tmp_path), max_bytes=10 * 1024 * 1024)
+        await cache.put("https://sds/app.js", BUNDLE, {"cache-control": "public, max-age=31536000, immutable"})
+
+        entry, body = await cache.get("https://sds/app.js")
+        assert body == BUNDLE
+        assert cache.is_fresh(entry)
+
+    @pytest.mark.asyncio
+    async def test_lru_eviction_and_dedup(self, tmp_path):
+        cache = AssetCache(str(tmp_path), max_bytes=10 * 1024 * 1024)
+        await cache.put("https://sds/a.js", b"a" * 1000, {})
+        await cache.put("https://sds/a-copy.js", b"a" * 1000, {})
+        assert len({e["digest"] for e in cache._index.values()}) == 1
+
+        await cache.put("https://sds/b.js", b"b" * 1000, {})
+        # Room for two blobs: touching a.js makes b.js the least recently used
+        cache.max_bytes = cache.total_bytes
+        await cache.get("https://sds/a.js")
+        await cache.get("https://sds/a-copy.js")
+        await cache.put("https://sds/c.js", b"c" * 1000, {})
+
+        assert set(cache._index) == {"https://sds/a.js", "https://sds/a-copy.js", "https://sds/c.js"}
+        assert cache.total_bytes <= cache.max_bytes
+
+    @pytest.mark.asyncio
+    async def test_index_saved_in_batches(self, tmp_path):
+        cache = AssetCache(str(tmp_path), max_bytes=10 * 1024 * 1024, save_every=3)
+        index_path = tmp_path / "index.json"
+        await cache.put("https://sds/a.js", b"a" * 1000, {})
+        await cache.put("https://sds/b.js", b"b" * 1000, {})
+        assert not index_path.exists()
+
+        await cache.put("https://sds/c.js", b"c" * 1000, {})
+        assert len(AssetCache(str(tmp_path), max_bytes=0)._index) == 3
+
+        await cache.put("https://sds/d.js", b"d" * 1000, {})
+        await cache.close()
+        assert len(AssetCache(str(tmp_path), max_bytes=0)._index) == 4
+
+    @pytest.mark.asyncio
+    async def test_running_total_matches_index(self, tmp_path):
+        def distinct_blob_bytes(cache):
+            return sum({e["digest"]: e["size"] for e in cache._index.values()}.values())
+
+        cache = AssetCache(str(tmp_path), max_bytes=10 * 1024 * 1024)
+        await cache.put("https://sds/a.js", b"a" * 1000, {})
+        await cache.put("https://sds/a-copy.js", b"a" * 1000, {})
+        await cache.put("https://sds/b.js", b"b" * 1000, {})
+        # A new bundle under the same URL releases the old blob
+        await cache.put("https://sds/b.js", b"B" * 1000, {})
+        assert cache.total_bytes == distinct_blob_bytes(cache)
+        assert len(list(tmp_path.glob("*/*.zst"))) == 2
+
+        cache.max_bytes = cache.total_bytes
+        await cache.put("https://sds/c.js", b"c" * 1000, {})
+        assert cache.total_bytes == distinct_blob_bytes(cache) <= cache.max_bytes
+        await cache.close()
+
+        reloaded = AssetCache(str(tmp_path), max_bytes=0)
+        assert reloaded.total_bytes == cache.total_bytes
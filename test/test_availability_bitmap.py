@@ -0,0 +1,75 @@
+import pytest
+from sqlmodel import Session, create_engine, select
+import db.availability_bitmap as bitmap
+import db.availability_snapshot as availability_snapshot
+import db.database_availability as db_availability
+from db.database_availability import DB_Availability, Day, upsert_schedule_data
+
+
+class TestBitmapHelpers:
+
+    def test_grid_fits_in_a_signed_64_bit_column(self):
+        assert bitmap.SLOT_COUNT == 62
+        assert bitmap.slot_time(0) == "06:45" and bitmap.slot_time(61) == "22:00"
+
+    def test_round_trip_and_ranges(self):
+        slots = {"06:45": True, "07:00": True, "07:15": False, "07:30": True, "08:00": None}
+        bits, known = bitmap.from_slots(slots)
+
+        assert bitmap.to_slots(bits, known) == {"06:45": True, "07:00": True, "07:15": False, "07:30": True}
+        assert bitmap.runs(bits) == [(0, 1), (3, 3)]
+        assert bitmap.available_minutes(bits, 7 * 60, 8 * 60) == [420, 450]
+
+    def test_merge_and_diff(self):
+        bits, known = bitmap.from_slots({"07:00": True, "07:15": True})
+        new_bits, new_known = bitmap.from_slots({"07:15": False, "07:30": True})
+
+        merged = bitmap.merge(bits, known, new_bits, new_known)
+        assert bitmap.to_slots(*merged) == {"07:00": True, "07:15": False, "07:30": True}
+
+        freed, taken = bitmap.diff(bits, merged[0])
+        assert bitmap.indices(freed) == [bitmap.slot_index(450)]
+        assert bitmap.indices(taken) == [bitmap.slot_index(435)]
+
+    def test_fitting_starts_need_consecutive_free_slots(self):
+        bits, _ = bitmap.from_slots({"07:00": True, "07:15": True, "07:30": True, "07:45": False,
+                                     "08:00": True, "08:15": True})
+        two_slots = bitmap.fitting_starts(bits, 2)
+        assert [bitmap.slot_time(i) for i in two_slots] == ["07:00", "07:15", "08:00"]
+
+        window = bitmap.range_mask(7 * 60 + 15, 8 * 60)
+        assert [bitmap.slot_time(i) for i in bitmap.fitting_starts(bits, 3, window)] == []
+        assert [bitmap.slot_time(i) for i in bitmap.fitting_starts(bits, 2, window)] == ["07:15", "08:00"]
+
+
+@pytest.fixture
+def session(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'availability.sqlite'}")
+    db_availability.enable_sqlite_foreign_keys(engine)
+    DB_Availability.metadata.create_all(bind=engine)
+    with Session(engine) as session:
+        yield session
+    availability_snapshot.publish(None)
+
+
+class TestDayBitmaps:
+
+    def test_bitmap_follows_upserts_and_derives_rows(self, session):
+        label = "Sem. du 17 au 23 août 2025"
+        upsert_schedule_data(session, {label: {"Monday": {"07:00": True, "07:15": False}}})
+        counts = upsert_schedule_data(session, {label: {"Monday": {"07:15": True}}})
+        session.commit()
+
+        assert counts["day"] == {"inserted": 0, "updated": 1, "unchanged": 0}
+        day = session.exec(select(Day)).one()
+        rows = {t.time: t.availability for t in day.timeslots}
+        assert bitmap.to_slots(day.availability_bits, day.known_bits) == rows == {"07:00": True, "07:15": True}
+
+    def test_row_by_row_path_keeps_bitmap(self, session, monkeypatch):
+        monkeypatch.setattr(db_availability, "BULK_UPSERT", False)
+        db_availability.process_schedule_data(
+            session, {"Sem. du 17 au 23 août 2025": {"Friday": {"21:45": True, "22:00": False}}}
+        )
+
+        day = session.exec(select(Day)).one()
+        assert bitmap.to_slots(day.availability_bits, day.known_bits) == {"21:45": True, "22:00": False}
@@ -0,0 +1,64 @@
+import asyncio
+import pytest
+from unittest.mock import patch
+from scrapers.availability_refresher import AvailabilityRefresher, RefreshTier
+
+
+def make_refresher() -> AvailabilityRefresher:
+    return AvailabilityRefresher(
+        tiers=[RefreshTier("current_week", 0, 1, 300), RefreshTier("later_weeks", 1, 2, 3600)],
+        telephone="5142433043",
+        timeframe="06:45-17:00",
+        days=["Monday"],
+    )
+
+
+def fake_scrape(delay: float = 0):
+    async def get_availability(scrapper):
+        await asyncio.sleep(delay)
+        return {f"Sem. du {scrapper.week_offset + i}": {"Monday": {}} for i in range(scrapper.number_of_weeks)}
+    return get_availability
+
+
+class TestAvailabilityRefresher:
+
+    @pytest.mark.asyncio
+    async def test_partial_refresh_does_not_prune(self):
+        refresher = make_refresher()
+        with patch("scrapers.availability_refresher.AvailabilityScrapper.get_availability",
+                   autospec=True, side_effect=fake_scrape()), \
+                patch("scrapers.availability_refresher.db_availability.process_schedule_data") as store:
+            assert await refresher.refresh(refresher.tiers[0])
+            store.assert_called_once()
+            assert store.call_args.kwargs == {"prune": False, "keep_weeks": None}
+
+            # Once every week of the horizon has been seen, pruning keeps all of them
+            assert await refresher.refresh(refresher.tiers[1])
+            assert store.call_args.kwargs == {"prune": True, "keep_weeks": ["Sem. du 0", "Sem. du 1", "Sem. du 2"]}
+
+        assert refresher.tiers[1].last_success is not None
+
+    @pytest.mark.asyncio
+    async def test_overlapping_refresh_is_skipped(self):
+        refresher = make_refresher()
+        tier = refresher.tiers[0]
+        with patch("scrapers.availability_refresher.AvailabilityScrapper.get_availability",
+                   autospec=True, side_effect=fake_scrape(delay=0.05)), \
+                patch("scrapers.availability_refresher.db_availability.process_schedule_data"):
+            first, second = await asyncio.gather(refresher.refresh(tier), refresher.refresh(tier))
+
+        assert (first, second) == (True, False)
+        assert tier.runs == 1 and tier.skipped == 1
+
+    @pytest.mark.asyncio
+    async def test_failed_scrape_reported_in_status(self):
+        refresher = make_refresher()
+        with patch("scrapers.availability_refresher.AvailabilityScrapper.get_availability",
+                   autospec=True, return_value={}), \
+                patch("scrapers.availability_refresher.db_availability.process_schedule_data") as store:
+            assert not await refresher.refresh(refresher.tiers[1])
+
+        store.assert_not_called()
+        status = refresher.status()["tiers"][1]
+        assert status["failures"] == 1
+        assert status["last_error"] == "Scraped 0 of 2 weeks"
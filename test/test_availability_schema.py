@@ -0,0 +1,76 @@
+import pytest
+from datetime import date
+from sqlalchemy import inspect, text
+from sqlmodel import Session, create_engine, select
+import db.database_availability as db_availability
+from db.database_availability import DB_Availability, Day, Timeslot, Week
+
+UNIQUE_INDEXES = ("ux_week_label", "ux_week_start_date", "ux_day_week_day_name", "ux_timeslot_day_time")
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'availability.sqlite'}")
+    db_availability.enable_sqlite_foreign_keys(engine)
+    DB_Availability.metadata.create_all(bind=engine)
+    return engine
+
+
+def query_plan(session: Session, statement) -> str:
+    compiled = statement.compile(session.get_bind(), compile_kwargs={"literal_binds": True})
+    return "\n".join(row[-1] for row in session.execute(text(f"EXPLAIN QUERY PLAN {compiled}")))
+
+
+class TestSchemaUpgrade:
+
+    def test_duplicates_merged_before_unique_indexes(self, engine):
+        # A database from before the unique indexes, with a week scraped twice
+        with engine.begin() as conn:
+            for name in UNIQUE_INDEXES:
+                conn.execute(text(f"DROP INDEX {name}"))
+        with Session(engine) as session:
+            session.add_all([
+                Week(week_id=1, week_label="17 au 23 août 2025", start_date="2025-08-17", end_date="2025-08-23"),
+                Week(week_id=2, week_label="Sem. du 17 au 23 août 2025", start_date="2025-08-17", end_date="2025-08-23"),
+                Day(day_id=1, week_id=1, day_name="Monday"),
+                Day(day_id=2, week_id=2, day_name="Monday"),
+                Day(day_id=3, week_id=2, day_name="Tuesday"),
+                Timeslot(timeslot_id=1, day_id=1, time="07:00", availability=True),
+                Timeslot(timeslot_id=2, day_id=2, time="07:00", availability=False),
+                Timeslot(timeslot_id=3, day_id=2, time="07:15", availability=False),
+                Timeslot(timeslot_id=4, day_id=1, time="07:15", availability=True),
+            ])
+            session.commit()
+
+        assert db_availability.deduplicate_availability(engine) == {"week": 1, "day": 1, "timeslot": 2}
+        db_availability.upgrade_schema(engine)
+
+        index_names = {
+            index["name"] for table in ("week", "day", "timeslot") for index in inspect(engine).get_indexes(table)
+        }
+        assert set(UNIQUE_INDEXES) <= index_names
+        with Session(engine) as session:
+            week = session.exec(select(Week)).one()
+            assert week.week_id == 2
+            monday = next(day for day in week.days if day.day_name == "Monday")
+            # The newest timeslot of each time wins
+            assert {t.time: t.availability for t in monday.timeslots} == {"07:00": False, "07:15": True}
+            assert (monday.availability_bits, monday.known_bits) == (0b100, 0b110)
+            assert monday.day_date == date(2025, 8, 18)
+
+    def test_hot_queries_use_the_indexes(self, engine):
+        with Session(engine) as session:
+            plan = query_plan(session, select(Week).where(Week.week_label == "17 au 23 août 2025"))
+            assert "USING INDEX ux_week_label" in plan
+
+            plan = query_plan(session, select(Day).where(Day.week_id == 1, Day.day_name == "Monday"))
+            assert "USING INDEX ux_day_week_day_name" in plan
+
+            plan = query_plan(session, select(Timeslot).where(Timeslot.day_id == 1, Timeslot.time == "07:00"))
+            assert "USING INDEX ux_timeslot_day_time" in plan
+
+            plan = query_plan(session, db_availability.available_slots_query(
+                {"Monday": 0, "Friday": 1}, date(2025, 8, 18), 9 * 60, 12 * 60,
+            ))
+            assert "SCAN timeslot" not in plan
+            assert "SEARCH timeslot USING INDEX" in plan
@@ -0,0 +1,165 @@
+import asyncio
+from contextlib import asynccontextmanager
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from models.schemas import AppointmentAvailability
+from scrapers.availabilityScrapper import AvailabilityScrapper
+from test.conftest import fixture_html
+
+
+def make_scrapper(days=("Monday", "Tuesday")) -> AvailabilityScrapper:
+    config = AppointmentAvailability(
+        telephone="5142069161", timeframe="07:00-07:30", days=list(days), number_of_weeks=1
+    )
+    scrapper = AvailabilityScrapper(config)
+    scrapper.page = MagicMock()
+    return scrapper
+
+
+class TestGridExtraction:
+
+    @pytest.mark.asyncio
+    async def test_falls_back_to_slot_by_slot(self):
+        scrapper = make_scrapper()
+        scrapper.page.evaluate = AsyncMock(side_effect=Exception("Availability grid not found"))
+        scrapper.check_availability = AsyncMock(return_value={"Monday": {}, "Tuesday": {}})
+
+        availability = await scrapper.read_week(3, 5)
+
+        assert availability == {"Monday": {}, "Tuesday": {}}
+        scrapper.check_availability.assert_awaited_once_with(start_timeframe=3, number_of_timeframes=3)
+
+
+def expected_grid(scrapper: AvailabilityScrapper, start: int, end: int) -> dict:
+    """What sdsweb_week_grid.html shows: 6:45 at data-index 2, free unless (index + column) % 3 == 0."""
+    grid = {day: {} for day in scrapper.config.days}
+    for index in range(start, end + 1):
+        minutes = 6 * 60 + 45 + (index - 2) * 15
+        for day in scrapper.config.days:
+            grid[day][f"{minutes // 60:02d}:{minutes % 60:02d}"] = (index + scrapper.day_position[day]) % 3 != 0
+    return grid
+
+
+@pytest.mark.integration
+class TestGridExtractionInBrowser:
+    """GRID_EXTRACTION_JS on a virtualized week grid in a real Chromium page."""
+
+    async def load(self, page, timeframe: str) -> AvailabilityScrapper:
+        await page.set_content(fixture_html("sdsweb_week_grid.html"))
+        scrapper = make_scrapper(days=("Monday", "Friday", "Sunday"))
+        scrapper.config.timeframe = timeframe
+        scrapper.page = page
+        return scrapper
+
+    async def scroll_top(self, page) -> int:
+        return await page.evaluate("document.getElementById('times').scrollTop")
+
+    async def test_scrolls_through_rows_rendered_on_demand(self, browser_page):
+        scrapper = await self.load(browser_page, "07:00-12:00")
+        start, end = scrapper.timeframe_index(scrapper.config.timeframe)
+
+        assert await scrapper.extract_grid(start, end) == expected_grid(scrapper, start, end)
+        # Rows past the viewport were only recorded after scrolling
+        assert await self.scroll_top(browser_page) > 0
+
+    async def test_stops_once_the_range_is_complete(self, browser_page):
+        scrapper = await self.load(browser_page, "07:00-07:30")
+        start, end = scrapper.timeframe_index(scrapper.config.timeframe)
+
+        assert await scrapper.extract_grid(start, end) == expected_grid(scrapper, start, end)
+        assert await self.scroll_top(browser_page) == 0
+
+    async def test_matches_the_end_of_the_day(self, browser_page):
+        scrapper = await self.load(browser_page, "20:00-22:00")
+        start, end = scrapper.timeframe_index(scrapper.config.timeframe)
+
+        assert await scrapper.extract_grid(start, end) == expected_grid(scrapper, start, end)
+
+
+class TestParallelWeeks:
+
+    def test_week_chunks_are_contiguous(self):
+        scrapper = AvailabilityScrapper(AppointmentAvailability(
+            telephone="5142069161", timeframe="07:00-07:30", days=["Monday"], number_of_weeks=12
+        ))
+        assert scrapper.week_chunks(5) == [(0, 3), (3, 3), (6, 2), (8, 2), (10, 2)]
+
+    @pytest.mark.asyncio
+    async def test_ranges_merged_in_week_order(self):
+        config = AppointmentAvailability(
+            telephone="5142069161", timeframe="07:00-07:30", days=["Monday"], number_of_weeks=4
+        )
+
+        async def fake_action(worker):
+            # Finish in reverse order to check the merge keeps week order
+            await asyncio.sleep(0.01 * (4 - worker.week_offset))
+            return {f"Sem. du {worker.week_offset + i}": {"Monday": {}} for i in range(worker.number_of_weeks)}
+
+        with patch.object(AvailabilityScrapper, "PARALLEL_CONTEXTS", 2), \
+                patch.object(AvailabilityScrapper, "action", autospec=True, side_effect=fake_action):
+            result = await AvailabilityScrapper(config).get_availability()
+
+        assert list(result) == ["Sem. du 0", "Sem. du 1", "Sem. du 2", "Sem. du 3"]
+
+    @pytest.mark.asyncio
+    async def test_failed_range_returns_nothing(self):
+        config = AppointmentAvailability(
+            telephone="5142069161", timeframe="07:00-07:30", days=["Monday"], number_of_weeks=4
+        )
+
+        async def fake_action(worker):
+            if worker.week_offset == 2:
+                return {}
+            return {f"Sem. du {worker.week_offset + i}": {} for i in range(worker.number_of_weeks)}
+
+        with patch.object(AvailabilityScrapper, "PARALLEL_CONTEXTS", 2), \
+                patch.object(AvailabilityScrapper, "action", autospec=True, side_effect=fake_action) as action:
+            result = await AvailabilityScrapper(config).get_availability()
+
+        assert result == {}
+        # The failed range was retried once
+        assert action.await_count == 3
+
+    @pytest.mark.asyncio
+    async def test_workers_leave_the_page_pool_to_live_calls(self):
+        scrapper = make_scrapper()
+        context = MagicMock()
+        context.new_page = AsyncMock(return_value=MagicMock())
+        context_manager = MagicMock()
+        context_manager.__aenter__ = AsyncMock(return_value=context)
+        context_manager.__aexit__ = AsyncMock(return_value=False)
+
+        with patch("scrapers.scrapper.page_pool") as page_pool, \
+                patch("scrapers.scrapper.browser_manager.new_context", return_value=context_manager), \
+                patch("scrapers.scrapper.park_page", new_callable=AsyncMock), \
+                patch("scrapers.scrapper.ResourceBlocker") as blocker:
+            blocker.return_value.attach = AsyncMock()
+            blocker.return_value.detach = AsyncMock()
+            async with scrapper.parked_page() as page:
+                assert page is context.new_page.return_value
+
+        page_pool.borrow.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_contexts_capped_across_scrapes(self):
+        open_contexts = peak = 0
+
+        @asynccontextmanager
+        async def fake_parked_page(scrapper):
+            nonlocal open_contexts, peak
+            open_contexts += 1
+            peak = max(peak, open_contexts)
+            await asyncio.sleep(0.01)
+            yield MagicMock()
+            open_contexts -= 1
+
+        async def scrape():
+            async with make_scrapper().parked_page():
+                pass
+
+        with patch.object(AvailabilityScrapper, "MAX_CONTEXTS", 2), \
+                patch.object(AvailabilityScrapper, "_context_slots", None), \
+                patch("scrapers.scrapper.Scrapper.parked_page", fake_parked_page):
+            await asyncio.gather(*(scrape() for _ in range(5)))
+
+        assert peak == 2
@@ -0,0 +1,177 @@
+import os
+import pytest
+import subprocess
+import sys
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+from sqlmodel import Session, create_engine
+import db.availability_snapshot as availability_snapshot
+import db.database_availability as db_availability
+from db.database_availability import DB_Availability, month_map, upsert_schedule_data
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FRENCH_MONTHS = {english: french for french, english in month_map.items()}
+
+
+def week_label(start: date) -> str:
+    end = start + timedelta(days=6)
+    return (f"Sem. du {start.day} {FRENCH_MONTHS[start.strftime('%B')]} au "
+            f"{end.day} {FRENCH_MONTHS[end.strftime('%B')]} {end.year}")
+
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'availability.sqlite'}")
+    db_availability.enable_sqlite_foreign_keys(engine)
+    DB_Availability.metadata.create_all(bind=engine)
+    monkeypatch.setattr(db_availability, "engine", engine)
+    availability_snapshot.publish(None)
+    yield engine
+    availability_snapshot.publish(None)
+
+
+class TestGetAvailableAppointments:
+
+    def test_single_query_merges_consecutive_slots(self, engine):
+        today = date.today()
+        next_sunday = today + timedelta(days=(6 - today.weekday()) % 7 or 7)
+        last_sunday = next_sunday - timedelta(days=14)
+        upcoming, past = week_label(next_sunday), week_label(last_sunday)
+        with Session(engine) as session:
+            upsert_schedule_data(session, {
+                upcoming: {
+                    "Monday": {"07:00": True, "07:15": True, "07:30": False, "07:45": True, "12:00": True},
+                    "Tuesday": {"07:00": True, "07:15": True},
+                    "Wednesday": {"07:00": True},
+                },
+                past: {"Monday": {"07:00": True}},
+            })
+            session.commit()
+
+        result = db_availability.get_available_appointments(
+            SimpleNamespace(days=["Tuesday", "Monday"]), "07:00", "11:00"
+        )
+
+        label = upcoming.replace("Sem. du ", "")
+        assert result == [
+            {"day": "Tuesday", "week": label, "time": "07:00:00 to 07:15:00"},
+            {"day": "Monday", "week": label, "time": "07:00:00 to 07:15:00"},
+            {"day": "Monday", "week": label, "time": "07:45:00 to 07:45:00"},
+        ]
+
+    def test_snapshot_answers_like_the_database(self, engine):
+        today = date.today()
+        next_sunday = today + timedelta(days=(6 - today.weekday()) % 7 or 7)
+        with Session(engine) as session:
+            upsert_schedule_data(session, {
+                week_label(next_sunday + timedelta(weeks=w)): {
+                    day: {f"{h:02d}:{m:02d}": (h + m + w) % 3 != 0 for h in range(7, 12) for m in (0, 15, 30, 45)}
+                    for day in ("Monday", "Wednesday")
+                }
+                for w in range(3)
+            })
+            session.commit()
+        query = (SimpleNamespace(days=["Wednesday", "Monday"]), "08:00", "10:30")
+
+        from_database = db_availability.get_available_appointments(*query)
+        db_availability.refresh_availability_snapshot()
+        snapshot = availability_snapshot.current()
+        from_snapshot = db_availability.get_available_appointments(*query)
+
+        assert snapshot is not None and snapshot.info()["days"] == 6
+        assert from_snapshot == from_database != []
+
+        # Every published snapshot gets a new version
+        db_availability.refresh_availability_snapshot()
+        assert availability_snapshot.current().version == snapshot.version + 1
+
+    def test_snapshot_rebuilt_after_another_process_stores(self, engine, tmp_path):
+        today = date.today()
+        label = week_label(today + timedelta(days=(6 - today.weekday()) % 7 or 7))
+        with Session(engine) as session:
+            db_availability.process_schedule_data(session, {label: {"Monday": {"09:00": True}}})
+        snapshot = availability_snapshot.current()
+        query = (SimpleNamespace(days=["Monday"]), "07:00", "12:00")
+        assert [a["time"] for a in db_availability.get_available_appointments(*query)] == ["09:00:00 to 09:00:00"]
+
+        # Another worker process stores a scrape; this process's snapshot is not republished by it
+        script = (
+            "import db.database_availability as d\n"
+            "from sqlmodel import Session\n"
+            "with Session(d.engine) as s:\n"
+            f"    d.process_schedule_data(s, {{{label!r}: {{'Monday': {{'09:00': False, '10:00': True}}}}}})\n"
+        )
+        env = {**os.environ, "DATABASE_URL": str(engine.url), "DB_ENGINE_PROFILE": "default"}
+        subprocess.run([sys.executable, "-c", script], env=env, cwd=ROOT, check=True, capture_output=True)
+        assert availability_snapshot.current() is snapshot
+
+        assert [a["time"] for a in db_availability.get_available_appointments(*query)] == ["10:00:00 to 10:00:00"]
+        assert availability_snapshot.current().db_version == snapshot.db_version + 1
+        assert [s["start"] for s in db_availability.get_available_start_times(["Monday"], "07:00", "12:00", 15)] \
+            == ["10:00"]
+
+    def test_start_times_fit_the_service_duration(self, engine):
+        today = date.today()
+        next_sunday = today + timedelta(days=(6 - today.weekday()) % 7 or 7)
+        with Session(engine) as session:
+            upsert_schedule_data(session, {week_label(next_sunday): {
+                "Monday": {"09:00": True, "09:15": True, "09:30": True, "09:45": False, "10:00": True},
+            }})
+            session.commit()
+
+        starts = db_availability.get_available_start_times(["Monday"], "09:00", "10:00", 45)
+
+        assert starts == [{
+            "day": "Monday",
+            "week": week_label(next_sunday).replace("Sem. du ", ""),
+            "date": (next_sunday + timedelta(days=1)).isoformat(),
+            "start": "09:00",
+            "end": "09:45",
+        }]
+        # 30 minutes also fit at 09:15; 10:00 is free but 10:15 is not
+        assert [s["start"] for s in db_availability.get_available_start_times(["Monday"], "09:00", "10:00", 30)] \
+            == ["09:00", "09:15"]
+
+    def test_next_available_starts_in_time_order(self, engine):
+        with Session(engine) as session:
+            upsert_schedule_data(session, {
+                # Weeks of Sunday 2030-01-06 and 2030-01-13
+                week_label(date(2030, 1, 13)): {"Monday": {"08:00": True, "08:15": True}},
+                week_label(date(2030, 1, 6)): {
+                    "Monday": {"07:00": True, "07:15": False, "07:30": True, "07:45": True},
+                    "Tuesday": {"07:00": True},
+                },
+            })
+            session.commit()
+        after = datetime(2030, 1, 7, 7, 0)
+
+        starts = db_availability.get_next_available_starts(after=after, limit=3)
+        assert [s["starts_at"] for s in starts] == [
+            "2030-01-07T07:00:00", "2030-01-07T07:30:00", "2030-01-07T07:45:00",
+        ]
+
+        with_room = db_availability.get_next_available_starts(after=after, limit=5, duration_min=30)
+        assert [s["starts_at"] for s in with_room] == ["2030-01-07T07:30:00", "2030-01-14T08:00:00"]
+        assert with_room[0]["end"] == "08:00"
+
+        tuesdays = db_availability.get_next_available_starts(after=after, days=["Tuesday"])
+        assert [s["starts_at"] for s in tuesdays] == ["2030-01-08T07:00:00"]
+
+        late = db_availability.get_next_available_starts(after=after, start_time="07:30", end_time="08:00")
+        assert [s["start"] for s in late] == ["07:30", "07:45", "08:00"]
+        # Only the start has to be in the window: a 30 minute service at 07:45 runs until 08:15
+        late_with_room = db_availability.get_next_available_starts(
+            after=after, start_time="07:30", end_time="07:45", duration_min=30)
+        assert [s["starts_at"] for s in late_with_room] == ["2030-01-07T07:30:00"]
+        monday_at_eight = db_availability.get_next_available_starts(
+            after=after, days=["Monday"], start_time="08:00", end_time="08:00", duration_min=30)
+        assert [s["starts_at"] for s in monday_at_eight] == ["2030-01-14T08:00:00"]
+
+    def test_backfills_slot_minute(self, engine):
+        with Session(engine) as session:
+            upsert_schedule_data(session, {week_label(date(2030, 1, 6)): {"Monday": {"09:15": True}}})
+            session.execute(db_availability.update(db_availability.Timeslot).values(slot_minute=None))
+            session.commit()
+
+        assert db_availability.backfill_slot_minutes(engine) == 1
+        assert db_availability.backfill_slot_minutes(engine) == 0
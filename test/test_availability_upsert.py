@@ -0,0 +1,149 @@
+import pytest
+from datetime import date, datetime
+from sqlmodel import Session, create_engine, select
+import db.availability_archive as availability_archive
+import db.availability_snapshot as availability_snapshot
+import db.database_availability as db_availability
+from db.database_availability import (
+    DB_Availability, Timeslot, Week, delete_old_weeks, parse_time_labels, upsert_schedule_data,
+)
+
+
+@pytest.fixture
+def session(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'availability.sqlite'}")
+    db_availability.enable_sqlite_foreign_keys(engine)
+    DB_Availability.metadata.create_all(bind=engine)
+    with Session(engine) as session:
+        yield session
+    availability_snapshot.publish(None)
+
+
+SNAPSHOT = {
+    "Sem. du 17 au 23 août 2025": {
+        "Monday": {"07:00": True, "07:15": False},
+        "Tuesday": {"07:00": False, "07:15": None},
+    },
+    "Sem. du 24 au 30 août 2025": {
+        "Monday": {"07:00": True},
+    },
+}
+
+
+class TestUpsertScheduleData:
+
+    def test_insert_then_update_counts(self, session):
+        counts = upsert_schedule_data(session, SNAPSHOT)
+        session.commit()
+        assert counts["week"] == {"inserted": 2, "updated": 0, "unchanged": 0}
+        assert counts["day"] == {"inserted": 3, "updated": 0, "unchanged": 0}
+        # The unreadable (None) slot is skipped
+        assert counts["timeslot"] == {"inserted": 4, "updated": 0, "unchanged": 0}
+
+        changed = {
+            "Sem. du 17 au 23 août 2025": {"Monday": {"07:00": False, "07:15": False, "07:30": True}},
+        }
+        counts = upsert_schedule_data(session, changed)
+        session.commit()
+        assert counts["week"] == {"inserted": 0, "updated": 0, "unchanged": 1}
+        assert counts["timeslot"] == {"inserted": 1, "updated": 1, "unchanged": 1}
+
+        week = session.exec(select(Week).where(Week.week_label == "17 au 23 août 2025")).one()
+        assert (week.start_date, week.end_date) == ("2025-08-17", "2025-08-23")
+        monday = next(day for day in week.days if day.day_name == "Monday")
+        assert {t.time: t.availability for t in monday.timeslots} == {
+            "07:00": False, "07:15": False, "07:30": True,
+        }
+
+    def test_process_schedule_data_matches_row_by_row(self, session, monkeypatch):
+        db_availability.process_schedule_data(session, SNAPSHOT)
+        bulk = sorted((t.day.week.week_label, t.day.day_name, t.time, t.availability)
+                      for t in session.exec(select(Timeslot)).all())
+
+        for week in session.exec(select(Week)).all():
+            session.delete(week)
+        session.commit()
+
+        monkeypatch.setattr(db_availability, "BULK_UPSERT", False)
+        # Row-by-row cannot store the unreadable slot either
+        legacy_snapshot = {
+            label: {day: {t: a for t, a in slots.items() if a is not None} for day, slots in week.items()}
+            for label, week in SNAPSHOT.items()
+        }
+        db_availability.process_schedule_data(session, legacy_snapshot)
+        legacy = sorted((t.day.week.week_label, t.day.day_name, t.time, t.availability)
+                        for t in session.exec(select(Timeslot)).all())
+
+        assert bulk == legacy
+
+    def test_weeks_keyed_by_date(self, session):
+        upsert_schedule_data(session, SNAPSHOT)
+        session.commit()
+
+        # The same week under another label format updates the existing row
+        relabelled = {"Sem. du 17 août au 23 août 2025": {"Monday": {"07:00": False}}}
+        counts = upsert_schedule_data(session, relabelled)
+        session.commit()
+        assert counts["week"] == {"inserted": 0, "updated": 1, "unchanged": 0}
+        assert counts["timeslot"] == {"inserted": 0, "updated": 1, "unchanged": 0}
+
+        week = session.exec(select(Week).where(Week.start_date == "2025-08-17")).one()
+        assert week.week_label == "17 août au 23 août 2025"
+        assert {day.day_name: day.day_date for day in week.days} == {
+            "Monday": date(2025, 8, 18), "Tuesday": date(2025, 8, 19),
+        }
+
+    def test_row_by_row_relabelled_week(self, session, monkeypatch):
+        monkeypatch.setattr(db_availability, "BULK_UPSERT", False)
+        db_availability.process_schedule_data(session, {"Sem. du 17 au 23 août 2025": {"Monday": {"07:00": True}}})
+
+        # Same start date, new label: the week is updated instead of hitting ux_week_start_date
+        relabelled = {"Sem. du 17 août au 23 août 2025": {"Monday": {"07:00": False}}}
+        db_availability.process_schedule_data(session, relabelled)
+
+        week = session.exec(select(Week)).one()
+        assert (week.week_label, week.start_date) == ("17 août au 23 août 2025", "2025-08-17")
+        assert [t.availability for t in session.exec(select(Timeslot)).all()] == [False]
+
+    def test_year_crossing_labels(self, session):
+        assert parse_time_labels("Sem. du 28 déc. au 3 janv. 2026") == ("2025-12-28", "2026-01-03")
+
+        upsert_schedule_data(session, {"Sem. du 28 déc. au 3 janv. 2026": {"Friday": {"07:00": True}}})
+        session.commit()
+        slot = session.exec(select(Timeslot)).one()
+        assert slot.day.day_date == date(2026, 1, 2)
+        assert slot.starts_at == datetime(2026, 1, 2, 7, 0)
+
+    def test_delete_old_weeks_by_date_range(self, session):
+        upsert_schedule_data(session, SNAPSHOT)
+        upsert_schedule_data(session, {"Sem. du 10 au 16 août 2025": {"Monday": {"07:00": True}}})
+        session.commit()
+
+        delete_old_weeks(session, ["Sem. du 17 au 23 août 2025", "Sem. du 24 au 30 août 2025"])
+
+        assert sorted(session.exec(select(Week.start_date)).all()) == ["2025-08-17", "2025-08-24"]
+        assert len(session.exec(select(Timeslot)).all()) == 4
+
+    def test_retention_window_and_archive(self, session, tmp_path):
+        upsert_schedule_data(session, SNAPSHOT)
+        upsert_schedule_data(session, {
+            "Sem. du 3 au 9 août 2025": {"Monday": {"07:00": True}},
+            "Sem. du 10 au 16 août 2025": {"Monday": {"07:00": False}},
+        })
+        session.commit()
+
+        expired = db_availability.expired_weeks(["17 au 23 août 2025", "24 au 30 août 2025"], retention_weeks=1)
+        deleted = db_availability.prune_weeks(session, expired, archive_dir=str(tmp_path / "archive"))
+        session.commit()
+
+        assert deleted == 1
+        assert sorted(session.exec(select(Week.start_date)).all()) == ["2025-08-10", "2025-08-17", "2025-08-24"]
+        # Days and timeslots went with the week through ON DELETE CASCADE
+        assert len(session.exec(select(Timeslot)).all()) == 5
+
+        archive, = (tmp_path / "archive").iterdir()
+        records = list(availability_archive.read(str(archive)))
+        assert records == [{
+            "week_label": "3 au 9 août 2025", "start_date": "2025-08-03", "day_name": "Monday",
+            "day_date": "2025-08-04", "availability_bits": 0b10, "known_bits": 0b10,
+        }]
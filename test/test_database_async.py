@@ -0,0 +1,149 @@
+import json
+import pytest
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlmodel import Session, create_engine, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+import db.availability_snapshot as availability_snapshot
+import db.database_async as database_async
+import db.database_availability as db_availability
+from db.database_availability import Appointment, Call_Log, DB_Availability, Feedback, upsert_schedule_data
+from db.write_queue import call_log_writer
+from app import app
+
+
+@pytest.fixture
+def engines(tmp_path, monkeypatch):
+    path = tmp_path / "availability.sqlite"
+    engine = create_engine(f"sqlite:///{path}")
+    DB_Availability.metadata.create_all(bind=engine)
+    monkeypatch.setattr(db_availability, "engine", engine)
+    async_engine = create_async_engine(database_async.async_database_url(f"sqlite:///{path}"))
+    db_availability.enable_sqlite_foreign_keys(async_engine.sync_engine)
+    availability_snapshot.publish(None)
+    yield engine, async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
+    availability_snapshot.publish(None)
+
+
+class TestAsyncDatabase:
+
+    def test_async_database_url(self):
+        assert database_async.async_database_url("sqlite:///test.sqlite") == "sqlite+aiosqlite:///test.sqlite"
+        assert database_async.async_database_url("postgresql+psycopg2://u:p@db/sds") == "postgresql+asyncpg://u:p@db/sds"
+        with pytest.raises(ValueError):
+            database_async.async_database_url("mysql://u:p@db/sds")
+
+    @pytest.mark.asyncio
+    async def test_availability_matches_sync_queries(self, engines):
+        engine, async_session = engines
+        next_sunday = date.today() + timedelta(days=(6 - date.today().weekday()) % 7 or 7)
+        end = next_sunday + timedelta(days=6)
+        months = {english: french for french, english in db_availability.month_map.items()}
+        label = (f"Sem. du {next_sunday.day} {months[next_sunday.strftime('%B')]} au "
+                 f"{end.day} {months[end.strftime('%B')]} {end.year}")
+        with Session(engine) as session:
+            upsert_schedule_data(session, {label: {"Monday": {"07:00": True, "07:15": True, "07:30": True}}})
+            session.commit()
+        check_values = SimpleNamespace(days=["Monday"])
+
+        async with async_session() as session:
+            appointments = await database_async.get_available_appointments(session, check_values, "07:00", "11:00")
+            starts = await database_async.get_available_start_times(session, ["Monday"], "07:00", "11:00", 30)
+            after = datetime.combine(next_sunday, datetime.min.time())
+            next_starts = await database_async.get_next_available_starts(session, after=after, limit=2)
+
+        assert appointments == db_availability.get_available_appointments(check_values, "07:00", "11:00")
+        assert [s["start"] for s in starts] == ["07:00", "07:15"]
+        assert next_starts == db_availability.get_next_available_starts(after=after, limit=2)
+
+    def test_graphql_start_times_use_the_async_session(self, engines, monkeypatch):
+        engine, async_session = engines
+        monkeypatch.setattr(database_async, "async_session", async_session)
+        monkeypatch.setattr(database_async.db_ops, "get_processing_time_db", lambda code: 30)
+        next_sunday = date.today() + timedelta(days=(6 - date.today().weekday()) % 7 or 7)
+        end = next_sunday + timedelta(days=6)
+        months = {english: french for french, english in db_availability.month_map.items()}
+        label = (f"Sem. du {next_sunday.day} {months[next_sunday.strftime('%B')]} au "
+                 f"{end.day} {months[end.strftime('%B')]} {end.year}")
+        with Session(engine) as session:
+            upsert_schedule_data(session, {label: {"Monday": {"07:00": True, "07:15": True, "07:30": True}}})
+            session.commit()
+
+        response = TestClient(app).post("/graphql", json={"query": (
+            '{ availableStartTimes(days: ["Monday"], timeframe: "07:00-11:00", serviceCode: "01T4CLC8FZ")'
+            " { start end } }"
+        )})
+
+        assert response.json()["data"]["availableStartTimes"] == [
+            {"start": "07:00", "end": "07:30"}, {"start": "07:15", "end": "07:45"},
+        ]
+
+    def test_call_log_and_feedback_endpoints(self, engines, monkeypatch):
+        engine, async_session = engines
+        monkeypatch.setattr(call_log_writer, "session_factory", async_session)
+
+        async def get_session():
+            async with async_session() as session:
+                yield session
+
+        app.dependency_overrides[database_async.get_session] = get_session
+        try:
+            client = TestClient(app)
+            response = client.post("/scraper/call_log", json={
+                "telephone": "5149661015", "time": "1131421341", "status": "completed call",
+            })
+            assert response.status_code == 200
+            response = client.post("/scraper/call_log", json={
+                "telephone": "5149661015", "time": "1131421342", "status": "completed call", "appointment_id": 999,
+            })
+            assert response.status_code == 400
+            for text in ("Great service", "Call back later"):
+                response = client.post("/scraper/feedback", json={"phone_number": "5149661015", "feedback": text})
+                assert response.status_code == 200
+        finally:
+            app.dependency_overrides.pop(database_async.get_session)
+
+        with Session(engine) as session:
+            call_log = session.exec(select(Call_Log)).one()
+            feedback = session.exec(select(Feedback)).one()
+        assert feedback.call_log_id == call_log.id
+        assert feedback.feedback == "Great service\nCall back later"
+
+    def test_bulk_call_logs(self, engines, monkeypatch):
+        engine, async_session = engines
+        monkeypatch.setattr(call_log_writer, "session_factory", async_session)
+        with Session(engine) as session:
+            appointment = Appointment(car="RAV4", service_code="01T4CLC8FZ", service_description="Oil",
+                                      date="2026-05-04T15:00:00", telephone="5149661015", transport_mode="aucun")
+            session.add(appointment)
+            session.commit()
+            appointment_id = appointment.id
+
+        client = TestClient(app)
+        response = client.post("/scraper/call_logs:bulk", json=[
+            {"telephone": "5149661015", "time": "1", "status": "completed call", "appointment_id": appointment_id},
+            {"telephone": "5149661015", "status": "completed call"},
+            {"telephone": "5149661015", "time": "3", "status": "completed call", "appointment_id": 999},
+            {"telephone": "5149661015", "time": "4", "status": "not completed call"},
+        ])
+        assert response.status_code == 200
+        body = response.json()
+        assert (body["created"], body["failed"]) == (2, 2)
+        assert [r["status"] for r in body["results"]] == ["created", "invalid", "appointment_not_found", "created"]
+
+        ndjson = "\n".join(
+            json.dumps({"telephone": "4380000000", "time": str(n), "status": "completed call"}) for n in range(3)
+        )
+        response = client.post("/scraper/call_logs:bulk", content=ndjson,
+                               headers={"Content-Type": "application/x-ndjson"})
+        assert response.json()["created"] == 3
+
+        with Session(engine) as session:
+            call_logs = session.exec(select(Call_Log)).all()
+            feedback = session.exec(select(Feedback)).all()
+        assert sorted(c.time for c in call_logs) == ["0", "1", "1", "2", "4"]
+        assert {f.call_log_id for f in feedback} == {c.id for c in call_logs}
+        created = body["results"][0]
+        assert next(c for c in call_logs if c.id == created["call_log_id"]).appointment_id == appointment_id
@@ -0,0 +1,52 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.pool import QueuePool, StaticPool
+from db.engine import create_async_db_engine, create_db_engine
+
+PRAGMAS = ("journal_mode", "synchronous", "foreign_keys", "busy_timeout")
+
+
+def pragma_values(connection) -> dict:
+    return {name: connection.execute(text(f"PRAGMA {name}")).scalar() for name in PRAGMAS}
+
+
+class TestEngineFactory:
+
+    def test_production_profile(self, tmp_path):
+        engine = create_db_engine(f"sqlite:///{tmp_path / 'prod.sqlite'}", profile="production")
+        with engine.connect() as connection:
+            assert pragma_values(connection) == {
+                "journal_mode": "wal", "synchronous": 1, "foreign_keys": 1, "busy_timeout": 5000,
+            }
+        assert isinstance(engine.pool, QueuePool)
+        engine.dispose()
+
+    def test_default_profile_keeps_sqlite_defaults(self, tmp_path):
+        engine = create_db_engine(f"sqlite:///{tmp_path / 'default.sqlite'}", profile="default")
+        with engine.connect() as connection:
+            values = pragma_values(connection)
+        assert values["journal_mode"] == "delete"
+        # Cascading deletes still need foreign keys
+        assert values["foreign_keys"] == 1
+        engine.dispose()
+
+    def test_in_memory_database_shared_by_connections(self):
+        engine = create_db_engine("sqlite://", profile="production")
+        assert isinstance(engine.pool, StaticPool)
+        with engine.begin() as connection:
+            connection.execute(text("CREATE TABLE t (x INTEGER)"))
+        with engine.connect() as connection:
+            assert connection.execute(text("SELECT count(*) FROM t")).scalar() == 0
+
+    def test_unknown_profile(self):
+        with pytest.raises(ValueError):
+            create_db_engine("sqlite://", profile="turbo")
+
+    @pytest.mark.asyncio
+    async def test_async_engine_gets_the_same_pragmas(self, tmp_path):
+        engine = create_async_db_engine(f"sqlite+aiosqlite:///{tmp_path / 'async.sqlite'}", profile="production")
+        async with engine.connect() as connection:
+            values = await connection.run_sync(pragma_values)
+        assert values["journal_mode"] == "wal"
+        assert values["foreign_keys"] == 1
+        await engine.dispose()
@@ -0,0 +1,57 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from scrapers.network import AGGRESSIVE, CONSERVATIVE, ResourcePolicy, ResourceBlocker, ESTIMATED_BYTES
+
+
+def make_route(resource_type: str, url: str):
+    route = MagicMock()
+    route.request.resource_type = resource_type
+    route.request.url = url
+    route.abort = AsyncMock()
+    route.fallback = AsyncMock()
+    return route
+
+
+class TestResourcePolicy:
+
+    def test_aggressive_profile(self):
+        assert AGGRESSIVE.should_block("image", "https://sds.example.com/logo.png")
+        assert AGGRESSIVE.should_block("font", "https://sds.example.com/roboto.woff2")
+        assert AGGRESSIVE.should_block("script", "https://www.googletagmanager.com/gtag/js")
+        assert not AGGRESSIVE.should_block("script", "https://sds.example.com/static/js/main.js")
+        assert not AGGRESSIVE.should_block("xhr", "https://sds.example.com/api/customers")
+
+    def test_conservative_profile(self):
+        assert CONSERVATIVE.should_block("media", "https://sds.example.com/intro.mp4")
+        assert CONSERVATIVE.should_block("script", "https://www.google-analytics.com/analytics.js")
+        assert not CONSERVATIVE.should_block("image", "https://sds.example.com/logo.png")
+        assert not CONSERVATIVE.should_block("font", "https://sds.example.com/roboto.woff2")
+
+    def test_allow_list_wins(self):
+        policy = ResourcePolicy(
+            name="test",
+            blocked_types=frozenset({"image"}),
+            allowed_url_patterns=(r"/captcha/",),
+        )
+        assert policy.should_block("image", "https://sds.example.com/logo.png")
+        assert not policy.should_block("image", "https://sds.example.com/captcha/1.png")
+
+
+class TestResourceBlocker:
+
+    @pytest.mark.asyncio
+    async def test_counts_blocked_requests(self):
+        blocker = ResourceBlocker(AGGRESSIVE)
+        image = make_route("image", "https://sds.example.com/logo.png")
+        document = make_route("document", "https://sds.example.com/login")
+
+        await blocker.handle(image)
+        await blocker.handle(document)
+
+        image.abort.assert_awaited_once()
+        document.fallback.assert_awaited_once()
+        assert blocker.stats.as_dict() == {
+            "blocked_requests": 1,
+            "estimated_bytes_saved": ESTIMATED_BYTES["image"],
+            "by_type": {"image": 1},
+        }
@@ -0,0 +1,83 @@
+import asyncio
+import pytest
+from unittest.mock import patch, AsyncMock, MagicMock
+from scrapers.page_pool import PagePool
+
+
+def make_manager():
+    """Fake BrowserManager whose contexts hand out mock pages parked at an empty input."""
+    def new_page():
+        page = MagicMock()
+        page.is_closed.return_value = False
+        phone_input = MagicMock()
+        phone_input.is_visible = AsyncMock(return_value=True)
+        phone_input.input_value = AsyncMock(return_value="")
+        page.locator.return_value = phone_input
+        page.context.close = AsyncMock()
+        return page
+
+    async def open_context(**options):
+        context = MagicMock()
+        context.new_page = AsyncMock(side_effect=new_page)
+        context.close = AsyncMock()
+        return context
+
+    manager = MagicMock()
+    manager.open_context = AsyncMock(side_effect=open_context)
+    return manager
+
+
+class TestPagePool:
+
+    @pytest.mark.asyncio
+    @patch("scrapers.page_pool.park_page", new_callable=AsyncMock)
+    async def test_borrow_and_release(self, mock_park):
+        pool = PagePool(size=2)
+        await pool.start(make_manager())
+        assert pool.stats()["idle"] == 2
+
+        async with pool.borrow() as page:
+            assert page is not None
+            assert pool.stats()["in_use"] == 1
+
+        await asyncio.gather(*pool._tasks)
+        assert pool.stats()["idle"] == 2
+        # Two pages parked at start plus one reset after the borrow
+        assert mock_park.await_count == 3
+        await pool.stop()
+
+    @pytest.mark.asyncio
+    @patch("scrapers.page_pool.park_page", new_callable=AsyncMock)
+    async def test_borrow_returns_none_when_exhausted(self, mock_park):
+        pool = PagePool(size=1, acquire_timeout_ms=10)
+        await pool.start(make_manager())
+
+        async with pool.borrow() as first:
+            async with pool.borrow() as second:
+                assert first is not None
+                assert second is None
+        await pool.stop()
+
+    @pytest.mark.asyncio
+    @patch("scrapers.page_pool.park_page", new_callable=AsyncMock)
+    async def test_unhealthy_page_is_replaced(self, mock_park):
+        pool = PagePool(size=1)
+        await pool.start(make_manager())
+        async with pool.borrow() as page:
+            broken = page
+        await asyncio.gather(*pool._tasks)
+
+        broken.is_closed.return_value = True
+        async with pool.borrow() as page:
+            assert page is None
+        await asyncio.gather(*pool._tasks)
+
+        assert broken not in pool._pages
+        assert pool.stats()["idle"] == 1
+        await pool.stop()
+
+    @pytest.mark.asyncio
+    async def test_borrow_without_start(self):
+        pool = PagePool(size=2)
+        async with pool.borrow() as page:
+            assert page is None
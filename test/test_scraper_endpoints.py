@@ -56,6 +56,65 @@ class TestScraperEndpoints(unittest.TestCase):
         self.assertEqual(response.status_code, 400)
         self.assertIn("Invalid data", response.text)
 
+    @patch("api.scrapper.database_async.get_available_start_times", new_callable=AsyncMock)
+    @patch("db.database_async.db_ops.get_processing_time_db", return_value=60)
+    def test_check_availability_for_service(self, mock_processing_time, mock_starts):
+        """Test /scraper/check_availability uses the service processing time."""
+        mock_starts.return_value = [{"day": "Monday", "start": "14:00"}]
+
+        response = client.get(
+            "/scraper/check_availability?timeframe=14:00-16:00&weekdays=Monday&service_code=01T4CLC8FZ"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), [{"day": "Monday", "start": "14:00"}])
+        mock_starts.assert_awaited_once()
+        self.assertEqual(mock_starts.await_args.args[1:], (["Monday"], "14:00", "16:00", 60))
+
+    @patch("db.database_async.db_ops.get_processing_time_db", return_value=None)
+    def test_check_availability_unknown_service(self, mock_processing_time):
+        """Test /scraper/check_availability with an unknown service code."""
+        response = client.get(
+            "/scraper/check_availability?timeframe=14:00-16:00&weekdays=Monday&service_code=NOPE"
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_availability_status(self):
+        """Test /scraper/availability_status lists the refresh tiers."""
+        response = client.get("/scraper/availability_status")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [tier["name"] for tier in response.json()["tiers"]],
+            ["current_week", "next_week", "later_weeks"],
+        )
+
+    def test_network_status(self):
+        """Test /scraper/network_status reports the blocked requests with estimated bytes."""
+        response = client.get("/scraper/network_status")
+        self.assertEqual(response.status_code, 200)
+        blocked = response.json()["blocked"]
+        self.assertTrue(blocked["bytes_saved_are_estimated"])
+        self.assertIn("estimated_bytes_saved", blocked)
+
+    @patch("api.scrapper.availability_refresher.refresh_all", new_callable=AsyncMock)
+    def test_add_availabilities_while_refreshing(self, mock_refresh_all):
+        """Test /scraper/add_availabilities answers 202 when tiers are already refreshing."""
+        mock_refresh_all.return_value = {
+            "current_week": "skipped", "next_week": "skipped", "later_weeks": "skipped",
+        }
+        response = client.get("/scraper/add_availabilities")
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()["tiers"]["current_week"], "skipped")
+
+    @patch("api.scrapper.availability_refresher.refresh_all", new_callable=AsyncMock)
+    def test_add_availabilities_failure(self, mock_refresh_all):
+        """Test /scraper/add_availabilities answers 500 when a tier fails."""
+        mock_refresh_all.return_value = {
+            "current_week": "refreshed", "next_week": "failed", "later_weeks": "skipped",
+        }
+        response = client.get("/scraper/add_availabilities")
+        self.assertEqual(response.status_code, 500)
+        self.assertTrue(response.json()["detail"].startswith("next_week: "))
+
     # @patch("api.scrapper.db_availability.insert_call_log_db")
     # @patch("api.scrapper.db_availability.get_session")
     # def test_call_log_success(self, mock_session, mock_insert):
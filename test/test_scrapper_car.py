@@ -1,5 +1,8 @@
+import asyncio
 import pytest
+from unittest.mock import patch, AsyncMock, MagicMock
 from scrapers.getCarScrapper import GetCarScrapper
+from test.conftest import fixture_html
 class TestGetCarScrapper:
     
     @pytest.mark.asyncio
@@ -7,4 +10,101 @@ class TestGetCarScrapper:
         scrapper = GetCarScrapper("5142069161", None)
         cars = await scrapper.get_cars()
         
-        assert len(cars) > 0
\ No newline at end of file
+        assert len(cars) > 0
+
+def make_page(popup_visible: bool = False):
+    page = MagicMock()
+    page.url = "https://sds.example.com/t1/appointments-qab/2"
+    page.evaluate = AsyncMock(return_value=True)
+    page.locator.return_value.is_visible = AsyncMock(return_value=popup_visible)
+    return page
+
+
+class TestDeterminePageState:
+
+    @pytest.mark.asyncio
+    async def test_first_definitive_state_wins_and_cancels_others(self):
+        scrapper = GetCarScrapper("5142069161", None)
+        scrapper.page = make_page()
+        cancelled = asyncio.Event()
+
+        async def slow_not_found():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        async def single_car():
+            await asyncio.sleep(0.05)
+            return "ONE_CAR_PAGE", scrapper.page
+
+        with patch.object(scrapper, "_check_not_found_fast", side_effect=slow_not_found), \
+                patch.object(scrapper, "_detect_popup", AsyncMock(return_value=("NO_POPUP", None))), \
+                patch.object(scrapper, "_check_single_car_page", side_effect=single_car):
+            state, _ = await asyncio.wait_for(scrapper.determine_page_state(), timeout=1)
+
+        assert state == "ONE_CAR_PAGE"
+        assert cancelled.is_set()
+
+    @pytest.mark.asyncio
+    async def test_popup_is_handled_before_single_car(self):
+        scrapper = GetCarScrapper("5142069161", None)
+        scrapper.page = make_page(popup_visible=True)
+
+        with patch.object(scrapper, "_check_not_found_fast", AsyncMock(return_value=("NO_NOT_FOUND", None))), \
+                patch.object(scrapper, "_detect_popup", AsyncMock(return_value=("NO_POPUP", None))), \
+                patch.object(scrapper, "_check_single_car_page", AsyncMock(return_value=("ONE_CAR_PAGE", None))), \
+                patch.object(scrapper, "_check_popup_fast", AsyncMock(return_value=("MULTIPLE_CARS_POPUP", None))):
+            state, _ = await scrapper.determine_page_state()
+
+        assert state == "MULTIPLE_CARS_POPUP"
+
+    @pytest.mark.asyncio
+    async def test_unknown_when_nothing_matches(self):
+        scrapper = GetCarScrapper("5142069161", None)
+        scrapper.page = make_page()
+
+        with patch.object(scrapper, "_check_not_found_fast", AsyncMock(return_value=("NO_NOT_FOUND", None))), \
+                patch.object(scrapper, "_detect_popup", AsyncMock(return_value=("NO_POPUP", None))), \
+                patch.object(scrapper, "_check_single_car_page", AsyncMock(side_effect=RuntimeError("boom"))):
+            state, _ = await scrapper.determine_page_state()
+
+        assert state == "UNKNOWN"
+
+
+@pytest.mark.integration
+class TestBatchedExtraction:
+    """CAR_DETAILS_JS and SERVICE_HISTORY_JS against saved SDSweb fragments, checked
+    against the per-element path they replace."""
+
+    @pytest.mark.parametrize("batched", [True, False])
+    async def test_car_record(self, browser_page, batched):
+        await browser_page.set_content(fixture_html("sdsweb_single_car.html"))
+        scrapper = GetCarScrapper("5142069161", None)
+        scrapper.page = browser_page
+        scrapper.batched_extraction = batched
+
+        cars = await scrapper.extract_single_car_from_page()
+
+        assert cars == [{
+            "maker": "TOYOTA", "model": "RAV4", "year": "2022",
+            "caller": "514-206-9161", "cylinders": "4", "is_hybrid": True,
+        }]
+
+    @pytest.mark.parametrize("batched", [True, False])
+    async def test_service_history(self, browser_page, batched):
+        await browser_page.set_content(fixture_html("sdsweb_service_history.html"))
+        scrapper = GetCarScrapper("5142069161", None)
+        scrapper.page = browser_page
+        scrapper.batched_extraction = batched
+
+        history = await scrapper._extract_service_history()
+
+        assert history == {
+            "2024-05-01": {"services": ["SERVICE 1 - Entretien régulier", "Rotation des pneus"],
+                           "kilometers": "45 000 km"},
+            "2023-11-12": {"services": ["SERVICE 3 - Entretien régulier"], "kilometers": "30 000 km"},
+            "2023-04-02": {"services": [], "kilometers": "15 000 km"},
+        }
+        assert scrapper.get_next_service(history) == "SERVICE 2"
@@ -0,0 +1,46 @@
+import json
+import os
+import time
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from scrapers.session_store import SessionStore
+
+
+class TestSessionStore:
+
+    @pytest.mark.asyncio
+    async def test_save_and_load(self, tmp_path):
+        store = SessionStore(str(tmp_path / "session.json"), ttl_seconds=60)
+        state = {"cookies": [{"name": "JSESSIONID", "value": "abc"}], "origins": []}
+        context = MagicMock()
+        context.storage_state = AsyncMock(return_value=state)
+
+        await store.save(context)
+
+        assert store.load() == state
+        assert oct(os.stat(store.path).st_mode & 0o777) == "0o600"
+
+    def test_expired_session_is_ignored(self, tmp_path):
+        path = tmp_path / "session.json"
+        path.write_text(json.dumps({"expires_at": time.time() - 1, "storage_state": {"cookies": []}}))
+        store = SessionStore(str(path), ttl_seconds=60)
+
+        assert store.load() is None
+
+    def test_missing_or_corrupt_file(self, tmp_path):
+        path = tmp_path / "session.json"
+        store = SessionStore(str(path), ttl_seconds=60)
+        assert store.load() is None
+
+        path.write_text("{not json")
+        assert store.load() is None
+
+    def test_invalidate(self, tmp_path):
+        path = tmp_path / "session.json"
+        path.write_text(json.dumps({"expires_at": time.time() + 60, "storage_state": {}}))
+        store = SessionStore(str(path), ttl_seconds=60)
+
+        store.invalidate()
+        store.invalidate()
+
+        assert not path.exists()
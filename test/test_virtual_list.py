@@ -0,0 +1,56 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+from scrapers.virtual_list import full_height_calendar, FORCE_HEIGHT_JS
+
+SCROLLER = "div[data-testid='virtuoso-scroller']"
+
+
+def make_page(rendered_after: int):
+    """Fake page whose calendar is fully rendered after `rendered_after` checks."""
+    page = MagicMock()
+    page.viewport_size = {"width": 1920, "height": 1080}
+    page.set_viewport_size = AsyncMock()
+    page.evaluate = AsyncMock(return_value=True)
+    page.is_closed.return_value = False
+    checks = {"count": 0}
+
+    async def wait_for_function(*args, **kwargs):
+        checks["count"] += 1
+        if checks["count"] <= rendered_after:
+            raise PlaywrightTimeoutError("not rendered")
+
+    page.wait_for_function = AsyncMock(side_effect=wait_for_function)
+    return page
+
+
+class TestFullHeightCalendar:
+
+    @pytest.mark.asyncio
+    async def test_tall_viewport_renders_and_is_restored(self):
+        page = make_page(rendered_after=0)
+
+        async with full_height_calendar(page, SCROLLER, viewport_height=4000) as rendered:
+            assert rendered
+            page.set_viewport_size.assert_awaited_with({"width": 1920, "height": 4000})
+
+        page.set_viewport_size.assert_awaited_with({"width": 1920, "height": 1080})
+        page.evaluate.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_forces_scroller_height_when_viewport_is_not_enough(self):
+        page = make_page(rendered_after=1)
+
+        async with full_height_calendar(page, SCROLLER, viewport_height=4000) as rendered:
+            assert rendered
+
+        page.evaluate.assert_awaited_once_with(FORCE_HEIGHT_JS, SCROLLER)
+
+    @pytest.mark.asyncio
+    async def test_incomplete_render_falls_back(self):
+        page = make_page(rendered_after=100)
+
+        async with full_height_calendar(page, SCROLLER, viewport_height=4000) as rendered:
+            assert not rendered
+
+        page.set_viewport_size.assert_awaited_with({"width": 1920, "height": 1080})
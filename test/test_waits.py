@@ -0,0 +1,60 @@
+import asyncio
+import pytest
+from unittest.mock import MagicMock
+from scrapers.waits import NetworkTracker
+
+
+class FakePage:
+    """Minimal page exposing Playwright's event emitter API."""
+
+    def __init__(self):
+        self.listeners = {}
+
+    def on(self, event, handler):
+        self.listeners.setdefault(event, []).append(handler)
+
+    def remove_listener(self, event, handler):
+        self.listeners[event].remove(handler)
+
+    def emit(self, event, request):
+        for handler in list(self.listeners.get(event, [])):
+            handler(request)
+
+
+def make_request(resource_type="xhr"):
+    request = MagicMock()
+    request.resource_type = resource_type
+    return request
+
+
+class TestNetworkTracker:
+
+    @pytest.mark.asyncio
+    async def test_waits_for_inflight_request(self):
+        page = FakePage()
+        async with NetworkTracker(page) as network:
+            request = make_request()
+            page.emit("request", request)
+            loop = asyncio.get_running_loop()
+            loop.call_later(0.1, page.emit, "requestfinished", request)
+
+            start = loop.time()
+            assert await network.wait_for_idle(idle_ms=50, timeout=1000)
+            assert loop.time() - start >= 0.15
+
+        assert all(not handlers for handlers in page.listeners.values())
+
+    @pytest.mark.asyncio
+    async def test_times_out_while_busy(self):
+        page = FakePage()
+        async with NetworkTracker(page) as network:
+            page.emit("request", make_request())
+            assert not await network.wait_for_idle(idle_ms=50, timeout=200)
+            assert network.inflight == 1
+
+    @pytest.mark.asyncio
+    async def test_ignores_long_lived_connections(self):
+        page = FakePage()
+        async with NetworkTracker(page) as network:
+            page.emit("request", make_request("websocket"))
+            assert await network.wait_for_idle(idle_ms=20, timeout=200)
@@ -0,0 +1,121 @@
+import asyncio
+import pytest
+from contextlib import asynccontextmanager
+from fastapi import HTTPException
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlmodel import Session, create_engine, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+import db.database_availability as db_availability
+from db.database_availability import Call_Log, DB_Availability, Feedback
+from db.write_queue import WriteQueue
+
+
+@pytest.fixture
+def engines(tmp_path):
+    path = tmp_path / "availability.sqlite"
+    engine = create_engine(f"sqlite:///{path}")
+    DB_Availability.metadata.create_all(bind=engine)
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    db_availability.enable_sqlite_foreign_keys(async_engine.sync_engine)
+    yield engine, async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
+
+
+def call_log(n: int, appointment_id=None) -> dict:
+    return {"telephone": "5149661015", "time": str(n), "status": "completed call", "appointment_id": appointment_id}
+
+
+class TestWriteQueue:
+
+    @pytest.mark.asyncio
+    async def test_burst_written_in_group_commits(self, engines):
+        engine, async_session = engines
+        writer = WriteQueue(session_factory=async_session, max_batch=20, max_delay_ms=20)
+        writer.start()
+        try:
+            ids = await asyncio.gather(*(writer.add_call_log(call_log(n)) for n in range(50)))
+            assert await writer.append_feedback("5149661015", "Great service") == ids[-1][1]
+            assert await writer.append_feedback("4380000000", "Unknown caller") is None
+        finally:
+            await writer.stop()
+
+        assert len({call_log_id for call_log_id, _ in ids}) == 50
+        assert writer.stats.written == 52
+        assert writer.stats.batches < 10
+        with Session(engine) as session:
+            feedback = session.exec(select(Feedback)).all()
+        assert {f.call_log_id for f in feedback} == {call_log_id for call_log_id, _ in ids}
+        assert [f.feedback for f in feedback if f.feedback] == ["Great service"]
+
+    @pytest.mark.asyncio
+    async def test_failing_write_does_not_fail_its_batch(self, engines):
+        engine, async_session = engines
+        writer = WriteQueue(session_factory=async_session, max_delay_ms=20)
+        writer.start()
+        try:
+            results = await asyncio.gather(
+                writer.add_call_log(call_log(1)),
+                # No such appointment: rejected by the foreign key
+                writer.add_call_log(call_log(2, appointment_id=999)),
+                writer.add_call_log(call_log(3)),
+                return_exceptions=True,
+            )
+        finally:
+            await writer.stop()
+
+        assert isinstance(results[1], IntegrityError)
+        assert writer.stats.failed == 1
+        with Session(engine) as session:
+            assert sorted(c.time for c in session.exec(select(Call_Log)).all()) == ["1", "3"]
+
+    @pytest.mark.asyncio
+    async def test_poisoned_job_fails_alone(self, engines):
+        engine, async_session = engines
+        writer = WriteQueue(session_factory=async_session, max_delay_ms=20)
+        writer.start()
+        try:
+            results = await asyncio.gather(
+                writer.add_call_log(call_log(1)),
+                # Not a database error: raised by the writer itself
+                writer._submit("call_log_v2", call_log(2)),
+                writer.add_call_log(call_log(3)),
+                return_exceptions=True,
+            )
+        finally:
+            await writer.stop()
+
+        assert isinstance(results[1], ValueError)
+        assert [type(r) for r in (results[0], results[2])] == [tuple, tuple]
+        assert (writer.stats.written, writer.stats.failed) == (2, 1)
+        with Session(engine) as session:
+            assert sorted(c.time for c in session.exec(select(Call_Log)).all()) == ["1", "3"]
+
+    @pytest.mark.asyncio
+    async def test_full_queue_applies_backpressure(self, engines):
+        engine, async_session = engines
+        gate = asyncio.Event()
+
+        @asynccontextmanager
+        async def slow_session():
+            await gate.wait()
+            async with async_session() as session:
+                yield session
+
+        writer = WriteQueue(session_factory=slow_session, max_batch=1, maxsize=1, put_timeout=0.05)
+        writer.start()
+        try:
+            first = asyncio.create_task(writer.add_call_log(call_log(1)))
+            await asyncio.sleep(0.01)  # The writer is now holding the first write
+            second = asyncio.create_task(writer.add_call_log(call_log(2)))
+            await asyncio.sleep(0.01)
+            with pytest.raises(HTTPException) as error:
+                await writer.add_call_log(call_log(3))
+            assert error.value.status_code == 503
+            assert writer.status()["depth"] == 1
+
+            gate.set()
+            await asyncio.gather(first, second)
+        finally:
+            await writer.stop()
+
+        assert (writer.stats.waited_for_room, writer.stats.rejected) == (1, 1)